@@ -2,18 +2,94 @@
 # Purpose: [Describe the purpose of this file]
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import List, Optional
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "FastAPI Project"
     VERSION: str = "0.1.0"
     ALLOWED_ORIGINS: List[str] = []
     UPLOAD_DIR: str = "uploads"
+    # 업로드 최대 크기와 업로드 파일을 디스크에 쓸 때의 청크 크기 (bytes)
+    UPLOAD_MAX_BYTES: int = 1024 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    # 업로드된 CSV를 학습 시 Parquet으로도 저장하여 재학습 때 사용 (pyarrow 필요)
+    UPLOAD_CONVERT_TO_PARQUET: bool = False
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     PYTHONPATH: str = ""
+    LOG_LEVEL: str = "INFO"
+    # 요청 로그를 남길 비율 (0.0 ~ 1.0, 5xx 응답은 항상 기록)
+    REQUEST_LOG_SAMPLE_RATE: float = 0.01
     ML_OUTPUT_DIR: str = "C:/_YHJ/fast/backend/ml/trained_models"
+    # 메모리에 캐싱할 모델들의 최대 크기 합 (bytes)
+    MODEL_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024
+    # 모델 로드 시 압축하지 않은 파일의 배열을 메모리 매핑 ("r", 비우면 전부 메모리로 읽음)
+    MODEL_MMAP_MODE: Optional[str] = "r"
+    # 모델 저장: joblib 압축 수준 (0이면 압축 안 함 - 메모리 매핑 가능, 1~9는 작은 파일)과 압축 방식 (zlib, gzip, bz2, lzma, xz, lz4)
+    MODEL_COMPRESS_LEVEL: int = 0
+    MODEL_COMPRESS_METHOD: str = "zlib"
+    # 예측용으로 트리를 평탄화한 포레스트(<모델>.flat.pkl)를 모델 옆에 함께 저장 (작은 예측 요청에 자동으로 사용)
+    MODEL_EXPORT_FLAT: bool = False
+    # 평탄화한 포레스트로 예측할 최대 행 수 (더 큰 요청은 원래 모델로 예측)
+    MODEL_FLAT_MAX_ROWS: int = 100
+    # 모델 저장소 (ML_OUTPUT_DIR/<모델>/versions/<버전>/): 모델 이름별로 남길 최근 버전 수 (current 버전은 항상 보관, 0이면 모두 보관)
+    MODEL_STORE_KEEP_VERSIONS: int = 10
+    # 서버 시작 후 백그라운드에서 최근 모델들을 레지스트리에 미리 로드
+    MODEL_REGISTRY_PREWARM: bool = False
+    # 동시에 실행할 학습 작업 수 / 대기열에 쌓을 수 있는 최대 작업 수
+    TRAINING_MAX_WORKERS: int = 2
+    TRAINING_MAX_PENDING: int = 16
+    # 학습 결과 캐시가 사용할 최대 디스크 용량 (bytes)
+    TRAINING_CACHE_MAX_BYTES: int = 5 * 1024 * 1024 * 1024
+    # 학습 방식 기본값 (업로드 요청의 폼 값으로 덮어쓸 수 있음)
+    # TRAINING_N_JOBS: 학습 작업 하나가 사용할 CPU 코어 수 (-1이면 전체)
+    # TRAINING_WARM_START: 트리를 TRAINING_WARM_START_STEP개씩 추가하며 학습하고 진행률 보고
+    # TRAINING_MAX_SAMPLES: 트리마다 사용할 표본 비율(0~1) 또는 행 수 (비우면 전체)
+    TRAINING_N_JOBS: int = 1
+    TRAINING_WARM_START: bool = False
+    TRAINING_WARM_START_STEP: int = 25
+    TRAINING_MAX_SAMPLES: Optional[float] = None
+    # 학습 데이터 로드 직후 특성 열을 작은 타입으로 변환 (float32, 최소 정수 타입, 반복되는 문자열은 category)
+    TRAINING_COMPACT_DTYPES: bool = True
+    # 전체 학습 후에도 증분 학습용 상태(학습 데이터, 행 해시, 특성 통계)를 저장 (증분 학습은 항상 저장)
+    TRAINING_KEEP_STATE: bool = False
+    # 증분 학습 상태를 저장할 디렉토리 (학습 데이터가 들어 있으므로 /static으로 공개되는 ML_OUTPUT_DIR 밖에 둠)
+    TRAINING_STATE_DIR: str = "training_state"
+    # 증분 학습(incremental=true) 한 번에 새 행으로 추가할 트리 수
+    INCREMENTAL_TREES_PER_UPDATE: int = 20
+    # 하이퍼파라미터 탐색 (/api/search): 병렬 시험 프로세스 수, random/halving 기본 시험 수 (grid는 모든 조합), 시간 예산(초), 저장할 상위 모델 수
+    SEARCH_MAX_WORKERS: int = 2
+    SEARCH_MAX_TRIALS: int = 20
+    SEARCH_BUDGET_SECONDS: float = 600.0
+    SEARCH_TOP_K: int = 3
+    # 모델 평가: 부트스트랩 신뢰구간 재표본 수 (0이면 계산 안 함), 신뢰 수준, 보정 곡선 구간 수, 부트스트랩 병렬 스레드 수
+    EVALUATION_BOOTSTRAP: int = 0
+    EVALUATION_CONFIDENCE: float = 0.95
+    EVALUATION_CALIBRATION_BINS: int = 10
+    EVALUATION_N_JOBS: int = 1
+    # 특성 기여도 (/api/models/{name}/importance): 평가용 표본 행 수, 특성당 섞는 횟수, 병렬 작업 수 (-1이면 전체 코어)
+    IMPORTANCE_SAMPLE_SIZE: int = 2000
+    IMPORTANCE_N_REPEATS: int = 5
+    IMPORTANCE_N_JOBS: int = -1
+    # 시각화 (/api/models/{name}/plots/{plot_type}): 렌더링 프로세스 수, 클래스별 표본 행 수, 산점도 등에 사용할 상위 특성 수
+    PLOT_MAX_WORKERS: int = 1
+    PLOT_SAMPLE_SIZE_PER_CLASS: int = 500
+    PLOT_TOP_N: int = 3
+    # 점 데이터 (/api/models/{name}/points): LTTB/표본 방식의 점 수, hexbin 가로 육각형 수
+    PLOT_POINTS: int = 1000
+    PLOT_HEXBIN_GRIDSIZE: int = 50
+    # 스트리밍 예측 시 한 번에 읽는 행 수
+    PREDICT_CHUNK_SIZE: int = 10000
+    # 모델 목록 인덱스를 디스크와 다시 비교하기까지의 최소 간격 (초)
+    MODEL_CATALOG_REFRESH_SECONDS: float = 1.0
+    # /api/predict 동시 요청 배치 처리 (최대 배치 행 수, 첫 요청 후 최대 대기 시간)
+    PREDICT_BATCHING_ENABLED: bool = True
+    PREDICT_BATCH_MAX_SIZE: int = 10000
+    PREDICT_BATCH_MAX_WAIT_MS: float = 5.0
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -31,17 +107,10 @@ class Settings(BaseSettings):
             try:
                 instance.ALLOWED_ORIGINS = json.loads(allowed_origins)
             except json.JSONDecodeError:
-                print(f"Warning: ALLOWED_ORIGINS is not a valid JSON. Value: {allowed_origins}")
+                logger.warning(f"ALLOWED_ORIGINS is not a valid JSON. Value: {allowed_origins}")
                 instance.ALLOWED_ORIGINS = []
         
-        print(f"Loaded ALLOWED_ORIGINS: {instance.ALLOWED_ORIGINS}")
         return instance
 
+# import 시에는 설정만 읽음 (출력 등 부수 효과 없음 - 설정 내용은 서버 시작 시 DEBUG 로그로 기록)
 settings = Settings()
-
-# 설정 내용 출력 (디버깅 목적)
-print(f"ALLOWED_ORIGINS: {settings.ALLOWED_ORIGINS}")
-print(f"HOST: {settings.HOST}")
-print(f"PORT: {settings.PORT}")
-print(f"PYTHONPATH: {settings.PYTHONPATH}")
-print(f"ML_OUTPUT_DIR: {settings.ML_OUTPUT_DIR}")
\ No newline at end of file
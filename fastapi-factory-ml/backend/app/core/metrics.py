@@ -0,0 +1,115 @@
+# File: C:\_YHJ\fast\backend\app\core\metrics.py
+# Purpose: In-memory metrics store rendered in Prometheus text format at /metrics
+
+import bisect
+import threading
+
+# 요청 처리 시간(초) 히스토그램 구간
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items()) + "}"
+
+class Histogram:
+    """
+    고정 구간(buckets) 히스토그램. 구간별 개수와 합계, 최댓값을 기록합니다.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def to_dict(self):
+        labels = [str(b) for b in self.buckets] + ["+Inf"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "max": self.max,
+        }
+
+    def prometheus_lines(self, name, labels=None):
+        labels = labels or {}
+        lines = []
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': bound})} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {self.sum}")
+        lines.append(f"{name}_count{_format_labels(labels)} {self.count}")
+        return lines
+
+class MetricsStore:
+    """
+    라우트별 요청 처리 시간 히스토그램, 상태 코드별 요청 수, 요청/응답 바이트 수를 기록합니다.
+    다른 모듈은 register_collector로 Prometheus 텍스트 줄을 추가할 수 있습니다.
+    """
+
+    def __init__(self, latency_buckets=LATENCY_BUCKETS):
+        self.latency_buckets = latency_buckets
+        self._lock = threading.Lock()
+        self._latency = {}
+        self._requests = {}
+        self._request_bytes = {}
+        self._response_bytes = {}
+        self._collectors = []
+
+    def observe_request(self, method, route, status_code, duration, request_bytes, response_bytes):
+        key = (method, route)
+        with self._lock:
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = Histogram(self.latency_buckets)
+            histogram.observe(duration)
+            status_key = (method, route, str(status_code))
+            self._requests[status_key] = self._requests.get(status_key, 0) + 1
+            self._request_bytes[key] = self._request_bytes.get(key, 0) + request_bytes
+            self._response_bytes[key] = self._response_bytes.get(key, 0) + response_bytes
+
+    def register_collector(self, collector):
+        """
+        collector()는 Prometheus 텍스트 형식의 줄 목록을 반환해야 합니다.
+        """
+        self._collectors.append(collector)
+
+    def render_prometheus(self):
+        with self._lock:
+            lines = [
+                "# HELP http_request_duration_seconds Request latency by route.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (method, route), histogram in sorted(self._latency.items()):
+                lines.extend(histogram.prometheus_lines("http_request_duration_seconds", {"method": method, "route": route}))
+
+            lines += ["# HELP http_requests_total Requests by route and status code.", "# TYPE http_requests_total counter"]
+            for (method, route, status), count in sorted(self._requests.items()):
+                lines.append(f"http_requests_total{_format_labels({'method': method, 'route': route, 'status': status})} {count}")
+
+            for name, values, help_text in (
+                ("http_request_size_bytes_total", self._request_bytes, "Request body bytes by route."),
+                ("http_response_size_bytes_total", self._response_bytes, "Response body bytes by route."),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for (method, route), total in sorted(values.items()):
+                    lines.append(f"{name}{_format_labels({'method': method, 'route': route})} {total}")
+
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+metrics_store = MetricsStore()
@@ -1,20 +1,68 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from app.routes.api import router as api_router
 from app.middleware.logging import log_requests
 from app.core.config import settings
+from app.service.training_jobs import job_manager
+from app.service.model_registry import model_registry, model_store
+from app.service.model_catalog import model_catalog
+from app.service.plot_service import plot_renderer
+from ml.common.file_operations import HOLDOUT_SUFFIX
+from contextlib import asynccontextmanager
+import asyncio
 import logging
-import uvicorn
+import os
 
 # 로깅 설정
-logging.basicConfig(level=logging.DEBUG)
+logging.basicConfig(level=settings.LOG_LEVEL.upper())
 logger = logging.getLogger(__name__)
 
+# /static으로 제공하지 않는 ML_OUTPUT_DIR 안의 디렉토리 (학습 캐시, 이전 위치의 증분 학습 상태)
+PRIVATE_STATIC_DIRS = (".training_cache", ".state")
+
+class OutputStaticFiles(StaticFiles):
+    """
+    ML_OUTPUT_DIR을 제공하되 학습 데이터가 들어 있는 파일(평가용 표본, 학습 캐시, 증분 학습 상태)은 404로 숨깁니다.
+    """
+
+    async def get_response(self, path, scope):
+        parts = os.path.normcase(os.path.normpath(path)).split(os.sep)
+        if parts[-1].endswith(HOLDOUT_SUFFIX) or any(part in PRIVATE_STATIC_DIRS for part in parts):
+            raise StarletteHTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+def prewarm_models():
+    """
+    최근 학습된 모델부터 메모리 예산 안에서 레지스트리에 미리 로드합니다.
+    """
+    items, _, _ = model_catalog.list()
+    model_registry.prewarm([item["path"] for item in items])
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.debug(f"Settings: {settings.model_dump()}")
+
+    # 모델 저장소 이전에 저장된 <이름>.joblib 모델을 저장소로 가져옴 (이미 가져온 모델은 건너뜀)
+    imported = await asyncio.get_running_loop().run_in_executor(None, model_store.migrate_legacy_models)
+    if imported:
+        logger.info(f"Imported legacy models into the model store: {imported}")
+
+    # 모델 로드(및 scikit-learn import)는 서버 시작을 막지 않도록 백그라운드 스레드에서 실행
+    if settings.MODEL_REGISTRY_PREWARM:
+        asyncio.get_running_loop().run_in_executor(None, prewarm_models)
+
+    yield
+    # 종료 시 학습/렌더링 워커 프로세스 정리
+    job_manager.shutdown()
+    plot_renderer.shutdown()
+
 def create_app() -> FastAPI:
     app = FastAPI(
         title=settings.PROJECT_NAME,
-        version=settings.VERSION
+        version=settings.VERSION,
+        lifespan=lifespan
     )
 
     # CORS 설정
@@ -28,7 +76,7 @@ def create_app() -> FastAPI:
 
     # 정적 파일 서빙 설정
     static_folder_path = settings.ML_OUTPUT_DIR
-    app.mount("/static", StaticFiles(directory=static_folder_path), name="static")
+    app.mount("/static", OutputStaticFiles(directory=static_folder_path), name="static")
 
     # 미들웨어 추가
     app.middleware("http")(log_requests)
@@ -46,5 +94,7 @@ def create_app() -> FastAPI:
 app = create_app()
 
 if __name__ == "__main__":
+    import uvicorn
+
     logger.info(f"Starting server on {settings.HOST}:{settings.PORT}")
     uvicorn.run(app, host=settings.HOST, port=settings.PORT)
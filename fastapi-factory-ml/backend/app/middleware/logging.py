@@ -1,14 +1,75 @@
 # Absolute path: C:\_YHJ\fast\backend\app\middleware\logging.py
 
+import json
 import logging
+import random
+import time
 from fastapi import Request
+from app.core.config import settings
+from app.core.metrics import metrics_store
 
 logger = logging.getLogger(__name__)
 
+def _route_template(request: Request):
+    # /api/jobs/{job_id}처럼 경로 파라미터를 그대로 두어 라우트별로 집계 (매칭 실패는 하나로 묶음)
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+def _log_request(request: Request, route, status_code, duration, request_bytes, response_bytes):
+    # 5xx는 항상, 나머지는 REQUEST_LOG_SAMPLE_RATE 비율만 구조화된 JSON으로 기록
+    if status_code < 500 and random.random() >= settings.REQUEST_LOG_SAMPLE_RATE:
+        return
+    logger.info(json.dumps({
+        "event": "http_request",
+        "method": request.method,
+        "route": route,
+        "path": request.url.path,
+        "status": status_code,
+        "duration_ms": round(duration * 1000, 3),
+        "request_bytes": request_bytes,
+        "response_bytes": response_bytes,
+        "client": request.client.host if request.client else None,
+    }))
+
 async def log_requests(request: Request, call_next):
-    logger.debug(f"Incoming request: {request.method} {request.url}")
-    logger.debug(f"Request headers: {request.headers}")
-    response = await call_next(request)
-    logger.debug(f"Outgoing response: Status {response.status_code}")
-    logger.debug(f"Response headers: {response.headers}")
+    """
+    요청마다 라우트별 처리 시간, 요청/응답 바이트 수, 상태 코드를 metrics_store에 기록하고
+    일부 요청만 샘플링하여 로그로 남깁니다.
+    """
+    start = time.perf_counter()
+    request_bytes = int(request.headers.get("content-length") or 0)
+
+    def record(status_code, response_bytes):
+        duration = time.perf_counter() - start
+        metrics_store.observe_request(request.method, route, status_code, duration, request_bytes, response_bytes)
+        _log_request(request, route, status_code, duration, request_bytes, response_bytes)
+
+    try:
+        response = await call_next(request)
+    except Exception:
+        # 처리되지 않은 예외는 서버 오류 응답이 되므로 500으로 집계하고 다시 발생시킴
+        route = _route_template(request)
+        logger.error(f"Unhandled error in {request.method} {route}", exc_info=True)
+        record(500, 0)
+        raise
+    route = _route_template(request)
+
+    content_length = response.headers.get("content-length")
+    if content_length is not None:
+        record(response.status_code, int(content_length))
+        return response
+
+    # 스트리밍 응답은 전송이 끝날 때 실제 바이트 수로 기록
+    body_iterator = response.body_iterator
+
+    async def counting_body():
+        sent = 0
+        try:
+            async for chunk in body_iterator:
+                sent += len(chunk)
+                yield chunk
+        finally:
+            record(response.status_code, sent)
+
+    response.body_iterator = counting_body()
     return response
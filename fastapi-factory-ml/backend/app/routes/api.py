@@ -1,11 +1,23 @@
 # File: C:\_YHJ\fast\backend\app\routes\api.py
 # Purpose: API routes for interacting with the backend
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from app.service.file_service import upload_file, list_files, predict_with_model
-from ml.main import run_model
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from app.service.file_service import upload_file, get_training_data_path, get_training_data_format, predict_with_model, predict_with_model_batched, stream_predictions, get_feature_attributions, STREAM_MEDIA_TYPES
+from app.service.prediction_batcher import prediction_batcher
+from app.service.plot_service import get_model_plot, get_plot_points
+from app.service.model_catalog import model_catalog
+from app.service.model_registry import model_store
+from app.service.training_jobs import job_manager, training_cache
+from ml.main import (run_model, run_incremental_model, restore_cached_model, training_cache_key,
+                     resolve_training_options, resolve_evaluation_options, resolve_serialization_options)
+from ml.common.model_store import parse_model_name
+from ml.hyperparameter_search import run_search, expand_search_space, SEARCH_METHODS, SEARCH_METRICS
 from app.core.config import settings
-import os
+from app.core.metrics import metrics_store
+import hashlib
+import json
 
 router = APIRouter()
 
@@ -16,39 +28,307 @@ async def root():
     """
     return {"message": "Welcome to the FastAPI project!"}
 
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    라우트별 요청 처리 시간/바이트 수/상태 코드와 예측 배치 지표를 Prometheus 텍스트 형식으로 반환합니다.
+    """
+    return PlainTextResponse(metrics_store.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 @router.get("/api/files")
-def get_files():
+def get_files(
+    request: Request,
+    response: Response,
+    page: int = None,
+    page_size: int = 50,
+    name: str = None,
+    target_column: str = None,
+):
     """
-    Returns all .joblib files in the output directory.
+    Returns the models in the model store (current version of each name) with their manifest metadata, newest first.
+    page(1부터 시작)를 지정하면 page_size개씩 나눠서 반환하고, 전체 개수는 X-Total-Count 헤더로 전달합니다.
+    목록이 바뀌지 않았으면 If-None-Match 요청에 304로 응답합니다.
     """
     try:
-        return list_files(settings.ML_OUTPUT_DIR)
+        offset, limit = (0, None) if page is None else ((max(page, 1) - 1) * page_size, page_size)
+        items, total, catalog_etag = model_catalog.list(offset, limit, name, target_column)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/upload")
-async def upload(file: UploadFile = File(...), target_column: str = Form(None)):
+    etag = '"' + hashlib.sha1(f"{catalog_etag}?{request.url.query}".encode()).hexdigest() + '"'
+    headers = {"ETag": etag, "X-Total-Count": str(total), "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return items
+
+def get_serialization_options():
+    """
+    설정(MODEL_COMPRESS_*, MODEL_EXPORT_FLAT, MODEL_STORE_KEEP_VERSIONS)의 모델 저장 옵션을 반환합니다.
+    """
+    return resolve_serialization_options({
+        "compress_level": settings.MODEL_COMPRESS_LEVEL,
+        "compress_method": settings.MODEL_COMPRESS_METHOD,
+        "export_flat": settings.MODEL_EXPORT_FLAT,
+        "keep_versions": settings.MODEL_STORE_KEEP_VERSIONS,
+    })
+
+@router.post("/upload", status_code=202)
+async def upload(
+    file: UploadFile = File(...),
+    target_column: str = Form(None),
+    use_cache: bool = Form(True),
+    convert_to_parquet: bool = Form(None),
+    n_jobs: int = Form(None),
+    warm_start: bool = Form(None),
+    max_samples: float = Form(None),
+    incremental: bool = Form(False),
+    n_bootstrap: int = Form(None),
+):
+    """
+    CSV/Parquet/Arrow 파일을 업로드하고 학습 작업을 대기열에 등록합니다.
+    학습 결과는 /api/jobs/{job_id}에서 조회합니다.
+    같은 데이터/타겟 열/하이퍼파라미터로 학습한 결과가 캐시에 있으면 바로 완료된 작업을 반환합니다 (use_cache=false로 우회).
+    n_jobs, warm_start, max_samples를 보내지 않으면 설정(TRAINING_*)의 기본값으로 학습합니다.
+    incremental=true이면 이전 학습 이후 추가된 행만으로 현재 모델에 트리를 추가합니다 (캐시 사용 안 함).
+    n_bootstrap > 0이면 평가 지표의 부트스트랩 신뢰구간도 계산합니다 (기본값: EVALUATION_BOOTSTRAP).
+    """
+    training_options = {
+        "n_jobs": settings.TRAINING_N_JOBS if n_jobs is None else n_jobs,
+        "warm_start": settings.TRAINING_WARM_START if warm_start is None else warm_start,
+        "warm_start_step": settings.TRAINING_WARM_START_STEP,
+        "max_samples": settings.TRAINING_MAX_SAMPLES if max_samples is None else max_samples,
+    }
+    evaluation_options = {
+        "n_bootstrap": settings.EVALUATION_BOOTSTRAP if n_bootstrap is None else n_bootstrap,
+        "confidence": settings.EVALUATION_CONFIDENCE,
+        "calibration_bins": settings.EVALUATION_CALIBRATION_BINS,
+        "n_jobs": settings.EVALUATION_N_JOBS,
+    }
+    try:
+        training_options = resolve_training_options(training_options)
+        evaluation_options = resolve_evaluation_options(evaluation_options)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    serialization_options = get_serialization_options()
+
     try:
         upload_result = await upload_file(file)
-        file_path = os.path.join(settings.UPLOAD_DIR, file.filename)
+        # 같은 파일을 이전에 Parquet으로 변환해 두었으면 그 사본으로 학습
+        file_path = get_training_data_path(upload_result["path"])
+        data_format = get_training_data_format(upload_result, file_path)
+        dataset_hash = upload_result["sha256"]
+
+        if incremental:
+            job = job_manager.submit(
+                "train", run_incremental_model, file_path, target_column,
+                output_dir=settings.ML_OUTPUT_DIR, training_options=training_options,
+                trees_per_update=settings.INCREMENTAL_TREES_PER_UPDATE, evaluation_options=evaluation_options,
+                serialization_options=serialization_options, state_dir=settings.TRAINING_STATE_DIR,
+                data_format=data_format
+            )
+            return {"upload_result": upload_result, "job_id": job["job_id"], "status": job["status"]}
+
+        cache = training_cache if use_cache else None
+        if cache is not None:
+            cache_key = training_cache_key(dataset_hash, target_column, training_options,
+                                           compact=settings.TRAINING_COMPACT_DTYPES,
+                                           evaluation_options=evaluation_options)
+            # 캐시 조회/복원(모델과 옆 파일 링크, 매니페스트 갱신)은 이벤트 루프를 막지 않도록 스레드에서 실행
+            cached = await run_in_threadpool(cache.get, cache_key)
+            restored = None
+            if cached is not None:
+                restored = await run_in_threadpool(restore_cached_model, cache, cache_key, cached,
+                                                   settings.ML_OUTPUT_DIR, settings.MODEL_STORE_KEEP_VERSIONS)
+            if restored is not None:
+                job = job_manager.record("train", restored)
+                return {"upload_result": upload_result, "job_id": job["job_id"], "status": job["status"]}
 
-        # ML 모델 실행 (타겟 열 지정, 기본값은 None으로 'quality_label' 사용)
-        ml_result = run_model(file_path, target_column)
+        # ML 모델 학습은 프로세스 풀에서 실행 (타겟 열 기본값은 None으로 'quality_label' 사용)
+        job = job_manager.submit(
+            "train", run_model, file_path, target_column,
+            output_dir=settings.ML_OUTPUT_DIR, cache=cache, dataset_hash=dataset_hash,
+            convert_to_parquet=settings.UPLOAD_CONVERT_TO_PARQUET if convert_to_parquet is None else convert_to_parquet,
+            training_options=training_options, keep_state=settings.TRAINING_KEEP_STATE,
+            compact=settings.TRAINING_COMPACT_DTYPES, evaluation_options=evaluation_options,
+            serialization_options=serialization_options, state_dir=settings.TRAINING_STATE_DIR,
+            data_format=data_format
+        )
 
-        return {"upload_result": upload_result, "ml_result": ml_result}
+        return {"upload_result": upload_result, "job_id": job["job_id"], "status": job["status"]}
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/api/search", status_code=202)
+async def search(
+    file: UploadFile = File(...),
+    target_column: str = Form(None),
+    method: str = Form("random"),
+    n_trials: int = Form(None),
+    budget_seconds: float = Form(None),
+    top_k: int = Form(None),
+    metric: str = Form("f1_score"),
+    space: str = Form(None),
+):
+    """
+    모델 종류/하이퍼파라미터/전처리 방법(standardization, normalization, imputation) 조합을 병렬로 탐색하는 작업을 등록합니다.
+    method는 grid, random, halving(successive halving) 중 하나이며, 상위 top_k개 모델만 ML_OUTPUT_DIR에 저장됩니다.
+    n_trials를 보내지 않으면 grid는 모든 조합을, random/halving은 SEARCH_MAX_TRIALS개를 평가합니다 (n_candidates로 반환).
+    space는 {"estimators": {"RF": {"n_estimators": [100, 200]}}, "preprocessing": [["standardization"]]} 형식의 JSON입니다.
+    모델 종류는 RF, ET, HGB, KNN, XG(XGBoost) 중에서 고릅니다.
+    결과(순위표, 저장된 모델)는 /api/jobs/{job_id}에서 조회합니다.
+    """
+    if method not in SEARCH_METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of {list(SEARCH_METHODS)}")
+    if metric not in SEARCH_METRICS:
+        raise HTTPException(status_code=400, detail=f"metric must be one of {list(SEARCH_METRICS)}")
+    try:
+        search_space = json.loads(space) if space else None
+        n_candidates = len(expand_search_space(search_space))
+    except (ValueError, TypeError, AttributeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid search space: {str(e)}")
+    if n_candidates == 0:
+        raise HTTPException(status_code=400, detail="Search space has no candidates")
+    # grid는 n_trials를 주지 않으면 모든 조합을 평가하고, random/halving은 기본 시험 수(SEARCH_MAX_TRIALS)까지만 평가
+    if n_trials is None and method != "grid":
+        n_trials = settings.SEARCH_MAX_TRIALS
+    if n_trials:
+        n_candidates = min(n_candidates, n_trials)
+
+    upload_result = await upload_file(file)
+    file_path = get_training_data_path(upload_result["path"])
+    job = job_manager.submit(
+        "search", run_search, file_path, target_column,
+        output_dir=settings.ML_OUTPUT_DIR, method=method,
+        n_trials=n_trials,
+        budget_seconds=settings.SEARCH_BUDGET_SECONDS if budget_seconds is None else budget_seconds,
+        top_k=settings.SEARCH_TOP_K if top_k is None else top_k,
+        n_workers=settings.SEARCH_MAX_WORKERS, metric=metric, space=search_space,
+        serialization_options=get_serialization_options(),
+        data_format=get_training_data_format(upload_result, file_path),
+    )
+    return {"upload_result": upload_result, "job_id": job["job_id"], "status": job["status"], "n_candidates": n_candidates}
+
+@router.get("/api/models/{model_name}/importance")
+def get_model_importance(model_name: str, sample_size: int = None, n_repeats: int = None):
+    """
+    모델의 평가용(held-out) 표본으로 계산한 특성 중요도를 반환합니다.
+    불순도 기반 중요도, 순열 중요도(정확도 감소), 트리 경로 기여도(평균 절댓값)를 함께 제공하며,
+    결과는 모델 버전별로 캐싱됩니다 (첫 요청만 계산).
+    """
+    if (sample_size is not None and sample_size < 1) or (n_repeats is not None and n_repeats < 1):
+        raise HTTPException(status_code=400, detail="sample_size and n_repeats must be at least 1")
+    return get_feature_attributions(model_name, sample_size, n_repeats)
+
+@router.get("/api/models/{model_name}/plots/{plot_type}")
+async def get_model_plot_url(model_name: str, plot_type: str, format: str = "png"):
+    """
+    모델 시각화(scatter3d, pairplot, heatmap, importance, boxplot)를 PNG/SVG로 그려 /static URL을 반환합니다.
+    모델 버전과 플롯 종류별로 파일이 캐싱되므로 같은 요청은 다시 그리지 않습니다.
+    """
+    return await get_model_plot(model_name, plot_type, format)
+
+@router.get("/api/models/{model_name}/points")
+async def get_model_points(model_name: str, method: str = "hexbin", top_n: int = None, n_points: int = None,
+                           gridsize: int = None, x: str = None):
+    """
+    상위 특성의 점 데이터를 원본 행 대신 줄여서 반환합니다 (프론트엔드에서 대용량 데이터를 그릴 때 사용).
+    - method=lttb: 특성별로 x(지정한 열 또는 행 순서)에 대한 계열을 LTTB로 n_points개로 줄임
+    - method=hexbin: 상위 특성 쌍마다 육각형 구간별 점 수와 클래스별 점 수
+    - method=sample: 클래스별 층화 표본 n_points개
+    """
+    for name, value in (("top_n", top_n), ("n_points", n_points), ("gridsize", gridsize)):
+        if value is not None and value < 1:
+            raise HTTPException(status_code=400, detail=f"{name} must be at least 1")
+    return await get_plot_points(model_name, method, top_n, n_points, gridsize, x)
+
+@router.get("/api/models/{model_name}/versions")
+def get_model_versions(model_name: str):
+    """
+    모델 저장소 매니페스트의 버전 목록(최신순)과 current 별칭을 반환합니다.
+    각 버전에는 평가 지표, 특성 이름, dtype 스키마, 부모 버전이 포함되며, 예측 시 "이름@버전"으로 지정할 수 있습니다.
+    """
+    name, _ = parse_model_name(model_name)
+    manifest = model_store.read_manifest(name) if name else None
+    if manifest is None:
+        raise HTTPException(status_code=404, detail=f"Model '{model_name}' not found in {settings.ML_OUTPUT_DIR}")
+    versions = sorted(manifest["versions"], key=lambda item: item["created_at"] or 0, reverse=True)
+    return {"name": manifest["name"], "current": manifest["current"], "versions": versions}
+
+@router.put("/api/models/{model_name}/current")
+def set_model_current(model_name: str, version: str = Form(...)):
+    """
+    모델 이름의 current 별칭을 매니페스트에 있는 다른 버전으로 바꿉니다 (롤백 등).
+    이후 이름만으로 요청한 예측/시각화는 그 버전을 사용합니다.
+    """
+    try:
+        manifest = model_store.set_current(model_name, version)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    model_catalog.invalidate()
+    return {"name": model_name, "current": manifest["current"]}
+
+@router.get("/api/jobs")
+def get_jobs():
+    """
+    최근 학습 작업 목록을 반환합니다.
+    """
+    return job_manager.list()
+
+@router.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    """
+    학습 작업의 상태, 진행률, 최종 결과(성능 지표)를 반환합니다.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job
+
 @router.post("/api/predict")
-async def predict(file: UploadFile = File(...), selected_model: str = Form(...)):
+async def predict(file: UploadFile = File(...), selected_model: str = Form(...), include_csv_data: bool = Form(True)):
     """
-    선택된 모델과 업로드된 CSV 파일을 사용하여 예측을 수행합니다.
+    선택된 모델과 업로드된 CSV/Parquet/Arrow 파일을 사용하여 예측을 수행합니다.
     """
     try:
-        # predict_with_model 함수를 호출하여 예측을 수행
-        result = predict_with_model(selected_model, file)
+        # 동시 요청은 배치로 묶어서 예측 (PREDICT_BATCHING_ENABLED=False이면 요청마다 바로 예측)
+        if settings.PREDICT_BATCHING_ENABLED:
+            result = await predict_with_model_batched(selected_model, file, include_csv_data)
+        else:
+            result = predict_with_model(selected_model, file, include_csv_data)
         return result
     except HTTPException as e:
         raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing prediction: {str(e)}")
+
+@router.get("/api/predict/metrics")
+def get_predict_metrics():
+    """
+    예측 배치 처리 지표(배치 크기, 대기열 지연 시간)를 반환합니다.
+    """
+    return prediction_batcher.stats()
+
+@router.post("/api/predict/stream")
+def predict_stream(
+    file: UploadFile = File(...),
+    selected_model: str = Form(...),
+    output_format: str = Form("ndjson"),
+    include_input: bool = Form(False),
+    chunk_size: int = Form(None),
+):
+    """
+    업로드된 CSV/Parquet/Arrow 파일을 청크 단위로 예측하여 NDJSON 또는 CSV로 스트리밍합니다.
+    include_input이 True이면 입력 행도 함께 반환합니다.
+    스트리밍 도중 예측이 실패하면 상태 코드는 200이므로 마지막 줄로 알립니다 (NDJSON은 {"error": ...} 레코드, CSV는 "# error: ..." 행).
+    """
+    try:
+        rows = stream_predictions(selected_model, file, output_format, include_input, chunk_size)
+        return StreamingResponse(rows, media_type=STREAM_MEDIA_TYPES[output_format])
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing prediction: {str(e)}")
@@ -1,98 +1,342 @@
 # File: C:\_YHJ\fast\backend\app\service\file_service.py
-# Purpose: Handles file operations like listing and uploading files, as well as predictions
+# Purpose: Handles file uploads and predictions
 
 import os
-import joblib
-import pandas as pd
+import json
 from fastapi import HTTPException, UploadFile
 import logging
-import shutil
+import hashlib
+import tempfile
 from app.core.config import settings
+from app.service.model_registry import model_registry, model_store
+from app.service.prediction_batcher import prediction_batcher
+from starlette.concurrency import run_in_threadpool
+from ml.common.file_operations import detect_data_format, load_dataset, iter_dataset_chunks, load_model_metadata
+from ml.common.dtype_optimization import apply_schema
+from ml.common.feature_importance import compute_model_attributions
 
 logger = logging.getLogger(__name__)
 
-def list_files(directory):
+# 업로드 파일 이름 앞에 붙이는 sha256 접두어 길이 (중복 업로드 확인용)
+UPLOAD_HASH_PREFIX = 16
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def _find_upload_by_hash(digest):
+    """
+    같은 내용(sha256)으로 이미 업로드된 파일이 있으면 그 경로를 반환합니다.
+    """
+    prefix = f"{digest[:UPLOAD_HASH_PREFIX]}_"
+    for name in os.listdir(settings.UPLOAD_DIR):
+        if name.startswith(prefix) and not name.endswith((".part", ".tmp")):
+            return os.path.join(settings.UPLOAD_DIR, name)
+    return None
+
+def _store_upload(source, filename):
     """
-    주어진 디렉토리에서 모든 .joblib 파일만 반환합니다.
+    업로드 스트림을 청크 단위로 한 번만 읽으면서 대상 파일에 쓰고 sha256을 계산합니다.
+    UPLOAD_MAX_BYTES를 넘으면 413을 발생시키고, 같은 내용의 파일이 이미 있으면 새로 쓴 파일은 버립니다.
     """
-    files = []
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, part_path = tempfile.mkstemp(suffix=".part", dir=settings.UPLOAD_DIR)
     try:
-        for root, _, filenames in os.walk(directory):
-            for name in filenames:
-                if name.endswith(".joblib"):  # .joblib 파일만 필터링
-                    files.append(
-                        {
-                            "name": os.path.splitext(name)[0],  # 확장자 제거
-                            "isDirectory": False,
-                            "path": os.path.join(root, name),
-                        }
-                    )
-    except Exception as e:
-        logger.error(f"Error listing files in directory: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error listing files in directory")
-    return files
+        with os.fdopen(fd, "wb") as buffer:
+            while True:
+                chunk = source.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > settings.UPLOAD_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail=f"File exceeds the maximum upload size of {settings.UPLOAD_MAX_BYTES} bytes")
+                digest.update(chunk)
+                buffer.write(chunk)
+
+        sha256 = digest.hexdigest()
+        existing = _find_upload_by_hash(sha256)
+        if existing is not None:
+            os.remove(part_path)
+            return existing, sha256, size, True
+
+        file_path = os.path.join(settings.UPLOAD_DIR, f"{sha256[:UPLOAD_HASH_PREFIX]}_{filename}")
+        os.replace(part_path, file_path)
+        return file_path, sha256, size, False
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
 
 async def upload_file(file: UploadFile):
     """
-    파일을 업로드하고 joblib 파일로 저장합니다.
+    업로드된 파일을 UPLOAD_DIR에 저장합니다.
+    내용 해시(sha256)를 파일 이름 앞에 붙여 저장하며, 같은 내용을 다시 올리면 기존 파일을 재사용합니다.
     """
     try:
         logger.info(f"Received file upload request: {file.filename}")
-        if not os.path.exists(settings.UPLOAD_DIR):
-            os.makedirs(settings.UPLOAD_DIR)
+        if file.size is not None and file.size > settings.UPLOAD_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"File exceeds the maximum upload size of {settings.UPLOAD_MAX_BYTES} bytes")
 
-        file_path = os.path.join(settings.UPLOAD_DIR, file.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        filename = os.path.basename(file.filename)
+        file_path, sha256, size, deduplicated = await run_in_threadpool(_store_upload, file.file, filename)
 
-        logger.info(f"File uploaded successfully: {file.filename}")
-        return {"filename": file.filename, "status": "File uploaded successfully"}
+        if deduplicated:
+            logger.info(f"File {file.filename} matches existing upload {file_path}, reusing it")
+        else:
+            logger.info(f"File uploaded successfully: {file.filename} -> {file_path}")
+        return {
+            "filename": file.filename,
+            "status": "File uploaded successfully",
+            "path": file_path,
+            "sha256": sha256,
+            "size": size,
+            "deduplicated": deduplicated,
+            "format": detect_data_format(filename, file.content_type),
+        }
+    except HTTPException as e:
+        raise e
     except Exception as e:
         logger.error(f"Error uploading file: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Error uploading file")
 
-def predict_with_model(model_name, csv_file):
+def get_training_data_path(file_path):
+    """
+    업로드 시 Parquet으로 변환해 둔 사본이 있으면 그 경로를, 없으면 원본 경로를 반환합니다.
+    """
+    parquet_path = os.path.splitext(file_path)[0] + ".parquet"
+    if parquet_path != file_path and os.path.exists(parquet_path):
+        return parquet_path
+    return file_path
+
+def get_training_data_format(upload_result, file_path):
+    """
+    학습에 사용할 파일(get_training_data_path의 결과)의 형식을 반환합니다.
+    Parquet 사본이면 'parquet', 원본이면 업로드 시 파일 이름/content type으로 감지한 형식입니다 (확장자가 없어도 맞는 형식).
+    """
+    if file_path != upload_result["path"]:
+        return "parquet"
+    return upload_result["format"]
+
+def resolve_model_path(model_name):
+    """
+    모델 이름("이름" 또는 "이름@버전")을 모델 저장소 매니페스트에서 찾아 그 버전의 모델 파일 경로를 반환합니다.
+    이름만 주면 current 별칭이 가리키는 버전을 사용합니다. /api/files의 path(저장소 안의 모델 파일 경로)도 받습니다.
+    저장소에 없으면 404를 발생시킵니다.
+    """
+    model_path = model_registry.resolve(model_name)
+    if model_path is None or not os.path.exists(model_path):
+        logger.error(f"Model not found: {model_name}")
+        raise HTTPException(status_code=404, detail=f"Model '{model_name}' not found in {settings.ML_OUTPUT_DIR}")
+    return model_path
+
+def load_model(model_name):
+    """
+    모델 레지스트리를 통해 모델과 학습 시의 압축 dtype 스키마를 가져옵니다. 모델이 없으면 404를 발생시킵니다.
+    """
+    return model_registry.get_with_schema(resolve_model_path(model_name))
+
+def load_predictor(model_name, n_rows):
+    """
+    load_model과 같지만, 모델 옆에 평탄화한 포레스트(.flat.pkl)가 있고 n_rows가 작으면 예측용으로 그 모델을 반환합니다.
+    """
+    return model_registry.get_predictor(resolve_model_path(model_name), n_rows)
+
+def get_model_version(model_path, metadata):
+    """
+    캐시 키로 사용할 모델 버전을 반환합니다. 모델 저장소의 모델은 내용 해시인 저장소 버전을,
+    그 외 버전이 없는 모델은 파일 수정 시각을 버전으로 사용합니다.
+    """
+    location = model_store.parse_model_path(model_path)
+    if location is not None:
+        return location[1]
+    return metadata.get("version") or str(os.stat(model_path).st_mtime_ns)
+
+def get_model_cache_dir(model_path, version, output_dir=None):
+    """
+    모델 버전별 파생 결과(시각화, 특성 기여도)를 저장할 디렉토리(ML_OUTPUT_DIR/.plots/<모델>/<버전>/)를 반환합니다.
+    모델 저장소의 버전 디렉토리는 게시한 뒤 바꾸지 않으므로 파생 결과는 그 안에 쓰지 않습니다.
+    """
+    output_dir = output_dir or settings.ML_OUTPUT_DIR
+    location = model_store.parse_model_path(model_path)
+    model_key = location[0] if location else os.path.splitext(os.path.relpath(model_path, output_dir))[0]
+    return os.path.join(output_dir, ".plots", model_key, str(version))
+
+def get_attributions_cache_path(model_path, version):
+    """
+    모델 버전의 특성 기여도(/importance 결과) 캐시 파일 경로를 반환합니다.
+    """
+    return os.path.join(get_model_cache_dir(model_path, version), "attributions.json")
+
+def get_upload_format(upload: UploadFile):
+    """
+    업로드 파일의 확장자 또는 Content-Type으로 데이터 형식(csv/parquet/arrow)을 판별합니다.
+    """
+    return detect_data_format(upload.filename, upload.content_type)
+
+def read_prediction_file(upload: UploadFile):
+    """
+    예측용으로 업로드된 CSV/Parquet/Arrow 파일을 DataFrame으로 읽습니다.
+    """
+    data_format = get_upload_format(upload)
+    try:
+        df = load_dataset(upload.file, data_format)
+        logger.info(f"{data_format} file read successfully: {df.shape}")
+        return df
+    except ImportError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error reading {data_format} file: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=400, detail=f"Invalid {data_format} file format")
+
+def build_prediction_response(df, predictions, include_csv_data=True):
+    """
+    예측 결과 응답을 구성합니다. include_csv_data가 False이면 입력 행(csvData)을 포함하지 않습니다.
+    """
+    if not include_csv_data:
+        return {"predictions": predictions.tolist()}
+
+    # CSV 데이터를 리스트로 변환하여 프론트엔드에 전송
+    csv_data = [df.columns.tolist()] + df.values.tolist()
+
+    return {"predictions": predictions.tolist(), "csvData": csv_data}
+
+def predict_with_model(model_name, csv_file, include_csv_data=True):
     """
     주어진 모델 이름과 CSV 파일을 사용하여 예측을 수행합니다.
+    include_csv_data가 False이면 입력 행(csvData)을 응답에 포함하지 않습니다.
     """
     try:
-        # 모델 이름에서 확장자가 포함되어 있는지 확인하고, 없을 경우 추가
-        if not model_name.endswith(".joblib"):
-            model_name = f"{model_name}.joblib"
-        
-        # 모델 파일 경로 구성
-        model_path = os.path.join(settings.ML_OUTPUT_DIR, model_name)
-        
-        # 모델 로드
-        if not os.path.exists(model_path):
-            logger.error(f"Model file not found: {model_path}")
-            raise HTTPException(status_code=404, detail=f"Model file '{model_path}' not found in {settings.ML_OUTPUT_DIR}")
-
-        model = joblib.load(model_path)
-
-        # CSV 파일 읽기
-        try:
-            df = pd.read_csv(csv_file.file)
-            logger.info(f"CSV file read successfully: {df.shape}")
-        except Exception as e:
-            logger.error(f"Error reading CSV file: {str(e)}", exc_info=True)
-            raise HTTPException(status_code=400, detail="Invalid CSV file format")
+        # 모델이 없으면 입력 파일을 읽기 전에 404 (current 별칭은 여기서 한 번만 확인)
+        model_path = resolve_model_path(model_name)
+
+        # 입력 파일 읽기 (CSV/Parquet/Arrow)
+        df = read_prediction_file(csv_file)
+
+        # 모델 로드 (레지스트리에 캐싱된 모델 재사용, 행 수가 적으면 평탄화한 포레스트 사용)
+        model, schema = model_registry.get_predictor(model_path, len(df))
 
         # 예측 수행
         try:
             logger.info(f"Predicting using model: {model_name}")
-            predictions = model.predict(df)
+            # 학습 데이터와 같은 타입으로 변환 (응답의 csvData는 원본 값 그대로 사용)
+            predictions = model.predict(apply_schema(df, schema))
             logger.info(f"Prediction completed successfully")
         except Exception as e:
             logger.error(f"Error during prediction: {str(e)}", exc_info=True)
             raise HTTPException(status_code=500, detail="Error during model prediction")
 
-        # CSV 데이터를 리스트로 변환하여 프론트엔드에 전송
-        csv_data = [df.columns.tolist()] + df.values.tolist()
-
-        return {"predictions": predictions.tolist(), "csvData": csv_data}
+        return build_prediction_response(df, predictions, include_csv_data)
     except HTTPException as e:
         raise e
     except Exception as e:
         logger.error(f"Unhandled error during prediction: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Unhandled error during prediction")
+
+async def predict_with_model_batched(model_name, csv_file, include_csv_data=True):
+    """
+    predict_with_model과 같지만, 같은 모델에 대한 동시 요청을 prediction_batcher로 모아 한 번에 예측합니다.
+    """
+    model_path = resolve_model_path(model_name)
+    df = await run_in_threadpool(read_prediction_file, csv_file)
+
+    try:
+        predictions = await prediction_batcher.predict(os.path.abspath(model_path), df)
+    except Exception as e:
+        logger.error(f"Error during prediction: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Error during model prediction")
+
+    return build_prediction_response(df, predictions, include_csv_data)
+
+def stream_predictions(model_name, csv_file, output_format="ndjson", include_input=False, chunk_size=None):
+    """
+    CSV/Parquet/Arrow 파일을 chunk_size 행씩 읽어 예측하고, 결과를 NDJSON 또는 CSV 문자열로 하나씩 생성하는 제너레이터를 반환합니다.
+    파일 전체를 메모리에 올리지 않으므로 파일 크기와 관계없이 메모리 사용량이 일정합니다.
+    """
+    if output_format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported output format '{output_format}'. Choose 'ndjson' or 'csv'.")
+
+    model, schema = load_model(model_name)
+    chunk_size = chunk_size or settings.PREDICT_CHUNK_SIZE
+
+    data_format = get_upload_format(csv_file)
+
+    # FastAPI는 엔드포인트가 반환되면 업로드 파일을 닫으므로, 스트리밍이 끝날 때까지 쓸 수 있도록 파일 객체를 넘겨받음
+    source = csv_file.file
+    csv_file.file = tempfile.SpooledTemporaryFile()
+
+    # 첫 번째 청크는 미리 읽어서 잘못된 파일을 스트리밍 시작 전에 400으로 응답
+    reader = iter_dataset_chunks(source, data_format, chunk_size)
+    try:
+        first_chunk = next(reader)
+    except StopIteration:
+        source.close()
+        raise HTTPException(status_code=400, detail=f"{data_format} file is empty")
+    except ImportError as e:
+        source.close()
+        raise HTTPException(status_code=415, detail=str(e))
+    except Exception as e:
+        source.close()
+        logger.error(f"Error reading {data_format} file: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=400, detail=f"Invalid {data_format} file format")
+
+    def format_chunk(chunk, predictions, is_first):
+        result = chunk if include_input else chunk[[]]
+        result = result.assign(prediction=predictions)
+        result.insert(0, "row", chunk.index)
+        if output_format == "ndjson":
+            return result.to_json(orient="records", lines=True)
+        return result.to_csv(index=False, header=is_first)
+
+    def generate():
+        logger.info(f"Streaming predictions using model: {model_name} (chunk_size={chunk_size})")
+        rows = 0
+        chunk = first_chunk
+        try:
+            while chunk is not None:
+                predictions = model.predict(apply_schema(chunk, schema))
+                yield format_chunk(chunk, predictions, rows == 0)
+                rows += len(chunk)
+                chunk = next(reader, None)
+            logger.info(f"Streaming prediction completed: {rows} rows")
+        except Exception as e:
+            # 응답 헤더가 이미 전송되었으므로 상태 코드를 바꿀 수 없음 - 잘린 결과를 완전한 파일로 오인하지 않도록
+            # 마지막에 오류를 남김 (NDJSON은 오류 레코드, CSV는 "# error:" 주석 행)
+            logger.error(f"Error during streaming prediction after {rows} rows: {str(e)}", exc_info=True)
+            if output_format == "ndjson":
+                yield json.dumps({"error": "Error during model prediction", "rows_processed": rows}) + "\n"
+            else:
+                yield f"# error: Error during model prediction (rows_processed={rows})\n"
+        finally:
+            reader.close()
+            source.close()
+
+    return generate()
+
+def get_feature_attributions(model_name, sample_size=None, n_repeats=None):
+    """
+    모델의 평가용 표본으로 순열 중요도(permutation importance)와 트리 경로 기여도를 계산해 반환합니다.
+    결과는 모델 버전별 캐시 디렉토리(.plots/<모델>/<버전>/)에 저장되어 같은 버전은 다시 계산하지 않습니다.
+    """
+    model_path = resolve_model_path(model_name)
+    model, _ = model_registry.get_with_schema(model_path)
+    metadata = load_model_metadata(model_path)
+    if not metadata.get("target_column"):
+        raise HTTPException(status_code=409, detail=f"Model '{model_name}' has no metadata with the target column")
+
+    version = get_model_version(model_path, metadata)
+    try:
+        result = compute_model_attributions(
+            model, model_path, version, metadata["target_column"],
+            sample_size=sample_size or settings.IMPORTANCE_SAMPLE_SIZE,
+            n_repeats=n_repeats or settings.IMPORTANCE_N_REPEATS,
+            n_jobs=settings.IMPORTANCE_N_JOBS, cache_path=get_attributions_cache_path(model_path, version),
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error computing feature attributions: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Error computing feature attributions")
+    return dict(result, model=model_name)
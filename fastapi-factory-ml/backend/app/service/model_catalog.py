@@ -0,0 +1,117 @@
+# File: C:\_YHJ\fast\backend\app\service\model_catalog.py
+# Purpose: Index of trained models built from the model store manifests in ML_OUTPUT_DIR
+
+import time
+import hashlib
+import logging
+import threading
+from app.core.config import settings
+from app.service.model_registry import model_store
+
+logger = logging.getLogger(__name__)
+
+class ModelCatalog:
+    """
+    모델 저장소의 매니페스트(<이름>/manifest.json)로 모델 목록을 유지합니다.
+
+    - 모델 이름마다 current 별칭이 가리키는 버전을 목록 항목으로 반환합니다 (버전 id와 보관 중인 버전 수 포함).
+    - 모델 파일이나 버전 디렉토리는 나열하지 않고, 매니페스트가 바뀐 모델만 다시 읽습니다.
+    - refresh_interval 초 안의 반복 조회는 디스크를 확인하지 않습니다.
+    """
+
+    def __init__(self, store, refresh_interval=1.0):
+        self.store = store
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._last_refresh = 0.0
+        self._models = {}
+        self._etag = None
+
+    def list(self, offset=0, limit=None, name=None, target_column=None):
+        """
+        모델 목록을 (items, total, etag) 형태로 반환합니다.
+        name은 모델 이름 부분 일치, target_column은 타겟 열 완전 일치로 필터링합니다.
+        """
+        with self._lock:
+            self._refresh()
+            items = sorted(self._models.values(), key=lambda item: item["createdAt"] or 0, reverse=True)
+            etag = self._etag
+
+        if name:
+            items = [item for item in items if name.lower() in item["name"].lower()]
+        if target_column:
+            items = [item for item in items if item["targetColumn"] == target_column]
+
+        total = len(items)
+        end = None if limit is None else offset + limit
+        items = [{k: v for k, v in item.items() if not k.startswith("_")} for item in items[offset:end]]
+        return items, total, etag
+
+    def invalidate(self):
+        """
+        다음 조회 시 refresh_interval과 관계없이 디스크를 다시 확인하게 합니다.
+        """
+        with self._lock:
+            self._last_refresh = 0.0
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._last_refresh < self.refresh_interval:
+            return
+        self._last_refresh = now
+
+        if self._scan():
+            self._etag = self._compute_etag()
+
+    def _scan(self):
+        names = set(self.store.list_models())
+        changed = False
+        for name in set(self._models) - names:
+            del self._models[name]
+            changed = True
+        for name in names:
+            if self._update_model(name):
+                changed = True
+        return changed
+
+    def _update_model(self, name):
+        try:
+            manifest = self.store.read_manifest(name)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read manifest for model {name}: {str(e)}")
+            manifest = None
+        if manifest is None:
+            return self._models.pop(name, None) is not None
+
+        entry = self._models.get(name)
+        if entry is not None and entry["_manifest"] is manifest:
+            return False
+
+        current = next((item for item in manifest["versions"] if item["version"] == manifest["current"]), None)
+        if current is None:
+            logger.warning(f"Manifest of model {name} has no current version")
+            return self._models.pop(name, None) is not None
+
+        self._models[name] = {
+            "name": name,
+            "isDirectory": False,
+            "path": self.store.model_path(name, current["version"]),
+            "version": current["version"],
+            "versions": len(manifest["versions"]),
+            "size": current["size"],
+            "createdAt": current["created_at"],
+            "metrics": current["metrics"],
+            "featureNames": current["feature_names"],
+            "targetColumn": current["target_column"],
+            "_manifest": manifest,
+        }
+        return True
+
+    def _compute_etag(self):
+        digest = hashlib.sha1()
+        for name in sorted(self._models):
+            entry = self._models[name]
+            digest.update(f"{name}:{entry['version']}:{entry['versions']}:{entry['_manifest'].get('updated_at')};".encode())
+        return digest.hexdigest()
+
+model_catalog = ModelCatalog(model_store, settings.MODEL_CATALOG_REFRESH_SECONDS)
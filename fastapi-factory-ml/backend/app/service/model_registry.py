@@ -0,0 +1,172 @@
+# File: C:\_YHJ\fast\backend\app\service\model_registry.py
+# Purpose: Keeps loaded models in memory so predictions don't deserialize them per request
+
+import os
+import threading
+import logging
+from collections import OrderedDict, namedtuple
+from app.core.config import settings
+from ml.common.model_store import ModelStore
+
+logger = logging.getLogger(__name__)
+
+_Entry = namedtuple("_Entry", ["mtime_ns", "size", "model", "schema", "flat_model", "nbytes"])
+
+class ModelRegistry:
+    """
+    로드된 모델을 경로 + 수정 시각(mtime) 기준으로 메모리에 캐싱합니다.
+
+    - 같은 경로라도 파일이 교체되어 mtime/크기가 달라지면 다음 조회 시 자동으로 다시 로드합니다.
+    - 캐시된 모델의 크기 합이 max_bytes를 넘으면 가장 오래 사용하지 않은 모델부터 제거합니다(LRU).
+      모델 크기는 디스크의 .joblib 파일 크기로 추정합니다.
+    - 모델 옆에 저장된 압축 dtype 스키마(.schema.json)도 모델과 함께 로드해 캐싱합니다.
+    - 모델 옆에 평탄화한 포레스트(.flat.pkl)가 있으면 함께 로드해 flat_max_rows행 이하의 작은 예측(get_predictor)에 사용합니다.
+    - 모델 이름은 모델 저장소의 매니페스트(<이름>/manifest.json)로 버전 경로를 찾습니다(resolve). 버전 디렉토리는
+      바뀌지 않으므로 current 별칭이 바뀌면 새 경로의 모델을 로드하고, 진행 중인 요청은 이전 버전을 그대로 사용합니다.
+    - mmap_mode='r'이면 압축하지 않은 파일의 NumPy 배열을 메모리 매핑으로 읽어 여러 워커 프로세스가 페이지 캐시를 공유합니다.
+    """
+
+    def __init__(self, max_bytes, mmap_mode=None, flat_max_rows=0, store=None):
+        self.max_bytes = max_bytes
+        self.store = store
+        self.mmap_mode = mmap_mode
+        self.flat_max_rows = flat_max_rows
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, model_name):
+        """
+        모델 이름("이름" 또는 "이름@버전")을 매니페스트에서 찾아 모델 파일 경로를 반환합니다 (없으면 None).
+        """
+        return self.store.resolve(model_name)
+
+    def get(self, path):
+        """
+        경로에 해당하는 모델을 반환합니다. 캐시에 없거나 파일이 바뀌었으면 디스크에서 로드합니다.
+        """
+        return self._get_entry(path).model
+
+    def get_with_schema(self, path):
+        """
+        모델과 학습 시 사용한 압축 dtype 스키마({열: 타입}, 없으면 빈 dict)를 함께 반환합니다.
+        """
+        entry = self._get_entry(path)
+        return entry.model, entry.schema
+
+    def get_predictor(self, path, n_rows):
+        """
+        n_rows행을 예측할 모델과 압축 dtype 스키마를 함께 반환합니다.
+        평탄화한 포레스트가 있고 n_rows가 flat_max_rows 이하이면 그 모델을, 아니면 원래 모델을 반환합니다
+        (평탄화 모델은 호출 부담이 작아 작은 배치에서 빠르고, 큰 배치는 컴파일된 sklearn 트리가 빠름).
+        """
+        entry = self._get_entry(path)
+        if entry.flat_model is not None and n_rows <= self.flat_max_rows:
+            return entry.flat_model, entry.schema
+        return entry.model, entry.schema
+
+    def _get_entry(self, path):
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+
+        entry = self._lookup(path, stat)
+        if entry is not None:
+            return entry
+
+        # 같은 모델을 여러 요청이 동시에 로드하지 않도록 경로별 잠금 사용
+        with self._lock:
+            load_lock = self._load_locks.setdefault(path, threading.Lock())
+        with load_lock:
+            stat = os.stat(path)
+            entry = self._lookup(path, stat)
+            if entry is not None:
+                return entry
+
+            logger.info(f"Loading model into registry: {path}")
+            with self._lock:
+                self.misses += 1
+            from ml.common.file_operations import load_model, load_model_schema, get_flat_model_path
+            model = load_model(path, self.mmap_mode)
+            # 메모리 예산에는 평탄화 모델 파일 크기도 포함
+            nbytes = stat.st_size
+            flat_model = None
+            flat_path = get_flat_model_path(path)
+            if os.path.exists(flat_path):
+                flat_model = load_model(flat_path, self.mmap_mode)
+                nbytes += os.path.getsize(flat_path)
+            entry = _Entry(stat.st_mtime_ns, stat.st_size, model, load_model_schema(path), flat_model, nbytes)
+            self._store(path, entry)
+            return entry
+
+    def prewarm(self, paths):
+        """
+        주어진 모델들을 순서대로 미리 로드합니다. 메모리 예산을 넘는 모델에서 멈춥니다.
+        """
+        loaded = 0
+        for path in paths:
+            try:
+                if self._total_bytes + os.path.getsize(path) > self.max_bytes:
+                    break
+                self.get(path)
+                loaded += 1
+            except Exception as e:
+                logger.warning(f"Failed to prewarm model {path}: {str(e)}")
+        logger.info(f"Prewarmed {loaded} model(s) into registry")
+        return loaded
+
+    def invalidate(self, path):
+        with self._lock:
+            self._evict(os.path.abspath(path))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "models": list(self._entries.keys()),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _lookup(self, path, stat):
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry
+            if entry is not None:
+                # 파일이 교체됨 - 이전 모델은 버림
+                logger.info(f"Model file changed on disk, reloading: {path}")
+                self._evict(path)
+            return None
+
+    def _store(self, path, entry):
+        with self._lock:
+            self._evict(path)
+            if entry.nbytes > self.max_bytes:
+                logger.warning(f"Model {path} ({entry.nbytes} bytes) exceeds MODEL_CACHE_MAX_BYTES, not caching")
+                return
+            while self._entries and self._total_bytes + entry.nbytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                logger.info(f"Evicting model from registry: {oldest}")
+                self._evict(oldest)
+            self._entries[path] = entry
+            self._total_bytes += entry.nbytes
+
+    def _evict(self, path):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._total_bytes -= entry.nbytes
+
+model_store = ModelStore(settings.ML_OUTPUT_DIR, settings.MODEL_STORE_KEEP_VERSIONS)
+model_registry = ModelRegistry(settings.MODEL_CACHE_MAX_BYTES, settings.MODEL_MMAP_MODE, settings.MODEL_FLAT_MAX_ROWS,
+                               model_store)
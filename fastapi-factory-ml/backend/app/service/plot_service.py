@@ -0,0 +1,204 @@
+# File: C:\_YHJ\fast\backend\app\service\plot_service.py
+# Purpose: Renders model visualizations in a process pool and caches them under the /static mount
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.service.file_service import (load_model, resolve_model_path, get_model_version, get_training_data_path,
+                                      get_model_cache_dir, get_attributions_cache_path)
+from app.service.model_registry import model_store
+from ml.common.file_operations import get_holdout_path, load_model_metadata
+
+logger = logging.getLogger(__name__)
+
+# ml.utils.visualization.PLOTS / PLOT_FORMATS와 같은 값 (서버 시작 시 matplotlib을 import하지 않도록 따로 정의)
+PLOT_TYPES = ("scatter3d", "pairplot", "heatmap", "importance", "boxplot")
+PLOT_FORMATS = ("png", "svg")
+
+# ml.utils.plot_data.POINT_METHODS와 같은 값
+POINT_METHODS = ("lttb", "hexbin", "sample")
+
+def _render(*args):
+    # 워커 프로세스에서 실행 - matplotlib/seaborn은 워커에서만 로드
+    from ml.utils.visualization import render_model_plot
+    return render_model_plot(*args)
+
+def _compute_points(*args):
+    from ml.utils.plot_data import compute_plot_points
+    return compute_plot_points(*args)
+
+class PlotRenderer:
+    """
+    모델 시각화(와 프론트엔드용 점 데이터 JSON)를 프로세스 풀에서 만들어 ML_OUTPUT_DIR/.plots/<모델>/<버전>/에 저장합니다.
+
+    - 파일이 이미 있으면 다시 그리지 않고 /static 경로만 반환합니다 (모델 버전이 바뀌면 새 디렉토리에 그림).
+    - 같은 플롯에 대한 동시 요청은 하나의 렌더링 작업을 함께 기다립니다.
+    - 새 버전을 그릴 때 모델 저장소에서 정리된(매니페스트에 없는) 버전의 플롯 디렉토리를 삭제합니다 (렌더링 중인 디렉토리는 유지).
+    """
+
+    def __init__(self, output_dir, max_workers):
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def plot_path(self, model_path, version, plot_type, output_format):
+        # 모델 저장소의 모델은 이름별 디렉토리에 저장 (새 버전을 그리면 저장소에서 정리된 버전의 디렉토리를 지움)
+        return os.path.join(get_model_cache_dir(model_path, version, self.output_dir), f"{plot_type}.{output_format}")
+
+    def points_path(self, model_path, version, method, params):
+        # 같은 방식이라도 파라미터별로 다른 파일에 저장
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        return self.plot_path(model_path, version, f"points-{method}-{digest}", "json")
+
+    def static_url(self, path):
+        return "/static/" + os.path.relpath(path, self.output_dir).replace(os.sep, "/")
+
+    async def render(self, path, fn, *args):
+        """
+        path가 없으면 워커 프로세스에서 fn(*args)로 만들고, 새로 만들었으면 True를 반환합니다.
+        """
+        with self._lock:
+            future = self._pending.get(path)
+            rendered = future is None
+            if future is None:
+                if os.path.exists(path):
+                    return False
+                version_dir = os.path.dirname(path)
+                self._remove_old_versions(version_dir)
+                os.makedirs(version_dir, exist_ok=True)
+                future = self._ensure_executor().submit(fn, *args)
+                self._pending[path] = future
+                future.add_done_callback(lambda f: self._pending.pop(path, None))
+        await asyncio.wrap_future(future)
+        return rendered
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _ensure_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _remove_old_versions(self, version_dir):
+        # self._lock 안에서 호출 - 렌더링 중인 디렉토리와, 저장소 모델이면 매니페스트에 남아 있는 버전("이름@버전"으로
+        # 계속 요청할 수 있음)은 지우지 않고 register가 정리한 버전의 플롯만 삭제
+        model_dir = os.path.dirname(version_dir)
+        if not os.path.isdir(model_dir):
+            return
+        keep = {version_dir} | {os.path.dirname(path) for path in self._pending}
+        manifest = model_store.read_manifest(os.path.basename(model_dir))
+        if manifest is not None:
+            keep |= {os.path.join(model_dir, item["version"]) for item in manifest["versions"]}
+        for entry in os.scandir(model_dir):
+            if entry.is_dir() and entry.path not in keep:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+def _feature_importances(model, model_path, version):
+    # 불순도 기반 중요도가 없는 모델은 캐싱된 순열 중요도(/importance 결과)를 사용
+    estimator = model[-1] if hasattr(model, "named_steps") else model
+    if hasattr(estimator, "feature_importances_"):
+        features = getattr(model, "feature_names_in_", None)
+        if features is not None:
+            return dict(zip(features, estimator.feature_importances_.tolist()))
+    try:
+        with open(get_attributions_cache_path(model_path, version), "r", encoding="utf-8") as file:
+            return json.load(file)["result"]["permutation"]["importances_mean"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+def _resolve_plot_model(model_name):
+    model_path = resolve_model_path(model_name)
+    metadata = load_model_metadata(model_path)
+    return model_path, metadata, get_model_version(model_path, metadata)
+
+async def _plot_inputs(model_name, model_path, metadata, version):
+    # 그리는 데 필요한 타겟 열, 평가용 표본, 특성 중요도 확인
+    if not metadata.get("target_column"):
+        raise HTTPException(status_code=409, detail=f"Model '{model_name}' has no metadata with the target column")
+    holdout_path = get_holdout_path(model_path)
+    if not os.path.exists(holdout_path):
+        raise HTTPException(status_code=409, detail=f"No held-out sample stored for model '{model_name}'")
+    model, _ = await run_in_threadpool(load_model, model_name)
+    importances = _feature_importances(model, model_path, version)
+    if importances is None:
+        raise HTTPException(status_code=409, detail=f"Model '{model_name}' has no feature importances, "
+                                                    f"request /api/models/{model_name}/importance first")
+    return holdout_path, importances
+
+async def _render_or_raise(path, fn, *args):
+    try:
+        return await plot_renderer.render(path, fn, *args)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error rendering plot: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Error rendering plot")
+
+async def get_model_plot(model_name, plot_type, output_format="png"):
+    """
+    모델 시각화 파일의 /static URL을 반환합니다. 캐시에 없으면 평가용 표본으로 먼저 그립니다.
+    """
+    if plot_type not in PLOT_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown plot type '{plot_type}', expected one of {list(PLOT_TYPES)}")
+    if output_format not in PLOT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{output_format}', expected one of {list(PLOT_FORMATS)}")
+
+    model_path, metadata, version = _resolve_plot_model(model_name)
+    path = plot_renderer.plot_path(model_path, version, plot_type, output_format)
+    result = {"model": model_name, "version": version, "plot_type": plot_type, "format": output_format,
+              "url": plot_renderer.static_url(path)}
+    if os.path.exists(path):
+        return dict(result, cached=True)
+
+    holdout_path, importances = await _plot_inputs(model_name, model_path, metadata, version)
+    rendered = await _render_or_raise(path, _render, plot_type, holdout_path, metadata["target_column"], importances,
+                                      path, output_format, settings.PLOT_TOP_N, settings.PLOT_SAMPLE_SIZE_PER_CLASS)
+    return dict(result, cached=not rendered)
+
+async def get_plot_points(model_name, method="hexbin", top_n=None, n_points=None, gridsize=None, x_column=None):
+    """
+    상위 특성의 점 데이터를 원본 행 대신 LTTB로 줄인 계열, hexbin 집계 또는 층화 표본으로 반환합니다.
+    학습에 사용한 업로드 파일(없으면 평가용 표본)에서 필요한 열만 읽어 계산하고, 모델 버전/파라미터별로 캐싱합니다.
+    """
+    if method not in POINT_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown method '{method}', expected one of {list(POINT_METHODS)}")
+
+    model_path, metadata, version = _resolve_plot_model(model_name)
+    params = {
+        "top_n": top_n or settings.PLOT_TOP_N,
+        "n_points": n_points or settings.PLOT_POINTS,
+        "gridsize": gridsize or settings.PLOT_HEXBIN_GRIDSIZE,
+        "x_column": x_column,
+    }
+    path = plot_renderer.points_path(model_path, version, method, params)
+    rendered = False
+    if not os.path.exists(path):
+        holdout_path, importances = await _plot_inputs(model_name, model_path, metadata, version)
+        data_path = data_format = None
+        if metadata.get("source_file"):
+            source_path = os.path.join(settings.UPLOAD_DIR, metadata["source_file"])
+            data_path = get_training_data_path(source_path)
+            # 업로드 시 감지한 형식은 원본 파일에만 해당 (Parquet 사본은 확장자로 판단)
+            data_format = metadata.get("data_format") if data_path == source_path else None
+        rendered = await _render_or_raise(path, _compute_points, method, data_path, holdout_path,
+                                          metadata["target_column"], importances, path, params["top_n"],
+                                          params["n_points"], params["gridsize"], x_column, data_format)
+
+    with open(path, "r", encoding="utf-8") as file:
+        points = json.load(file)
+    return dict(points, model=model_name, version=version, cached=not rendered)
+
+plot_renderer = PlotRenderer(settings.ML_OUTPUT_DIR, settings.PLOT_MAX_WORKERS)
@@ -0,0 +1,138 @@
+# File: C:\_YHJ\fast\backend\app\service\prediction_batcher.py
+# Purpose: Merges concurrent prediction requests for the same model into a single predict call
+
+import asyncio
+import logging
+import time
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.metrics import Histogram, metrics_store
+from app.service.model_registry import model_registry
+from ml.common.dtype_optimization import apply_schema
+
+logger = logging.getLogger(__name__)
+
+# 배치 크기(요청 수) / 대기 시간(초) 분포를 기록할 구간
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+QUEUE_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+class PredictionBatcher:
+    """
+    같은 모델에 대한 동시 예측 요청을 모아서 한 번의 model.predict로 처리합니다.
+
+    - 모인 행 수가 max_batch_size 이상이 되거나 첫 요청 후 max_wait_ms가 지나면 배치를 실행합니다.
+    - 입력 컬럼 구성이 다른 요청은 같은 모델이라도 별도 배치로 처리합니다.
+    - 예측 결과는 요청별 행 수에 맞춰 잘라서 각 호출자에게 돌려줍니다.
+    - 합친 배치의 예측이 실패하면 요청마다 따로 다시 예측해, 잘못된 입력을 보낸 요청만 실패하게 합니다.
+    """
+
+    def __init__(self, max_batch_size, max_wait_ms):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending = {}
+        self._timers = {}
+        # 실행 중인 배치 작업 (이벤트 루프는 작업을 약하게만 참조하므로 끝날 때까지 보관)
+        self._tasks = set()
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_latency = Histogram(QUEUE_LATENCY_BUCKETS)
+        self.batch_rows = 0
+
+    async def predict(self, model_path, df):
+        loop = asyncio.get_running_loop()
+        key = (model_path, tuple(df.columns))
+        future = loop.create_future()
+
+        pending = self._pending.setdefault(key, [])
+        pending.append((df, future, time.perf_counter()))
+
+        if sum(len(item[0]) for item in pending) >= self.max_batch_size:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+
+        return await future
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": self.batch_sizes.count,
+            "requests": int(self.batch_sizes.sum),
+            "rows": self.batch_rows,
+            "pending_requests": sum(len(items) for items in self._pending.values()),
+            "batch_size": self.batch_sizes.to_dict(),
+            "queue_latency_seconds": self.queue_latency.to_dict(),
+        }
+
+    def prometheus_lines(self):
+        lines = [
+            "# HELP predict_batch_size Requests merged into one predict call.",
+            "# TYPE predict_batch_size histogram",
+            *self.batch_sizes.prometheus_lines("predict_batch_size"),
+            "# HELP predict_queue_latency_seconds Time a request waited before its batch started.",
+            "# TYPE predict_queue_latency_seconds histogram",
+            *self.queue_latency.prometheus_lines("predict_queue_latency_seconds"),
+            "# HELP predict_batch_rows_total Rows predicted through the batcher.",
+            "# TYPE predict_batch_rows_total counter",
+            f"predict_batch_rows_total {self.batch_rows}",
+        ]
+        return lines
+
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        items = self._pending.pop(key, None)
+        if items:
+            task = asyncio.ensure_future(self._run_batch(key[0], items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, model_path, items):
+        started = time.perf_counter()
+        for _, _, enqueued in items:
+            self.queue_latency.observe(started - enqueued)
+        self.batch_sizes.observe(len(items))
+
+        import numpy as np
+        import pandas as pd
+
+        frames = [item[0] for item in items]
+        try:
+            batch = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+            model, schema = await run_in_threadpool(model_registry.get_predictor, model_path, len(batch))
+            self.batch_rows += len(batch)
+            # 합친 배치에 학습 때의 압축 dtype을 적용한 뒤 예측
+            predictions = await run_in_threadpool(lambda: model.predict(apply_schema(batch, schema)))
+        except Exception as e:
+            if len(items) == 1:
+                logger.error(f"Error during batched prediction (1 request): {str(e)}", exc_info=True)
+                if not items[0][1].done():
+                    items[0][1].set_exception(e)
+                return
+            logger.warning(f"Batched prediction of {len(items)} requests failed, retrying each request: {str(e)}")
+            await self._run_each(model_path, items)
+            return
+
+        logger.debug(f"Batched prediction: {len(items)} requests, {len(batch)} rows")
+        offsets = np.cumsum([len(frame) for frame in frames])[:-1]
+        for (_, future, _), result in zip(items, np.split(np.asarray(predictions), offsets)):
+            if not future.done():
+                future.set_result(result)
+
+    async def _run_each(self, model_path, items):
+        # 배치 실패 시 요청별로 예측 - 실패한 요청에만 예외 전달
+        for df, future, _ in items:
+            try:
+                model, schema = await run_in_threadpool(model_registry.get_predictor, model_path, len(df))
+                predictions = await run_in_threadpool(lambda: model.predict(apply_schema(df, schema)))
+            except Exception as e:
+                logger.error(f"Error during batched prediction: {str(e)}", exc_info=True)
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            if not future.done():
+                future.set_result(predictions)
+
+prediction_batcher = PredictionBatcher(settings.PREDICT_BATCH_MAX_SIZE, settings.PREDICT_BATCH_MAX_WAIT_MS)
+metrics_store.register_collector(prediction_batcher.prometheus_lines)
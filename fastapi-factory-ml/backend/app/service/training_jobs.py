@@ -0,0 +1,187 @@
+# File: C:\_YHJ\fast\backend\app\service\training_jobs.py
+# Purpose: Runs model training in a process pool and tracks job status/progress
+
+import logging
+import multiprocessing
+import threading
+import time
+import traceback
+import os
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException
+from app.core.config import settings
+from ml.common.training_cache import TrainingCache
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+def _run_job(job_id, progress, fn, args, kwargs):
+    """
+    워커 프로세스에서 실행되는 래퍼. 진행 상황은 Manager dict를 통해 부모 프로세스에 전달됩니다.
+    """
+    def notify_progress(fraction, stage):
+        progress[job_id] = {"progress": float(fraction), "stage": stage, "started_at": started_at}
+
+    started_at = time.time()
+    notify_progress(0.0, "started")
+    return fn(*args, progress_callback=notify_progress, **kwargs)
+
+class JobManager:
+    """
+    학습 작업을 프로세스 풀에서 실행합니다.
+
+    - 동시에 실행되는 학습 수는 max_workers로 제한되며, 나머지는 풀 내부 큐에서 대기합니다.
+    - 대기 중인 작업이 max_pending을 넘으면 새 작업은 429로 거절됩니다.
+    - 완료된 작업은 최근 history_size개까지만 메모리에 보관합니다.
+    """
+
+    def __init__(self, max_workers, max_pending, history_size=100):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.history_size = history_size
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._manager = None
+        self._progress = None
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """
+        fn(*args, progress_callback=..., **kwargs)를 워커 프로세스에서 실행하고 작업 정보를 반환합니다.
+        """
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if job["status"] in (QUEUED, RUNNING))
+            if active >= self.max_workers + self.max_pending:
+                raise HTTPException(status_code=429, detail="Too many training jobs queued, try again later")
+
+            executor = self._ensure_executor()
+            job_id = uuid.uuid4().hex
+            job = {
+                "job_id": job_id,
+                "kind": kind,
+                "status": QUEUED,
+                "progress": 0.0,
+                "stage": QUEUED,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+            }
+            self._jobs[job_id] = job
+            self._trim_history()
+
+        future = executor.submit(_run_job, job_id, self._progress, fn, args, kwargs)
+        future.add_done_callback(lambda f: self._on_done(job_id, f))
+        logger.info(f"Submitted {kind} job {job_id}")
+        return self.get(job_id)
+
+    def record(self, kind, result):
+        """
+        실행 없이 이미 끝난 작업(예: 학습 캐시 적중)을 완료 상태로 등록하고 작업 정보를 반환합니다.
+        """
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "kind": kind,
+                "status": COMPLETED,
+                "progress": 1.0,
+                "stage": COMPLETED,
+                "created_at": now,
+                "started_at": now,
+                "finished_at": now,
+                "result": result,
+                "error": None,
+            }
+            self._trim_history()
+        return self.get(job_id)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            self._sync_progress(job)
+            return dict(job)
+
+    def list(self):
+        with self._lock:
+            jobs = []
+            for job in reversed(self._jobs.values()):
+                self._sync_progress(job)
+                jobs.append(dict(job))
+            return jobs
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+            self._progress = None
+
+    def _ensure_executor(self):
+        if self._executor is None:
+            self._manager = multiprocessing.Manager()
+            self._progress = self._manager.dict()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _sync_progress(self, job):
+        if job["status"] not in (QUEUED, RUNNING) or self._progress is None:
+            return
+        try:
+            update = self._progress.get(job["job_id"])
+        except Exception:
+            return
+        if update:
+            job["status"] = RUNNING
+            job["progress"] = update["progress"]
+            job["stage"] = update["stage"]
+            job["started_at"] = update["started_at"]
+
+    def _on_done(self, job_id, future):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            self._sync_progress(job)
+            job["finished_at"] = time.time()
+            if future.cancelled():
+                job["status"] = FAILED
+                job["error"] = "Job was cancelled"
+            elif future.exception() is not None:
+                error = future.exception()
+                logger.error(f"Job {job_id} failed: {''.join(traceback.format_exception(error))}")
+                job["status"] = FAILED
+                job["error"] = str(error)
+            else:
+                result = future.result()
+                job["result"] = result
+                if isinstance(result, dict) and "error" in result:
+                    job["status"] = FAILED
+                    job["error"] = result["error"]
+                else:
+                    job["status"] = COMPLETED
+                    job["progress"] = 1.0
+                    job["stage"] = COMPLETED
+            if self._progress is not None:
+                self._progress.pop(job_id, None)
+        logger.info(f"Job {job_id} finished with status {job['status']}")
+
+    def _trim_history(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in (COMPLETED, FAILED)]
+        for job_id in finished[:max(0, len(self._jobs) - self.history_size)]:
+            del self._jobs[job_id]
+
+job_manager = JobManager(settings.TRAINING_MAX_WORKERS, settings.TRAINING_MAX_PENDING)
+training_cache = TrainingCache(os.path.join(settings.ML_OUTPUT_DIR, ".training_cache"), settings.TRAINING_CACHE_MAX_BYTES)
@@ -0,0 +1,101 @@
+# File: C:\_YHJ\fast\backend\benchmarks\label_encoder_benchmark.py
+# Purpose: Compares the categorical-code ConsistentLabelEncoder with the previous dict/Series.map implementation
+#
+# 사용법 (backend 디렉토리에서 실행):
+#   python benchmarks/label_encoder_benchmark.py --rows 1000000 --repeat 3
+
+import argparse
+import os
+import pickle
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+import pandas as pd
+
+from ml.preprocessing.data_preprocessing import ConsistentLabelEncoder
+
+class LegacyConsistentLabelEncoder:
+    # 비교용: 열마다 {값: 코드} dict를 만들고 Series.map으로 변환하던 이전 구현
+    def __init__(self):
+        self.encoders = {}
+
+    def fit_transform(self, X):
+        X_transformed = X.copy()
+        for column in X.columns:
+            if X[column].dtype == 'object':
+                unique_values = X[column].unique()
+                self.encoders[column] = {val: idx for idx, val in enumerate(unique_values)}
+                X_transformed[column] = X[column].map(self.encoders[column])
+        return X_transformed
+
+    def inverse_transform(self, X):
+        X_transformed = X.copy()
+        for column in X.columns:
+            if column in self.encoders:
+                inverse_encoder = {idx: val for val, idx in self.encoders[column].items()}
+                X_transformed[column] = X_transformed[column].map(inverse_encoder)
+        return X_transformed
+
+def make_frame(num_rows, seed=42):
+    """
+    data_gen과 같은 형식의 ID 열 (Operator_ID 20개, Product_ID 1000개, Batch_Number 100개)과
+    고유값이 많은 Serial_Number 열을 만듭니다.
+    """
+    rng = np.random.default_rng(seed)
+
+    def ids(prefix, count, width):
+        labels = np.array([f"{prefix}{i:0{width}d}" for i in range(1, count + 1)], dtype=object)
+        return labels[rng.integers(0, count, num_rows)]
+
+    return pd.DataFrame({
+        "Operator_ID": ids("OP", 20, 3),
+        "Product_ID": ids("P", 1000, 4),
+        "Batch_Number": ids("B", 100, 3),
+        "Serial_Number": ids("S", max(num_rows // 10, 1), 7),
+    })
+
+def best_time(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ConsistentLabelEncoder against the dict/Series.map implementation")
+    parser.add_argument("--rows", type=int, default=1000000, help="행 수")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 횟수 (최소 시간 사용)")
+    args = parser.parse_args()
+
+    data = make_frame(args.rows)
+    print(f"rows: {args.rows}, cardinality: {data.nunique().to_dict()}")
+    print(f"{'encoder':<10} {'fit_transform (s)':>18} {'inverse (s)':>12} {'pickle (KB)':>12}")
+
+    results = {}
+    for name, encoder_class in (("legacy", LegacyConsistentLabelEncoder), ("codes", ConsistentLabelEncoder)):
+        encoder = encoder_class()
+        fit_seconds, encoded = best_time(lambda: encoder.fit_transform(data), args.repeat)
+        inverse_seconds, decoded = best_time(lambda: encoder.inverse_transform(encoded), args.repeat)
+        size = len(pickle.dumps(encoder, protocol=pickle.HIGHEST_PROTOCOL))
+        results[name] = (encoded, decoded)
+        print(f"{name:<10} {fit_seconds:>18.3f} {inverse_seconds:>12.3f} {size / 1024:>12.1f}")
+
+    # 두 구현의 코드와 역변환 결과가 같은지 확인
+    legacy_encoded, legacy_decoded = results["legacy"]
+    encoded, decoded = results["codes"]
+    same_codes = all((legacy_encoded[column].to_numpy() == encoded[column].to_numpy()).all() for column in data.columns)
+    print(f"same codes: {same_codes}, round trip: {decoded.equals(data) and legacy_decoded.equals(data)}")
+
+    # 학습 후 새 데이터 변환 (legacy 구현에는 transform이 없음)
+    encoder = ConsistentLabelEncoder().fit(data)
+    new_data = make_frame(args.rows, seed=7)
+    transform_seconds, _ = best_time(lambda: encoder.transform(new_data), args.repeat)
+    print(f"codes transform on new data: {transform_seconds:.3f} s")
+
+if __name__ == "__main__":
+    main()
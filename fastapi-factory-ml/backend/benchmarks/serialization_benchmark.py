@@ -0,0 +1,110 @@
+# File: C:\_YHJ\fast\backend\benchmarks\serialization_benchmark.py
+# Purpose: Compares model file formats (joblib compression, memory-mapped loading, flattened forest) by disk size, load time and predict latency
+#
+# 사용법 (backend 디렉토리에서 실행):
+#   python benchmarks/serialization_benchmark.py --rows 100000
+#   python benchmarks/serialization_benchmark.py --rows 100000 --formats joblib joblib_mmap flat_mmap --batch 10000
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from ml.common.flat_forest import flatten_model
+from ml.data.data_gen import generate_machine_data
+from ml.main import fit_model_pipeline
+
+TARGET_COLUMN = "Quality_Result"
+
+# 형식 이름 -> (평탄화 여부, joblib 압축, 로드 시 mmap_mode)
+FORMATS = {
+    "joblib": (False, 0, None),
+    "joblib_mmap": (False, 0, "r"),
+    "zlib_3": (False, ("zlib", 3), None),
+    "zlib_9": (False, ("zlib", 9), None),
+    "lzma_3": (False, ("lzma", 3), None),
+    "lz4_3": (False, ("lz4", 3), None),
+    "flat": (True, 0, None),
+    "flat_mmap": (True, 0, "r"),
+    "flat_zlib_3": (True, ("zlib", 3), None),
+}
+
+def prepare_model(num_rows, work_dir):
+    """
+    data_gen으로 데이터를 생성해 숫자 열만으로 기본 파이프라인(전처리 + 랜덤 포레스트)을 학습합니다.
+    """
+    csv_path = generate_machine_data(num_rows, output_dir=work_dir)
+    data = pd.read_csv(csv_path).select_dtypes("number").dropna()
+    os.remove(csv_path)
+    X, y = data.drop(TARGET_COLUMN, axis=1), data[TARGET_COLUMN].astype(int)
+    return fit_model_pipeline(X, y, {"n_jobs": -1}), X
+
+def median_seconds(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def run_format(name, model, flat_model, X, work_dir, batch_size, repeat):
+    """
+    한 형식으로 저장한 뒤 파일 크기, 로드 시간, 1행/배치 예측 시간(중앙값)을 측정합니다.
+    """
+    flat, compress, mmap_mode = FORMATS[name]
+    path = os.path.join(work_dir, f"{name}.pkl")
+    joblib.dump(flat_model if flat else model, path, compress=compress)
+
+    load_seconds = median_seconds(lambda: joblib.load(path, mmap_mode=mmap_mode), repeat)
+    loaded = joblib.load(path, mmap_mode=mmap_mode)
+    row, batch = X.iloc[:1], X.iloc[:batch_size]
+    # 평탄화 모델도 원래 모델과 같은 확률을 내는지 확인
+    if not np.array_equal(loaded.predict_proba(batch), model.predict_proba(batch)):
+        raise RuntimeError(f"{name}: predictions differ from the original model")
+    return {
+        "format": name,
+        "size_mb": os.path.getsize(path) / 1024 ** 2,
+        "load_ms": load_seconds * 1000,
+        "predict_1_ms": median_seconds(lambda: loaded.predict(row), repeat * 10) * 1000,
+        "predict_batch_ms": median_seconds(lambda: loaded.predict(batch), repeat) * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare model serialization formats")
+    parser.add_argument("--rows", type=int, default=100000, help="학습 데이터 행 수")
+    parser.add_argument("--formats", nargs="+", choices=list(FORMATS), default=list(FORMATS), help="비교할 저장 형식")
+    parser.add_argument("--batch", type=int, default=10000, help="배치 예측 행 수")
+    parser.add_argument("--repeat", type=int, default=5, help="측정 반복 횟수 (중앙값 사용)")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        model, X = prepare_model(args.rows, work_dir)
+        flat_model = flatten_model(model)
+        # 단일 스레드 예측으로 비교 (평탄화 모델은 병렬화하지 않음)
+        model[-1].set_params(n_jobs=None)
+        nodes = sum(tree.tree_.node_count for tree in model[-1].estimators_)
+        print(f"rows: {len(X)}, trees: {len(model[-1].estimators_)}, nodes: {nodes}, batch: {args.batch}")
+        print(f"{'format':<12} {'size (MB)':>10} {'load (ms)':>10} {'1 row (ms)':>11} {'batch (ms)':>11}")
+        for name in args.formats:
+            try:
+                result = run_format(name, model, flat_model, X, work_dir, args.batch, args.repeat)
+            except (ImportError, ValueError) as e:
+                # 압축 방식에 필요한 패키지(lz4 등)가 없으면 건너뜀
+                print(f"{name:<12} skipped: {e}")
+                continue
+            print(f"{name:<12} {result['size_mb']:>10.2f} {result['load_ms']:>10.1f} "
+                  f"{result['predict_1_ms']:>11.2f} {result['predict_batch_ms']:>11.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# File: C:\_YHJ\fast\backend\benchmarks\startup_benchmark.py
+# Purpose: Measures cold import time of app.main and time to first request of a fresh uvicorn worker
+#
+# 사용법 (backend 디렉토리에서 실행):
+#   python benchmarks/startup_benchmark.py --runs 5
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["pandas", "numpy", "sklearn", "scipy", "joblib", "pyarrow"]
+
+IMPORT_SNIPPET = f"""
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+def _env(output_dir):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = BACKEND_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    env["ML_OUTPUT_DIR"] = output_dir
+    env.setdefault("LOG_LEVEL", "WARNING")
+    return env
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def measure_import(env):
+    """
+    새 인터프리터에서 app.main을 import하는 데 걸리는 시간과 함께 로드된 무거운 모듈 목록을 반환합니다.
+    """
+    output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def measure_first_request(env, timeout=60.0):
+    """
+    uvicorn 프로세스를 띄운 시점부터 GET /가 처음 200으로 응답할 때까지의 시간을 반환합니다.
+    """
+    port = _free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError("Server did not answer within the timeout")
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend cold import and time to first request")
+    parser.add_argument("--runs", type=int, default=5, help="반복 측정 횟수")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        env = _env(output_dir)
+        imports = [measure_import(env) for _ in range(args.runs)]
+        first_requests = [measure_first_request(env) for _ in range(args.runs)]
+
+    import_times = [result["seconds"] for result in imports]
+    print(f"cold import of app.main : median {statistics.median(import_times) * 1000:.1f} ms, "
+          f"min {min(import_times) * 1000:.1f} ms ({args.runs} runs)")
+    print(f"heavy modules loaded    : {imports[-1]['loaded'] or 'none'}")
+    print(f"time to first request   : median {statistics.median(first_requests) * 1000:.1f} ms, "
+          f"min {min(first_requests) * 1000:.1f} ms ({args.runs} runs)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# File: C:\_YHJ\fast\backend\benchmarks\training_benchmark.py
+# Purpose: Compares wall time and accuracy of run_model training modes (n_jobs, warm_start, max_samples) on generated data
+#
+# 사용법 (backend 디렉토리에서 실행):
+#   python benchmarks/training_benchmark.py --rows 10000 100000 1000000
+#   python benchmarks/training_benchmark.py --rows 10000 --modes single multi_core
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from ml.data.data_gen import generate_machine_data
+from ml.main import run_model
+
+TARGET_COLUMN = "Quality_Result"
+
+# 비교할 학습 방식 (run_model의 training_options)
+MODES = {
+    "single": {"n_jobs": 1},
+    "multi_core": {"n_jobs": -1},
+    "warm_start": {"n_jobs": -1, "warm_start": True, "warm_start_step": 25},
+    "max_samples_0.25": {"n_jobs": -1, "max_samples": 0.25},
+}
+
+def prepare_dataset(num_rows, work_dir):
+    """
+    data_gen으로 데이터를 생성한 뒤 숫자 열만 남기고 결측 행을 제거하여 Parquet으로 저장합니다.
+    (run_model은 전처리 없이 학습하므로 문자열 열을 제외)
+    """
+    import pandas as pd
+
+    csv_path = generate_machine_data(num_rows, output_dir=work_dir)
+    data = pd.read_csv(csv_path).select_dtypes("number").dropna()
+    data[TARGET_COLUMN] = data[TARGET_COLUMN].astype(int)
+    dataset_path = os.path.join(work_dir, f"train_{num_rows}.parquet")
+    data.to_parquet(dataset_path, index=False)
+    os.remove(csv_path)
+    return dataset_path, len(data)
+
+def run_mode(dataset_path, training_options, output_dir):
+    """
+    한 가지 학습 방식으로 run_model을 실행하고 전체 소요 시간과 결과를 반환합니다.
+    """
+    start = time.perf_counter()
+    result = run_model(dataset_path, TARGET_COLUMN, output_dir=output_dir, training_options=training_options)
+    elapsed = time.perf_counter() - start
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    return elapsed, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare run_model training modes on generated machine data")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000], help="생성할 데이터 행 수")
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=list(MODES), help="비교할 학습 방식")
+    args = parser.parse_args()
+    # 불균형 타겟에서 나오는 sklearn 지표 경고는 결과 표를 가리므로 숨김
+    warnings.simplefilter("ignore")
+
+    print(f"CPU cores: {os.cpu_count()}")
+    print(f"{'rows':>9} {'mode':<18} {'wall (s)':>9} {'train (s)':>10} {'accuracy':>9} {'f1':>7}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for num_rows in args.rows:
+            dataset_path, n_rows = prepare_dataset(num_rows, work_dir)
+            for mode in args.modes:
+                elapsed, result = run_mode(dataset_path, MODES[mode], os.path.join(work_dir, mode))
+                print(f"{n_rows:>9} {mode:<18} {elapsed:>9.2f} {result['training_seconds']:>10.2f} "
+                      f"{result['accuracy']:>9.4f} {result['f1_score']:>7.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# Absolute path: C:\_YHJ\fast\backend\ml\common\dtype_optimization.py
+
+# 고유값 비율/개수가 이 값 이하인 문자열 열은 category로 변환
+CATEGORY_MAX_RATIO = 0.5
+CATEGORY_MAX_UNIQUE = 65535
+
+_INT_TYPES = ("int8", "int16", "int32", "int64")
+# float32로 바꿀 때 허용하는 오차 (열의 값 범위 대비 비율)
+FLOAT32_RTOL = 1e-6
+# float32가 모든 정수를 정확히 표현하는 최대 절댓값 (2^24)
+FLOAT32_MAX_EXACT_INT = 2 ** 24
+
+def frame_memory_bytes(data):
+    """
+    Return the memory used by a DataFrame, including the contents of object columns.
+    """
+    return int(data.memory_usage(index=True, deep=True).sum())
+
+def _smallest_int_type(minimum, maximum):
+    import numpy as np
+
+    for dtype in _INT_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= minimum and maximum <= info.max:
+            return dtype
+    return "int64"
+
+def fits_float32(values):
+    """
+    Return True if a float column can be stored as float32 without losing information.
+
+    Whole-number columns (IDs or counters loaded as float64 because of missing
+    values) must be exact, i.e. within +-2^24. For other columns the round-trip
+    error must stay within ``FLOAT32_RTOL`` of the column's range, so values that
+    are large compared to their spread (e.g. timestamps in seconds) are kept.
+    """
+    import numpy as np
+
+    finite = values.to_numpy(dtype="float64", na_value=np.nan)
+    finite = finite[np.isfinite(finite)]
+    if not len(finite):
+        return True
+    if np.all(finite % 1 == 0):
+        return bool(np.abs(finite).max() <= FLOAT32_MAX_EXACT_INT)
+    error = np.abs(finite.astype(np.float32).astype(np.float64) - finite).max()
+    return bool(error <= FLOAT32_RTOL * (finite.max() - finite.min()))
+
+def infer_compact_schema(data, exclude=(), category_max_ratio=CATEGORY_MAX_RATIO, category_max_unique=CATEGORY_MAX_UNIQUE):
+    """
+    Infer compact dtypes for the columns of a DataFrame.
+
+    float64 columns become float32 when no precision is lost (see ``fits_float32``),
+    integer columns the smallest integer type that holds their range, and string
+    columns with few distinct values ``category``.
+    Other columns (and ``exclude``) keep their dtype and are left out of the schema.
+
+    Args:
+        data (pd.DataFrame): Data as loaded.
+        exclude (iterable): Columns to leave unchanged (e.g. the target column).
+        category_max_ratio (float): Maximum distinct/non-null ratio for ``category``.
+        category_max_unique (int): Maximum number of distinct values for ``category``.
+
+    Returns:
+        dict: ``{column: dtype name}`` for the columns to convert.
+    """
+    import pandas as pd
+
+    schema = {}
+    for column in data.columns:
+        if column in exclude:
+            continue
+        values = data[column]
+        dtype = values.dtype
+        if pd.api.types.is_bool_dtype(dtype):
+            continue
+        if pd.api.types.is_float_dtype(dtype):
+            if dtype.itemsize > 4 and fits_float32(values):
+                schema[column] = "float32"
+        elif pd.api.types.is_integer_dtype(dtype):
+            if len(values):
+                compact = _smallest_int_type(int(values.min()), int(values.max()))
+                if compact != str(dtype):
+                    schema[column] = compact
+        elif pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            non_null = int(values.count())
+            unique = values.nunique(dropna=True)
+            if non_null and unique <= category_max_unique and unique / non_null <= category_max_ratio:
+                schema[column] = "category"
+    return schema
+
+def apply_schema(data, schema):
+    """
+    Convert the columns of a DataFrame to the dtypes of a schema.
+
+    Integer conversions are only applied when every value fits the target type
+    without missing values; otherwise the column becomes float32 (float64 when
+    float32 would lose precision) so that values are never truncated. Columns that
+    are not in the schema, or not in the data, are left unchanged.
+
+    Args:
+        data (pd.DataFrame): Data to convert.
+        schema (dict): ``{column: dtype name}`` from ``infer_compact_schema``.
+
+    Returns:
+        pd.DataFrame: Converted data (the input is not modified).
+    """
+    import numpy as np
+    import pandas as pd
+
+    converted = {}
+    for column, dtype in schema.items():
+        if column not in data.columns:
+            continue
+        values = data[column]
+        if str(values.dtype) == dtype:
+            continue
+        if dtype in _INT_TYPES:
+            numeric = pd.to_numeric(values, errors="coerce")
+            info = np.iinfo(dtype)
+            if numeric.notna().all() and (numeric % 1 == 0).all() and (len(numeric) == 0 or
+                                                                        (info.min <= numeric.min() and numeric.max() <= info.max)):
+                converted[column] = numeric.astype(dtype)
+            else:
+                converted[column] = numeric.astype("float32" if fits_float32(numeric) else "float64")
+        elif dtype == "float32":
+            converted[column] = pd.to_numeric(values, errors="coerce").astype("float32")
+        else:
+            converted[column] = values.astype(dtype)
+    if not converted:
+        return data
+    return data.assign(**converted)
+
+def compact_dtypes(data, exclude=()):
+    """
+    Infer a compact schema, apply it and measure the memory saved.
+
+    Args:
+        data (pd.DataFrame): Data as loaded.
+        exclude (iterable): Columns to leave unchanged.
+
+    Returns:
+        tuple: (converted data, schema, ``{"before_bytes", "after_bytes", "saved_bytes"}``)
+    """
+    before = frame_memory_bytes(data)
+    schema = infer_compact_schema(data, exclude)
+    data = apply_schema(data, schema)
+    after = frame_memory_bytes(data)
+    return data, schema, {"before_bytes": before, "after_bytes": after, "saved_bytes": before - after}
@@ -1,9 +1,18 @@
 # Absolute path: C:\_YHJ\fast\backend\ml\common\feature_importance.py
 
+import os
+import json
+import time
+
+from ml.common.file_operations import _to_json_value, get_holdout_path, load_dataset, save_data_to_parquet
+
+# 모델과 함께 저장하는 평가용(held-out) 표본의 최대 행 수
+HOLDOUT_SAMPLE_ROWS = 5000
+
 def get_feature_importance(model, features):
     """
     Calculate feature importance for the given model.
-    
+
     Args:
         model: Trained model with feature_importances_ attribute.
         features (list): List of feature names.
@@ -18,3 +27,209 @@ def get_feature_importance(model, features):
     except Exception as e:
         print(f"An error occurred while calculating feature importance: {e}")
         raise
+
+def _split_pipeline(model, X):
+    # 전처리 단계는 열마다 독립적으로 변환하므로, 변환된 열을 섞는 것은 원본 열을 섞은 뒤 변환하는 것과 같음
+    if hasattr(model, "named_steps"):
+        return model[-1], model[:-1].transform(X)
+    return model, X.to_numpy() if hasattr(X, "to_numpy") else X
+
+def permutation_importance(model, X, y, n_repeats=5, n_jobs=-1, random_state=42):
+    """
+    Compute permutation importance (drop in accuracy when one feature is shuffled).
+
+    For an inference pipeline, X is transformed once and the columns of the
+    transformed matrix are shuffled, so the preprocessing step is not re-run for
+    every permutation. Features are scored in parallel over ``n_jobs`` workers.
+
+    Args:
+        model: Fitted estimator or inference pipeline.
+        X (pd.DataFrame): Held-out features.
+        y (pd.Series): Held-out labels.
+        n_repeats (int): Shuffles per feature.
+        n_jobs (int): Parallel workers (-1 for all cores).
+        random_state (int): Seed of the shuffles.
+
+    Returns:
+        dict: ``baseline_score``, ``importances_mean`` and ``importances_std`` per feature.
+    """
+    from sklearn.inspection import permutation_importance as sklearn_permutation_importance
+
+    estimator, X_transformed = _split_pipeline(model, X)
+    result = sklearn_permutation_importance(estimator, X_transformed, y, scoring="accuracy", n_repeats=n_repeats,
+                                            n_jobs=n_jobs, random_state=random_state)
+    features = list(X.columns)
+    return {
+        "scoring": "accuracy",
+        "baseline_score": float(estimator.score(X_transformed, y)),
+        "importances_mean": dict(zip(features, result.importances_mean.tolist())),
+        "importances_std": dict(zip(features, result.importances_std.tolist())),
+    }
+
+def _tree_contributions(trees, X, n_features):
+    import numpy as np
+
+    # 설명할 행이 실제로 지나간 경로만 따라가며 (행, 분할 특성)별 확률 변화를 누적 (노드 x 특성 x 클래스 배열은 만들지 않음)
+    n_samples = len(X)
+    contributions = np.zeros((n_samples, n_features, 0))
+    expected_value = 0.0
+    for tree in trees:
+        structure = tree.tree_
+        values = structure.value[:, 0, :]
+        values = values / values.sum(axis=1, keepdims=True)
+        if contributions.shape[2] == 0:
+            contributions = np.zeros((n_samples, n_features, values.shape[1]))
+
+        # 행마다 루트에서 잎까지 한 단계씩 내려가며 지나간 분기만 누적 (결측치는 predict와 같이 missing_go_to_left를 따름,
+        # decision_path는 결측치 방향을 반영하지 않으므로 직접 따라감)
+        missing_go_to_left = getattr(structure, "missing_go_to_left", np.zeros(structure.node_count, dtype=bool))
+        nodes = np.zeros(n_samples, dtype=np.intp)
+        active = np.flatnonzero(structure.children_left[nodes] >= 0)
+        cells, deltas = [], []
+        while active.size:
+            node = nodes[active]
+            feature = structure.feature[node]
+            value = X[active, feature]
+            go_left = np.where(np.isnan(value), missing_go_to_left[node], value <= structure.threshold[node])
+            child = np.where(go_left, structure.children_left[node], structure.children_right[node])
+            cells.append(active * n_features + feature)
+            deltas.append(values[child] - values[node])
+            nodes[active] = child
+            active = active[structure.children_left[child] >= 0]
+        if cells:
+            cells, deltas = np.concatenate(cells), np.concatenate(deltas)
+            for k in range(values.shape[1]):
+                contributions[:, :, k] += np.bincount(cells, weights=deltas[:, k],
+                                                      minlength=n_samples * n_features).reshape(n_samples, n_features)
+        expected_value = expected_value + values[0]
+    return contributions, expected_value
+
+def tree_path_attributions(model, X, n_jobs=-1):
+    """
+    Compute tree-path (Saabas) attributions of a tree ensemble.
+
+    Every split a sample passes through changes the predicted class
+    probabilities; that change is credited to the split feature. Per sample the
+    contributions add up to ``predict_proba - expected_value``. Decision paths
+    are walked level by level for the explained rows only, and the trees
+    are split into one batch per thread, so memory stays at one
+    (samples, features, classes) array per thread.
+
+    Args:
+        model: Fitted tree ensemble (or single tree), or an inference pipeline ending in one.
+        X (pd.DataFrame): Samples to explain.
+        n_jobs (int): Parallel threads (-1 for all cores).
+
+    Returns:
+        dict: ``classes``, ``expected_value`` per class and ``mean_abs_contribution``
+        per feature, or None if the estimator is not tree based.
+    """
+    import numpy as np
+    from joblib import Parallel, delayed, effective_n_jobs
+
+    estimator, X_transformed = _split_pipeline(model, X)
+    trees = getattr(estimator, "estimators_", None)
+    if trees is None and hasattr(estimator, "tree_"):
+        trees = [estimator]
+    if not trees or not all(hasattr(tree, "tree_") for tree in trees):
+        return None
+
+    X_transformed = np.ascontiguousarray(X_transformed, dtype=np.float32)
+    n_features = X_transformed.shape[1]
+    n_batches = min(effective_n_jobs(n_jobs), len(trees))
+    results = Parallel(n_jobs=n_batches, prefer="threads")(
+        delayed(_tree_contributions)(trees[batch::n_batches], X_transformed, n_features) for batch in range(n_batches)
+    )
+    contributions = sum(result[0] for result in results) / len(trees)
+    expected_value = sum(result[1] for result in results) / len(trees)
+
+    features = list(X.columns)
+    return {
+        "classes": estimator.classes_.tolist(),
+        "expected_value": expected_value.tolist(),
+        "mean_abs_contribution": dict(zip(features, np.abs(contributions).sum(axis=2).mean(axis=0).tolist())),
+    }
+
+def save_holdout_sample(data, model_path, max_rows=HOLDOUT_SAMPLE_ROWS, random_state=42):
+    """
+    Save up to ``max_rows`` held-out rows (features and target) next to the model file.
+    Skipped when pyarrow is not installed.
+
+    Args:
+        data (pd.DataFrame): Rows the model was not trained on.
+        model_path (str): Path to the model file.
+    """
+    if len(data) > max_rows:
+        data = data.sample(n=max_rows, random_state=random_state)
+    try:
+        save_data_to_parquet(data, get_holdout_path(model_path))
+    except ImportError as e:
+        print(f"Skipping held-out sample for feature attributions: {e}")
+
+def get_attributions_path(model_path):
+    """
+    Return the path of the cached feature attributions of a model file.
+    """
+    return os.path.splitext(model_path)[0] + ".importance.json"
+
+def compute_model_attributions(model, model_path, version, target_column, sample_size=2000, n_repeats=5, n_jobs=-1,
+                               random_state=42, cache_path=None):
+    """
+    Return permutation importance and tree-path attributions over the held-out sample of a model.
+
+    Results are cached in ``cache_path`` (by default next to the model) and reused
+    while the model version and parameters are unchanged.
+
+    Args:
+        model: Loaded model (inference pipeline).
+        model_path (str): Path to the model file.
+        version (str): Model version (cache key).
+        target_column (str): Target column of the held-out sample.
+        sample_size (int): Held-out rows used.
+        n_repeats (int): Shuffles per feature for permutation importance.
+        n_jobs (int): Parallel workers (-1 for all cores).
+        random_state (int): Seed of the row sample and the shuffles.
+        cache_path (str): Cache file, for models whose directory must not be modified.
+
+    Returns:
+        dict: Attributions with ``cached`` set when they were read from the cache.
+
+    Raises:
+        FileNotFoundError: If the model has no held-out sample.
+    """
+    key = {"version": version, "sample_size": sample_size, "n_repeats": n_repeats, "random_state": random_state}
+    cache_path = cache_path or get_attributions_path(model_path)
+    try:
+        with open(cache_path, "r", encoding="utf-8") as file:
+            cached = json.load(file)
+        if cached.get("key") == key:
+            return dict(cached["result"], cached=True)
+    except (OSError, ValueError):
+        pass
+
+    holdout_path = get_holdout_path(model_path)
+    if not os.path.exists(holdout_path):
+        raise FileNotFoundError(f"No held-out sample stored for model '{os.path.basename(model_path)}'")
+    holdout = load_dataset(holdout_path, "parquet")
+    if len(holdout) > sample_size:
+        holdout = holdout.sample(n=sample_size, random_state=random_state)
+    X, y = holdout.drop(target_column, axis=1), holdout[target_column]
+
+    start = time.perf_counter()
+    estimator = model[-1] if hasattr(model, "named_steps") else model
+    result = {
+        "version": version,
+        "n_samples": len(holdout),
+        "impurity": dict(zip(X.columns, estimator.feature_importances_.tolist()))
+        if hasattr(estimator, "feature_importances_") else None,
+        "permutation": permutation_importance(model, X, y, n_repeats, n_jobs, random_state),
+        "tree_path": tree_path_attributions(model, X, n_jobs),
+    }
+    result["computed_seconds"] = time.perf_counter() - start
+
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump({"key": key, "result": result}, file, ensure_ascii=False, default=_to_json_value)
+    os.replace(tmp_path, cache_path)
+    return dict(result, cached=False)
@@ -1,41 +1,421 @@
 # Absolute path: C:\_YHJ\fast\backend\ml\common\file_operations.py
 
-import joblib
-import pandas as pd
+import os
+import json
 
-def save_model(model, file_path):
+# joblib/pandas는 import 비용이 커서 실제로 사용하는 함수 안에서 가져옴 (서버 시작 시간 단축)
+
+# joblib이 지원하는 압축 방식 (lz4는 lz4 패키지가 설치된 경우에만 사용 가능)
+COMPRESS_METHODS = ("zlib", "gzip", "bz2", "lzma", "xz", "lz4")
+# 모델 옆에 저장하는 평가용 표본(학습 데이터 일부) 파일의 접미사
+HOLDOUT_SUFFIX = ".holdout.parquet"
+
+def save_model(model, file_path, compress=0):
     """
     Save the trained model to a file.
+
+    The model is written to a temporary file and atomically renamed, so readers
+    (the model registry, hard links in the training cache) never see a partially
+    written file and an existing file at ``file_path`` is replaced, not overwritten.
     
     Args:
         model: Trained model to save.
         file_path (str): Path to save the model file.
+        compress: joblib compression - 0 for none, a level (1-9, zlib) or ``(method, level)``.
+            Compressed files are smaller but cannot be memory-mapped when loading.
     """
+    import joblib
+
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
     try:
-        joblib.dump(model, file_path)
+        joblib.dump(model, tmp_path, compress=compress)
+        os.replace(tmp_path, file_path)
         print(f"Model saved to {file_path}")
     except Exception as e:
         print(f"An error occurred while saving the model: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
         raise
 
-def load_model(file_path):
+def load_model(file_path, mmap_mode=None):
     """
     Load a trained model from a file.
     
     Args:
         file_path (str): Path to the model file.
+        mmap_mode (str, optional): ``'r'`` to memory-map the NumPy arrays of an uncompressed
+            file (e.g. tree node arrays) instead of reading them into memory. Ignored for compressed files.
 
     Returns:
         Loaded model.
     """
+    import joblib
+
     try:
-        model = joblib.load(file_path)
+        # 압축된 파일에 mmap_mode를 주면 joblib이 배열을 잘못된 위치에서 매핑하려고 하므로 압축 여부를 먼저 확인
+        if mmap_mode is not None and is_compressed_model(file_path):
+            mmap_mode = None
+        model = joblib.load(file_path, mmap_mode=mmap_mode)
         print(f"Model loaded from {file_path}")
         return model
     except Exception as e:
         print(f"An error occurred while loading the model: {e}")
         raise
 
+def is_compressed_model(file_path):
+    """
+    Return True if a joblib file was saved with compression.
+
+    Uncompressed joblib files are plain pickles, which start with the PROTO opcode (``0x80``);
+    every compressor joblib supports writes its own magic number instead.
+
+    Args:
+        file_path (str): Path to the model file.
+
+    Returns:
+        bool: True if the file is compressed.
+    """
+    with open(file_path, "rb") as file:
+        return file.read(1) != b"\x80"
+
+def get_metadata_path(model_path):
+    """
+    Return the path of the metadata sidecar stored next to a model file.
+    
+    Args:
+        model_path (str): Path to the model file.
+
+    Returns:
+        str: Path to the ``<model>.meta.json`` file.
+    """
+    return os.path.splitext(model_path)[0] + ".meta.json"
+
+def _to_json_value(value):
+    # numpy 스칼라/배열 (numpy를 import하지 않고 처리)
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def save_model_metadata(metadata, model_path):
+    """
+    Save model metadata (metrics, feature names, target column, ...) next to the model file.
+    
+    Args:
+        metadata (dict): JSON-serializable metadata.
+        model_path (str): Path to the model file the metadata belongs to.
+    """
+    try:
+        metadata_path = get_metadata_path(model_path)
+        tmp_path = metadata_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(metadata, file, ensure_ascii=False, default=_to_json_value)
+        os.replace(tmp_path, metadata_path)
+    except Exception as e:
+        print(f"An error occurred while saving model metadata: {e}")
+        raise
+
+def load_model_metadata(model_path):
+    """
+    Load the metadata stored next to a model file.
+    
+    Args:
+        model_path (str): Path to the model file.
+
+    Returns:
+        dict: Metadata, or an empty dict if the model has none.
+    """
+    metadata_path = get_metadata_path(model_path)
+    if not os.path.exists(metadata_path):
+        return {}
+    with open(metadata_path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+def get_schema_path(model_path):
+    """
+    Return the path of the dtype schema sidecar stored next to a model file.
+
+    Args:
+        model_path (str): Path to the model file.
+
+    Returns:
+        str: Path to the ``<model>.schema.json`` file.
+    """
+    return os.path.splitext(model_path)[0] + ".schema.json"
+
+def get_holdout_path(model_path):
+    """
+    Return the path of the held-out sample (rows the model was not trained on) stored next to a model file.
+
+    Args:
+        model_path (str): Path to the model file.
+
+    Returns:
+        str: Path to the ``<model>.holdout.parquet`` file.
+    """
+    return os.path.splitext(model_path)[0] + HOLDOUT_SUFFIX
+
+def get_flat_model_path(model_path):
+    """
+    Return the path of the flattened forest (see ``ml.common.flat_forest``) stored next to a model file.
+
+    The extension is not ``.joblib`` so the model catalog does not list it as a separate model.
+
+    Args:
+        model_path (str): Path to the model file.
+
+    Returns:
+        str: Path to the ``<model>.flat.pkl`` file.
+    """
+    return os.path.splitext(model_path)[0] + ".flat.pkl"
+
+def save_model_schema(schema, model_path):
+    """
+    Save the compact dtype schema of the training data next to the model file.
+
+    Args:
+        schema (dict): ``{column: dtype name}`` (see ``ml.common.dtype_optimization``).
+        model_path (str): Path to the model file the schema belongs to.
+    """
+    try:
+        schema_path = get_schema_path(model_path)
+        tmp_path = schema_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(schema, file, ensure_ascii=False)
+        os.replace(tmp_path, schema_path)
+    except Exception as e:
+        print(f"An error occurred while saving the dtype schema: {e}")
+        raise
+
+def load_model_schema(model_path):
+    """
+    Load the dtype schema stored next to a model file.
+
+    Args:
+        model_path (str): Path to the model file.
+
+    Returns:
+        dict: Schema, or an empty dict if the model has none.
+    """
+    schema_path = get_schema_path(model_path)
+    if not os.path.exists(schema_path):
+        return {}
+    with open(schema_path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+# 확장자/Content-Type으로 데이터 형식 판별
+DATA_FORMAT_EXTENSIONS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+DATA_FORMAT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+    "application/vnd.apache.arrow.file": "arrow",
+    "application/vnd.apache.arrow.stream": "arrow",
+}
+
+def detect_data_format(filename=None, content_type=None):
+    """
+    Detect the data format of a file from its extension, falling back to its content type.
+    
+    Args:
+        filename (str): File name or path.
+        content_type (str): MIME type sent by the client.
+
+    Returns:
+        str: 'csv', 'parquet' or 'arrow'. Defaults to 'csv' when nothing matches.
+    """
+    if filename:
+        data_format = DATA_FORMAT_EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+        if data_format:
+            return data_format
+    if content_type:
+        data_format = DATA_FORMAT_CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+        if data_format:
+            return data_format
+    return "csv"
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError as e:
+        raise ImportError("Parquet/Arrow support requires the 'pyarrow' package (pip install pyarrow)") from e
+
+def _open_arrow_reader(source):
+    pa = _import_pyarrow()
+    # Arrow IPC는 파일(랜덤 액세스) 형식과 스트림 형식이 있으므로 둘 다 시도
+    try:
+        return pa.ipc.open_file(source)
+    except pa.ArrowInvalid:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return pa.ipc.open_stream(source)
+
+def _iter_arrow_batches(reader):
+    if hasattr(reader, "num_record_batches"):
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+    else:
+        yield from reader
+
+def load_dataset(source, data_format=None, columns=None):
+    """
+    Load a CSV, Parquet or Arrow IPC dataset into a DataFrame.
+    Parquet and Arrow are read with their stored column types, without any text parsing.
+    
+    Args:
+        source (str or file-like): Path or binary file object.
+        data_format (str): 'csv', 'parquet' or 'arrow'. Detected from the path when None.
+        columns (list): Columns to read (all columns when None).
+
+    Returns:
+        pd.DataFrame: Loaded data.
+    """
+    import pandas as pd
+
+    if data_format is None:
+        data_format = detect_data_format(source if isinstance(source, str) else None)
+
+    if data_format == "csv":
+        return pd.read_csv(source, memory_map=isinstance(source, str), usecols=columns)
+    if data_format == "parquet":
+        _import_pyarrow()
+        return pd.read_parquet(source, engine="pyarrow", columns=columns)
+    if data_format == "arrow":
+        reader = _open_arrow_reader(source)
+        table = reader.read_all()
+        return (table.select(columns) if columns is not None else table).to_pandas()
+    raise ValueError(f"Unsupported data format: {data_format}")
+
+def iter_dataset_chunks(source, data_format=None, chunk_size=10000):
+    """
+    Iterate over a CSV, Parquet or Arrow IPC dataset in DataFrame chunks of at most chunk_size rows.
+    
+    Args:
+        source (str or file-like): Path or binary file object.
+        data_format (str): 'csv', 'parquet' or 'arrow'. Detected from the path when None.
+        chunk_size (int): Maximum number of rows per chunk.
+
+    Yields:
+        pd.DataFrame: Consecutive chunks with a continuous row index.
+    """
+    import pandas as pd
+
+    if data_format is None:
+        data_format = detect_data_format(source if isinstance(source, str) else None)
+
+    if data_format == "csv":
+        with pd.read_csv(source, chunksize=chunk_size) as reader:
+            yield from reader
+        return
+
+    if data_format == "parquet":
+        pa = _import_pyarrow()
+        batches = pa.parquet.ParquetFile(source).iter_batches(batch_size=chunk_size)
+    elif data_format == "arrow":
+        batches = _iter_arrow_batches(_open_arrow_reader(source))
+    else:
+        raise ValueError(f"Unsupported data format: {data_format}")
+
+    offset = 0
+    for batch in batches:
+        for start in range(0, batch.num_rows, chunk_size):
+            chunk = batch.slice(start, chunk_size).to_pandas()
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+
+def save_data_to_parquet(data, file_path):
+    """
+    Save data to a Parquet file, writing to a temporary file first so readers never see a partial file.
+    
+    Args:
+        data (pd.DataFrame): Data to save.
+        file_path (str): Path to save the Parquet file.
+    """
+    _import_pyarrow()
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    try:
+        data.to_parquet(tmp_path, engine="pyarrow", index=False)
+        os.replace(tmp_path, file_path)
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        print(f"An error occurred while saving data to Parquet: {e}")
+        raise
+
+def write_dataset_chunks(chunks, file_path, data_format=None):
+    """
+    Write DataFrame chunks to one CSV or Parquet file without holding them all in memory.
+    The file is written under a temporary name and renamed when complete.
+
+    Chunks may also be ``pyarrow.Table`` objects (e.g. converted in worker
+    processes); tables are written with Arrow's own CSV/Parquet writers.
+    
+    Args:
+        chunks (iterable of pd.DataFrame or pyarrow.Table): Chunks with the same columns.
+        file_path (str): Path of the output file.
+        data_format (str): 'csv' or 'parquet'. Detected from the path when None.
+
+    Returns:
+        int: Number of rows written.
+    """
+    if data_format is None:
+        data_format = detect_data_format(file_path)
+    if data_format not in ("csv", "parquet"):
+        raise ValueError(f"Unsupported output format: {data_format}")
+
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    rows = 0
+    writer = None
+    try:
+        if data_format == "csv":
+            with open(tmp_path, "wb") as file:
+                for chunk in chunks:
+                    if hasattr(chunk, "to_csv"):
+                        chunk.to_csv(file, index=False, header=rows == 0, encoding="utf-8")
+                    else:
+                        import pyarrow.csv
+                        pyarrow.csv.write_csv(chunk, file, pyarrow.csv.WriteOptions(include_header=rows == 0,
+                                                                                     quoting_style="needed"))
+                    rows += len(chunk)
+        else:
+            pa = _import_pyarrow()
+            for chunk in chunks:
+                table = chunk if isinstance(chunk, pa.Table) else None
+                if writer is None:
+                    if table is None:
+                        table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    writer = pa.parquet.ParquetWriter(tmp_path, table.schema)
+                elif table is None:
+                    # 첫 청크의 스키마에 맞춰 변환 (청크마다 추론된 타입이 달라도 한 파일로 저장)
+                    table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+                else:
+                    table = table.cast(writer.schema)
+                writer.write_table(table)
+                rows += len(chunk)
+            if writer is None:
+                raise ValueError("No data to write")
+            writer.close()
+            writer = None
+        os.replace(tmp_path, file_path)
+        return rows
+    except Exception as e:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        print(f"An error occurred while writing data chunks: {e}")
+        raise
+
 def save_data_to_csv(data, file_path):
     """
     Save processed data to a CSV file.
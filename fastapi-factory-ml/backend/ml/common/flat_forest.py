@@ -0,0 +1,196 @@
+# Absolute path: C:\_YHJ\fast\backend\ml\common\flat_forest.py
+
+import os
+
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+
+from ml.common.file_operations import get_flat_model_path, save_model
+
+# 한 번에 순회할 최대 행 수 (행 x 트리 크기의 노드 번호 배열이 너무 커지지 않도록 나눠서 처리)
+PREDICT_CHUNK_ROWS = 20000
+
+class FlatForest(ClassifierMixin, BaseEstimator):
+    """
+    Random forest whose trees are flattened into a handful of contiguous NumPy arrays.
+
+    Every tree's nodes are concatenated into shared ``left``/``right``/``feature``/
+    ``threshold`` arrays (child indices point into the combined arrays) and each
+    leaf stores the normalized class distribution. Prediction walks all trees for
+    all rows at once, one tree level per step, and only keeps the (tree, row)
+    pairs that have not reached a leaf yet.
+
+    The result is the same as ``predict_proba`` of the source forest, but the
+    pickle is a few flat arrays instead of hundreds of tree objects, so it loads
+    faster and can be memory-mapped with ``joblib.load(mmap_mode='r')``. Each step
+    is a handful of NumPy gathers, so small batches skip the per-tree overhead of
+    the forest, while large batches are still faster with the compiled sklearn trees
+    (see ``benchmarks/serialization_benchmark.py``).
+    """
+
+    def __sklearn_is_fitted__(self):
+        return hasattr(self, "roots_")
+
+    @classmethod
+    def from_forest(cls, forest):
+        """
+        Flatten a fitted forest classifier (RandomForestClassifier, ExtraTreesClassifier).
+
+        Args:
+            forest: Fitted forest with single-output ``DecisionTreeClassifier`` estimators.
+
+        Returns:
+            FlatForest: Flattened copy of the forest.
+        """
+        if not is_flattenable(forest):
+            raise ValueError(f"Cannot flatten {type(forest).__name__}, expected a fitted single-output forest classifier")
+
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        node_counts = np.array([tree.node_count for tree in trees], dtype=np.int64)
+        # 노드 번호는 전체 노드 수에 맞는 가장 작은 정수 타입으로 저장 (파일 크기와 로드 시간 감소)
+        index_dtype = np.min_scalar_type(-int(node_counts.sum()))
+        roots = np.concatenate(([0], np.cumsum(node_counts)[:-1])).astype(index_dtype)
+
+        def children(tree, attribute, offset):
+            # 잎 노드(-1)는 그대로 두고, 자식 번호는 합친 배열 기준으로 이동
+            child = getattr(tree, attribute).astype(np.int64)
+            return np.where(child >= 0, child + offset, -1).astype(index_dtype)
+
+        flat = cls()
+        flat.roots_ = roots
+        flat.left_ = np.concatenate([children(tree, "children_left", root) for tree, root in zip(trees, roots)])
+        flat.right_ = np.concatenate([children(tree, "children_right", root) for tree, root in zip(trees, roots)])
+        # 잎 노드의 특성 번호(-2)는 인덱싱할 수 있도록 0으로 바꿈 (잎에서는 사용하지 않음)
+        feature_dtype = np.min_scalar_type(max(forest.n_features_in_ - 1, 0))
+        flat.feature_ = np.concatenate([np.maximum(tree.feature, 0) for tree in trees]).astype(feature_dtype)
+        flat.threshold_ = np.concatenate([tree.threshold for tree in trees])
+        flat.missing_go_to_left_ = np.concatenate([
+            np.asarray(getattr(tree, "missing_go_to_left", np.zeros(tree.node_count)), dtype=bool) for tree in trees
+        ])
+        # 노드별 클래스 분포를 트리의 predict_proba와 같은 방식으로 정규화
+        values = np.concatenate([tree.value[:, 0, :] for tree in trees])
+        normalizer = values.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        flat.value_ = values / normalizer
+
+        flat.classes_ = forest.classes_
+        flat.n_classes_ = len(forest.classes_)
+        flat.n_features_in_ = forest.n_features_in_
+        if hasattr(forest, "feature_names_in_"):
+            flat.feature_names_in_ = forest.feature_names_in_
+        flat.feature_importances_ = forest.feature_importances_
+        return flat
+
+    @property
+    def n_estimators(self):
+        return len(self.roots_)
+
+    def apply(self, X):
+        """
+        Return the leaf index (into the flattened arrays) reached by every row in every tree.
+
+        Args:
+            X: Array-like of shape (n_samples, n_features).
+
+        Returns:
+            np.ndarray: Leaf indices of shape (n_samples, n_estimators).
+        """
+        # 트리와 같은 float32로 비교 (기준값은 float64이므로 비교할 때 정확히 같은 값으로 올림)
+        X = np.asarray(X, dtype=np.float32)
+        n_trees = len(self.roots_)
+        # (트리, 행) 순서로 나열 - 같은 트리의 노드를 연속해서 읽으므로 캐시 적중률이 높음
+        nodes = np.repeat(self.roots_, len(X))
+        rows = np.tile(np.arange(len(X)), n_trees)
+        active = np.flatnonzero(self.left_[nodes] >= 0)
+        while active.size:
+            node = nodes[active]
+            value = X[rows[active], self.feature_[node]]
+            go_left = np.where(np.isnan(value), self.missing_go_to_left_[node], value <= self.threshold_[node])
+            node = np.where(go_left, self.left_[node], self.right_[node])
+            nodes[active] = node
+            # 잎에 도달한 (트리, 행) 쌍은 다음 단계에서 제외
+            active = active[self.left_[node] >= 0]
+        return nodes.reshape(n_trees, len(X)).T
+
+    def predict_proba(self, X):
+        """
+        Predict class probabilities as the mean of the trees' leaf distributions.
+
+        Args:
+            X: Array-like of shape (n_samples, n_features).
+
+        Returns:
+            np.ndarray: Probabilities of shape (n_samples, n_classes).
+        """
+        X = np.asarray(X, dtype=np.float32)
+        proba = np.zeros((len(X), self.n_classes_))
+        for start in range(0, len(X), PREDICT_CHUNK_ROWS):
+            leaves = self.apply(X[start:start + PREDICT_CHUNK_ROWS])
+            chunk = proba[start:start + PREDICT_CHUNK_ROWS]
+            # 포레스트와 같은 순서로 트리별 확률을 더해 부동소수점 결과(와 동점 처리)를 맞춤
+            for tree in range(leaves.shape[1]):
+                chunk += self.value_[leaves[:, tree]]
+        proba /= len(self.roots_)
+        return proba
+
+    def predict(self, X):
+        """
+        Predict the class with the highest mean probability.
+        """
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+def is_flattenable(estimator):
+    """
+    Return True if the estimator is a fitted single-output forest classifier made of decision trees.
+    """
+    estimators = getattr(estimator, "estimators_", None)
+    return (
+        isinstance(estimators, list) and len(estimators) > 0
+        and hasattr(estimator, "classes_") and getattr(estimator, "n_outputs_", 1) == 1
+        and all(hasattr(tree, "tree_") for tree in estimators)
+    )
+
+def flatten_model(model):
+    """
+    Replace the forest in a model (or at the end of a pipeline) with its FlatForest.
+
+    Args:
+        model: Fitted forest classifier or pipeline ending in one.
+
+    Returns:
+        The flattened model, or None if the model has no forest to flatten.
+    """
+    if hasattr(model, "named_steps"):
+        if not is_flattenable(model[-1]):
+            return None
+        from sklearn.pipeline import Pipeline
+
+        # 전처리 단계는 그대로 공유하고 마지막 단계만 교체
+        return Pipeline(model.steps[:-1] + [(model.steps[-1][0], FlatForest.from_forest(model[-1]))])
+    if not is_flattenable(model):
+        return None
+    return FlatForest.from_forest(model)
+
+def export_flat_model(model, model_path, compress=0):
+    """
+    Save the flattened model next to the model file (``<model>.flat.pkl``).
+
+    A stale export is removed when the model cannot be flattened, so the flat file
+    never belongs to a different model than the one next to it.
+
+    Args:
+        model: Fitted model that was saved at ``model_path``.
+        model_path (str): Path to the model file.
+        compress: joblib compression level or ``(method, level)``.
+
+    Returns:
+        str: Path to the flat model, or None if the model cannot be flattened.
+    """
+    flat_path = get_flat_model_path(model_path)
+    flat_model = flatten_model(model)
+    if flat_model is None:
+        if os.path.exists(flat_path):
+            os.remove(flat_path)
+        return None
+    save_model(flat_model, flat_path, compress=compress)
+    return flat_path
@@ -1,30 +1,304 @@
 # Absolute path: C:\_YHJ\fast\backend\ml\common\model_evaluation.py
 
-from sklearn.metrics import accuracy_score, classification_report, f1_score, roc_auc_score
+# 보정 곡선(calibration curve)의 기본 구간 수
+CALIBRATION_BINS = 10
+# 부트스트랩 신뢰구간 계산 시 한 번에 벡터 연산으로 처리하는 재표본 수
+BOOTSTRAP_BATCH_SIZE = 50
 
-def evaluate_model_performance(model, X_test, y_test):
+def _encode_labels(y_true, classes):
+    # 모델 클래스(classes_) 순서의 번호로 변환, 학습 때 없던 라벨은 뒤에 번호를 붙임
+    import numpy as np
+
+    y_true = np.asarray(y_true)
+    labels = np.concatenate([classes, np.setdiff1d(np.unique(y_true), classes)])
+    order = np.argsort(labels, kind="stable")
+    codes = order[np.searchsorted(labels[order], y_true)]
+    return codes, labels
+
+def _confusion_matrices(true_codes, pred_codes, n_labels):
+    # (재표본 수, n) 번호 배열로 재표본별 혼동 행렬 (재표본 수, 라벨 수, 라벨 수)를 한 번의 bincount로 계산
+    import numpy as np
+
+    true_codes = np.atleast_2d(true_codes)
+    pred_codes = np.atleast_2d(pred_codes)
+    n_batches = true_codes.shape[0]
+    offsets = (np.arange(n_batches) * n_labels * n_labels)[:, None]
+    keys = offsets + true_codes * n_labels + pred_codes
+    return np.bincount(keys.ravel(), minlength=n_batches * n_labels * n_labels).reshape(n_batches, n_labels, n_labels)
+
+def _scores_from_confusion(matrices, zero_division=0.0):
+    # 혼동 행렬로 정확도, 클래스별 정밀도/재현율/F1, 지지도(support)를 계산 (0으로 나누는 경우 zero_division)
+    # F1은 sklearn과 같이 2TP / (2TP + FP + FN)으로 계산
+    import numpy as np
+
+    matrices = np.asarray(matrices, dtype=float)
+    true_positive = np.diagonal(matrices, axis1=-2, axis2=-1)
+    support = matrices.sum(axis=-1)
+    predicted = matrices.sum(axis=-2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, true_positive / predicted, zero_division)
+        recall = np.where(support > 0, true_positive / support, zero_division)
+        f1 = np.where(support + predicted > 0, 2 * true_positive / (support + predicted), zero_division)
+    total = support.sum(axis=-1)
+    accuracy = true_positive.sum(axis=-1) / total
+    weighted_f1 = (f1 * support).sum(axis=-1) / total
+    return accuracy, precision, recall, f1, support, weighted_f1
+
+def _average_ranks(values):
+    # 동점은 평균 순위 (1부터 시작)
+    import numpy as np
+
+    order = np.argsort(values, kind="mergesort")
+    sorted_values = values[order]
+    is_start = np.concatenate([[True], sorted_values[1:] != sorted_values[:-1]])
+    group = np.cumsum(is_start) - 1
+    starts = np.flatnonzero(is_start)
+    ends = np.append(starts[1:], len(values))
+    ranks = np.empty(len(values))
+    ranks[order] = ((starts + ends + 1) / 2.0)[group]
+    return ranks
+
+def _binary_auc(positive, scores):
+    # Mann-Whitney U 통계량으로 ROC AUC 계산 (양성/음성이 모두 있어야 함)
+    n_positive = int(positive.sum())
+    n_negative = len(positive) - n_positive
+    if n_positive == 0 or n_negative == 0:
+        return None
+    ranks = _average_ranks(scores)
+    return float((ranks[positive].sum() - n_positive * (n_positive + 1) / 2.0) / (n_positive * n_negative))
+
+def roc_auc(true_codes, proba):
     """
-    Evaluate model performance using various metrics.
-    
+    Compute ROC AUC from class probabilities.
+
+    Binary targets use the probability of the second class. Multi-class targets
+    use one-vs-rest AUCs averaged by class support.
+
     Args:
-        model: Trained model.
+        true_codes (np.ndarray): True labels as column indices of ``proba``
+            (indices beyond the columns are labels the model never saw).
+        proba (np.ndarray): Predicted probabilities, one column per class.
+
+    Returns:
+        float or None: AUC, or None if it is undefined (e.g. a single class in ``true_codes``).
+    """
+    import numpy as np
+
+    n_classes = proba.shape[1]
+    # 모델이 모르는 라벨이 있으면 정의되지 않음
+    if len(true_codes) == 0 or true_codes.max() >= n_classes:
+        return None
+    if n_classes == 2:
+        return _binary_auc(true_codes == 1, proba[:, 1])
+
+    present = np.unique(true_codes)
+    if len(present) < 2:
+        return None
+    aucs, weights = [], []
+    for code in present:
+        positive = true_codes == code
+        auc = _binary_auc(positive, proba[:, code])
+        if auc is None:
+            return None
+        aucs.append(auc)
+        weights.append(positive.sum())
+    return float(np.average(aucs, weights=weights))
+
+def calibration_curves(true_codes, proba, classes, n_bins=CALIBRATION_BINS):
+    """
+    Compute reliability (calibration) curves with uniform probability bins.
+
+    Binary models get one curve for the second class; multi-class models one
+    one-vs-rest curve per class. Empty bins are left out.
+
+    Args:
+        true_codes (np.ndarray): True labels as column indices of ``proba``.
+        proba (np.ndarray): Predicted probabilities, one column per class.
+        classes (list): Class labels of the ``proba`` columns.
+        n_bins (int): Number of bins over [0, 1].
+
+    Returns:
+        dict: ``{class: {"mean_predicted", "fraction_positive", "count"}}`` and the Brier score.
+    """
+    import numpy as np
+
+    n_classes = proba.shape[1]
+    columns = [1] if n_classes == 2 else range(n_classes)
+    # 모든 열의 구간 번호를 한 번에 계산 (경계값은 아래 구간, sklearn.calibration.calibration_curve와 같은 방식)
+    bins = np.searchsorted(np.linspace(0.0, 1.0, n_bins + 1)[1:-1], proba)
+    one_hot = true_codes[:, None] == np.arange(n_classes)[None, :]
+
+    curves = {}
+    for column in columns:
+        count = np.bincount(bins[:, column], minlength=n_bins)
+        predicted_sum = np.bincount(bins[:, column], weights=proba[:, column], minlength=n_bins)
+        positive_sum = np.bincount(bins[:, column], weights=one_hot[:, column], minlength=n_bins)
+        filled = count > 0
+        curves[str(classes[column])] = {
+            "mean_predicted": (predicted_sum[filled] / count[filled]).tolist(),
+            "fraction_positive": (positive_sum[filled] / count[filled]).tolist(),
+            "count": count[filled].tolist(),
+        }
+    brier = float(((proba - one_hot) ** 2).sum(axis=1).mean())
+    return {"n_bins": n_bins, "curves": curves, "brier_score": brier}
+
+def classification_report(matrix, labels, zero_division=0.0):
+    """
+    Build a per-class precision/recall/F1 report from a confusion matrix.
+
+    The layout matches ``sklearn.metrics.classification_report(output_dict=True)``.
+
+    Args:
+        matrix (np.ndarray): Confusion matrix (true labels in rows).
+        labels (list): Labels of the rows and columns.
+        zero_division (float): Score of a class whose precision/recall/F1 divides by zero.
+
+    Returns:
+        dict: Report keyed by label, plus ``accuracy``, ``macro avg`` and ``weighted avg``.
+    """
+    accuracy, precision, recall, f1, support, _ = _scores_from_confusion(matrix, zero_division)
+    total = support.sum()
+    report = {
+        str(label): {"precision": float(p), "recall": float(r), "f1-score": float(f), "support": float(s)}
+        for label, p, r, f, s in zip(labels, precision, recall, f1, support)
+    }
+    report["accuracy"] = float(accuracy)
+    report["macro avg"] = {"precision": float(precision.mean()), "recall": float(recall.mean()),
+                           "f1-score": float(f1.mean()), "support": float(total)}
+    report["weighted avg"] = {"precision": float((precision * support).sum() / total),
+                              "recall": float((recall * support).sum() / total),
+                              "f1-score": float((f1 * support).sum() / total), "support": float(total)}
+    return report
+
+def _bootstrap_batch(true_codes, pred_codes, proba, n_labels, seeds):
+    # 재표본 묶음 하나 - 정확도/F1은 묶음 전체를 한 번에, AUC는 재표본마다 계산
+    import numpy as np
+
+    n = len(true_codes)
+    indices = np.stack([np.random.default_rng(seed).integers(0, n, n) for seed in seeds])
+    accuracy, _, _, _, _, weighted_f1 = _scores_from_confusion(
+        _confusion_matrices(true_codes[indices], pred_codes[indices], n_labels))
+    auc = [roc_auc(true_codes[sample], proba[sample]) for sample in indices]
+    return accuracy, weighted_f1, np.array([np.nan if value is None else value for value in auc])
+
+def bootstrap_confidence_intervals(true_codes, pred_codes, proba, n_labels, n_bootstrap=200, confidence=0.95,
+                                   n_jobs=1, random_state=42):
+    """
+    Estimate percentile bootstrap confidence intervals of accuracy, F1 and AUC.
+
+    Resamples are drawn from seeds derived from ``random_state`` one per
+    resample, so the intervals do not depend on ``n_jobs``. Batches of
+    resamples are evaluated in parallel threads.
+
+    Args:
+        true_codes (np.ndarray): True labels as label indices.
+        pred_codes (np.ndarray): Predicted labels as label indices.
+        proba (np.ndarray): Predicted probabilities.
+        n_labels (int): Number of distinct labels.
+        n_bootstrap (int): Number of resamples.
+        confidence (float): Confidence level of the intervals.
+        n_jobs (int): Parallel threads (-1 for all cores).
+        random_state (int): Seed of the resamples.
+
+    Returns:
+        dict: ``{metric: {"lower", "upper"}}`` plus ``n_bootstrap`` and ``confidence``.
+    """
+    import numpy as np
+    from joblib import Parallel, delayed
+
+    seeds = np.random.SeedSequence(random_state).spawn(n_bootstrap)
+    batches = [seeds[start:start + BOOTSTRAP_BATCH_SIZE] for start in range(0, n_bootstrap, BOOTSTRAP_BATCH_SIZE)]
+    results = Parallel(n_jobs=n_jobs, prefer="threads")(
+        delayed(_bootstrap_batch)(true_codes, pred_codes, proba, n_labels, batch) for batch in batches
+    )
+
+    alpha = (1.0 - confidence) / 2.0
+    intervals = {"n_bootstrap": n_bootstrap, "confidence": confidence}
+    for position, name in enumerate(("accuracy", "f1_score", "auc")):
+        values = np.concatenate([result[position] for result in results])
+        values = values[~np.isnan(values)]
+        intervals[name] = {"lower": float(np.quantile(values, alpha)), "upper": float(np.quantile(values, 1.0 - alpha))} \
+            if len(values) else None
+    return intervals
+
+def evaluate_model(model, X_test, y_test, n_bootstrap=0, confidence=0.95, calibration_bins=CALIBRATION_BINS,
+                   n_jobs=1, random_state=42):
+    """
+    Evaluate a classifier with a single ``predict_proba`` pass.
+
+    Predicted labels are the most probable classes (what ``predict`` returns for
+    forests). Accuracy, F1, AUC (one-vs-rest for multi-class), the
+    confusion matrix, the classification report and calibration curves are all
+    derived from those probabilities with NumPy.
+
+    ``f1_score`` is the support-weighted F1, the training metric used before this
+    module existed. ``f1_binary`` is the F1 of the positive class ``1`` (sklearn's
+    default ``f1_score``) and is None unless the target has exactly the labels of a
+    binary problem including ``1``.
+
+    Args:
+        model: Fitted classifier or inference pipeline with ``predict_proba`` and ``classes_``.
         X_test (pd.DataFrame): Test features.
         y_test (pd.Series): True labels for the test set.
+        n_bootstrap (int): Bootstrap resamples for confidence intervals (0 to skip).
+        confidence (float): Confidence level of the intervals.
+        calibration_bins (int): Bins of the calibration curves.
+        n_jobs (int): Parallel threads for the bootstrap (-1 for all cores).
+        random_state (int): Seed of the bootstrap resamples.
 
     Returns:
-        tuple: accuracy, f1, auc, classification report as a dictionary
+        dict: ``accuracy``, ``f1_score``, ``f1_binary``, ``auc``, ``confusion_matrix``, ``classification_report``,
+        ``calibration``, ``confidence_intervals`` (None when skipped) and ``n_samples``.
     """
+    import numpy as np
+
     try:
-        y_pred = model.predict(X_test)
-        y_pred_proba = model.predict_proba(X_test)[:, 1]
-        
-        accuracy = accuracy_score(y_test, y_pred)
-        f1 = f1_score(y_test, y_pred)
-        auc = roc_auc_score(y_test, y_pred_proba)
-        
-        report = classification_report(y_test, y_pred, output_dict=True, zero_division=1)
-        
-        return accuracy, f1, auc, report
+        proba = np.asarray(model.predict_proba(X_test), dtype=float)
+        classes = np.asarray(model.classes_)
+        true_codes, labels = _encode_labels(y_test, classes)
+        pred_codes = proba.argmax(axis=1)
+
+        matrix = _confusion_matrices(true_codes, pred_codes, len(labels))[0]
+        accuracy, _, _, f1, _, weighted_f1 = _scores_from_confusion(matrix)
+        label_names = labels.tolist()
+        positive = [position for position, label in enumerate(label_names) if label == 1]
+        evaluation = {
+            "accuracy": float(accuracy),
+            "f1_score": float(weighted_f1),
+            "f1_binary": float(f1[positive[0]]) if len(label_names) == 2 and positive else None,
+            "auc": roc_auc(true_codes, proba),
+            "confusion_matrix": {"labels": label_names, "matrix": matrix.tolist()},
+            "classification_report": classification_report(matrix, label_names),
+            "calibration": calibration_curves(true_codes, proba, label_names, calibration_bins),
+            "confidence_intervals": None,
+            "n_samples": int(len(true_codes)),
+        }
+        if n_bootstrap > 0:
+            evaluation["confidence_intervals"] = bootstrap_confidence_intervals(
+                true_codes, pred_codes, proba, len(labels), n_bootstrap, confidence, n_jobs, random_state)
+        return evaluation
     except Exception as e:
         print(f"An error occurred while evaluating the model: {e}")
         raise
+
+def evaluate_model_performance(model, X_test, y_test):
+    """
+    Evaluate model performance using various metrics.
+
+    Args:
+        model: Trained model.
+        X_test (pd.DataFrame): Test features.
+        y_test (pd.Series): True labels for the test set.
+
+    Returns:
+        tuple: accuracy, f1, auc (one-vs-rest for multi-class), classification report as a dictionary.
+        As before, f1 is the binary F1 of class 1 and the report scores divisions by zero as 1;
+        targets that are not binary 0/1 get the support-weighted F1.
+    """
+    import numpy as np
+
+    evaluation = evaluate_model(model, X_test, y_test)
+    f1 = evaluation["f1_binary"] if evaluation["f1_binary"] is not None else evaluation["f1_score"]
+    confusion = evaluation["confusion_matrix"]
+    report = classification_report(np.asarray(confusion["matrix"]), confusion["labels"], zero_division=1.0)
+    return evaluation["accuracy"], f1, evaluation["auc"], report
@@ -0,0 +1,198 @@
+# Absolute path: C:\_YHJ\fast\backend\ml\common\model_state.py
+
+import os
+import json
+import shutil
+import tempfile
+import time
+import uuid
+
+from ml.common.file_operations import _to_json_value, load_dataset, save_data_to_parquet
+from ml.common.training_cache import _link_or_copy
+
+def hash_rows(data):
+    """
+    Compute a 64-bit content hash for every row of a DataFrame.
+
+    Args:
+        data (pd.DataFrame): Rows to hash (the index is ignored).
+
+    Returns:
+        np.ndarray: uint64 hash per row.
+    """
+    import pandas as pd
+
+    return pd.util.hash_pandas_object(data, index=False).to_numpy()
+
+def update_feature_stats(stats, data):
+    """
+    Merge the count/mean/variance/min/max of the numeric columns of ``data`` into ``stats``.
+
+    Uses the parallel (Chan et al.) update so stats can be accumulated batch by batch
+    without keeping earlier rows in memory.
+
+    Args:
+        stats (dict): Per-column stats from earlier batches (``{}`` for none).
+        data (pd.DataFrame): New rows.
+
+    Returns:
+        dict: Updated per-column stats.
+    """
+    stats = {column: dict(values) for column, values in (stats or {}).items()}
+    numeric = data.select_dtypes("number")
+    counts = numeric.count()
+    means = numeric.mean()
+    m2s = numeric.var(ddof=0) * counts
+    minimums = numeric.min()
+    maximums = numeric.max()
+
+    for column in numeric.columns:
+        count = int(counts[column])
+        if count == 0:
+            continue
+        mean, m2 = float(means[column]), float(m2s[column])
+        previous = stats.get(column)
+        if previous is None or previous["count"] == 0:
+            stats[column] = {"count": count, "mean": mean, "m2": m2,
+                             "min": float(minimums[column]), "max": float(maximums[column])}
+            continue
+        total = previous["count"] + count
+        delta = mean - previous["mean"]
+        stats[column] = {
+            "count": total,
+            "mean": previous["mean"] + delta * count / total,
+            "m2": previous["m2"] + m2 + delta * delta * previous["count"] * count / total,
+            "min": min(previous["min"], float(minimums[column])),
+            "max": max(previous["max"], float(maximums[column])),
+        }
+    return stats
+
+class ModelState:
+    """
+    State kept per trained model so it can later be updated from appended rows only.
+
+    Everything lives in ``<state_dir>/<model_name>/``. The state holds the training
+    rows, so ``state_dir`` should be outside any directory that is served publicly
+    (it defaults to ``<output_dir>/.state`` for local use):
+
+    - ``model.joblib``: the model the state belongs to (hard link to the published model)
+    - ``train.parquet`` / ``holdout.parquet``: rows the model was trained / evaluated on
+    - ``row_hashes.npy``: content hash of every row seen, used to find the new rows of an upload
+    - ``state.json``: target column, feature names, numeric feature stats and the current version
+
+    Versions are recorded in ``<output_dir>/<model_name>.lineage.json``, each one
+    pointing to the version it was derived from.
+    """
+
+    STATE_FILE = "state.json"
+    MODEL_FILE = "model.joblib"
+    TRAIN_FILE = "train.parquet"
+    HOLDOUT_FILE = "holdout.parquet"
+    HASHES_FILE = "row_hashes.npy"
+
+    def __init__(self, output_dir, model_name="model", state_dir=None):
+        self.output_dir = output_dir
+        self.model_name = model_name
+        self.state_dir = os.path.join(state_dir or os.path.join(output_dir, ".state"), model_name)
+        self.lineage_path = os.path.join(output_dir, f"{model_name}.lineage.json")
+
+    def exists(self):
+        """
+        Return True if a complete state has been saved for this model.
+        """
+        return all(os.path.exists(os.path.join(self.state_dir, name))
+                   for name in (self.STATE_FILE, self.MODEL_FILE, self.TRAIN_FILE, self.HASHES_FILE))
+
+    def load(self):
+        """
+        Load the saved state.
+
+        Returns:
+            dict: ``info`` (state.json), ``model``, ``train``, ``holdout`` (or None) and ``row_hashes``.
+        """
+        import joblib
+        import numpy as np
+
+        with open(os.path.join(self.state_dir, self.STATE_FILE), "r", encoding="utf-8") as file:
+            info = json.load(file)
+        holdout_path = os.path.join(self.state_dir, self.HOLDOUT_FILE)
+        return {
+            "info": info,
+            "model": joblib.load(os.path.join(self.state_dir, self.MODEL_FILE)),
+            "train": load_dataset(os.path.join(self.state_dir, self.TRAIN_FILE), "parquet"),
+            "holdout": load_dataset(holdout_path, "parquet") if os.path.exists(holdout_path) else None,
+            "row_hashes": np.load(os.path.join(self.state_dir, self.HASHES_FILE)),
+        }
+
+    def save(self, model_path, train, holdout, row_hashes, info):
+        """
+        Replace the saved state.
+
+        The new state is written to a temporary directory and swapped in, so a
+        failed save leaves the previous state usable.
+
+        Args:
+            model_path (str): Published model file the state belongs to.
+            train (pd.DataFrame): All rows the model was trained on.
+            holdout (pd.DataFrame | None): All rows held out for evaluation.
+            row_hashes (np.ndarray): Hashes of every row seen so far.
+            info (dict): JSON-serializable state (target column, feature names, stats, version).
+        """
+        import numpy as np
+
+        parent_dir = os.path.dirname(self.state_dir)
+        os.makedirs(parent_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=f".tmp-{self.model_name}-", dir=parent_dir)
+        try:
+            _link_or_copy(model_path, os.path.join(tmp_dir, self.MODEL_FILE))
+            save_data_to_parquet(train, os.path.join(tmp_dir, self.TRAIN_FILE))
+            if holdout is not None and len(holdout):
+                save_data_to_parquet(holdout, os.path.join(tmp_dir, self.HOLDOUT_FILE))
+            np.save(os.path.join(tmp_dir, self.HASHES_FILE), row_hashes)
+            with open(os.path.join(tmp_dir, self.STATE_FILE), "w", encoding="utf-8") as file:
+                json.dump(info, file, ensure_ascii=False, default=_to_json_value)
+
+            old_dir = None
+            if os.path.exists(self.state_dir):
+                old_dir = tempfile.mkdtemp(prefix=f".old-{self.model_name}-", dir=parent_dir)
+                os.replace(self.state_dir, os.path.join(old_dir, "state"))
+            os.replace(tmp_dir, self.state_dir)
+            if old_dir is not None:
+                shutil.rmtree(old_dir, ignore_errors=True)
+        except Exception as e:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            print(f"An error occurred while saving the model state: {e}")
+            raise
+
+    def load_lineage(self):
+        """
+        Return the list of recorded versions, oldest first.
+        """
+        if not os.path.exists(self.lineage_path):
+            return []
+        with open(self.lineage_path, "r", encoding="utf-8") as file:
+            return json.load(file).get("versions", [])
+
+    def record_version(self, parent_version, version=None, **details):
+        """
+        Append a new version to the lineage file.
+
+        Args:
+            parent_version (str | None): Version the new model was derived from.
+            version (str, optional): Id of the new version (e.g. the model store's content hash);
+                a random id is generated when omitted.
+            **details: JSON-serializable fields describing the version (mode, rows, metrics, ...).
+
+        Returns:
+            str: The new version id.
+        """
+        version = version or uuid.uuid4().hex[:12]
+        versions = self.load_lineage()
+        versions.append(dict(details, version=version, parent=parent_version, created_at=time.time()))
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = f"{self.lineage_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"model": self.model_name, "versions": versions}, file, ensure_ascii=False, default=_to_json_value)
+        os.replace(tmp_path, self.lineage_path)
+        return version
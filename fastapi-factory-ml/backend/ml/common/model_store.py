@@ -0,0 +1,337 @@
+# Absolute path: C:\_YHJ\fast\backend\ml\common\model_store.py
+
+import os
+import json
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+from ml.common.file_operations import load_model_metadata, load_model_schema, _to_json_value
+from ml.common.training_cache import SIDECAR_PATHS, hash_file, _link_or_copy
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_FORMAT_VERSION = 1
+MODEL_FILE = "model.joblib"
+VERSIONS_DIR = "versions"
+# 버전 id로 사용할 모델 파일 sha256 앞자리 수
+VERSION_LENGTH = 16
+# 모델 이름별로 남길 최근 버전 수 (current 버전은 항상 보관, 0이면 모두 보관)
+DEFAULT_KEEP_VERSIONS = 10
+# 매니페스트 잠금을 기다리는 최대 시간 / 비정상 종료로 남은 잠금 파일을 무시하는 시간 (초)
+LOCK_TIMEOUT_SECONDS = 30.0
+LOCK_STALE_SECONDS = 300.0
+
+class StagedVersion:
+    """
+    A model version being written in a temporary directory (see ``ModelStore.stage``).
+
+    Write the model and its sidecars to ``model_path``; once the model file is
+    complete, ``content_version()`` returns the version it will be published as.
+    After the ``with`` block, ``published_path`` is the model path in the store.
+    """
+
+    def __init__(self, staging_dir):
+        self.staging_dir = staging_dir
+        self.model_path = os.path.join(staging_dir, MODEL_FILE)
+        self.published_path = None
+        self._version = None
+
+    def content_version(self):
+        """
+        Return the version id (sha256 prefix of the model file). The model file must not change afterwards.
+        """
+        if self._version is None:
+            self._version = hash_file(self.model_path)[:VERSION_LENGTH]
+        return self._version
+
+class ModelStore:
+    """
+    Versioned store of trained models.
+
+    Every model name has its own directory under ``root``:
+
+    - ``<name>/versions/<version>/model.joblib``: one directory per version, holding the
+      model and its sidecars (metadata, dtype schema, held-out sample, flattened forest, ...).
+      The version id is a prefix of the sha256 of the model file, so the same model
+      always gets the same path and a published version is never modified.
+    - ``<name>/manifest.json``: every kept version with its metrics, feature names and
+      dtype schema, and the ``current`` alias used when a model is requested by name.
+
+    A new version is written to a temporary directory and renamed into ``versions/``
+    in one step, so readers never see a half-written model and concurrent trainings
+    never overwrite each other. The manifest is rewritten atomically while holding
+    a lock file, so versions published at the same time by different processes are
+    all recorded.
+    """
+
+    def __init__(self, root, keep_versions=DEFAULT_KEEP_VERSIONS):
+        self.root = root
+        self.keep_versions = keep_versions
+        self._manifests = {}
+
+    def model_dir(self, name):
+        return os.path.join(self.root, name)
+
+    def manifest_path(self, name):
+        return os.path.join(self.model_dir(name), MANIFEST_FILE)
+
+    def model_path(self, name, version):
+        return os.path.join(self.model_dir(name), VERSIONS_DIR, version, MODEL_FILE)
+
+    def parse_model_path(self, model_path):
+        """
+        Return ``(name, version)`` for a model file inside the store, or None for any other path.
+        """
+        parts = os.path.relpath(os.path.abspath(model_path), os.path.abspath(self.root)).split(os.sep)
+        if len(parts) != 4 or parts[1] != VERSIONS_DIR or parts[3] != MODEL_FILE or parts[0].startswith("."):
+            return None
+        return parts[0], parts[2]
+
+    @contextmanager
+    def stage(self, name, make_current=True):
+        """
+        Write a new version of ``name`` and publish it when the block exits without an error.
+
+        Example::
+
+            with store.stage("model") as staged:
+                save_model(model, staged.model_path)
+                version = staged.content_version()
+            model_path = staged.published_path
+
+        Args:
+            name (str): Model name.
+            make_current (bool): Point the ``current`` alias to the new version.
+
+        Yields:
+            StagedVersion: Paths to write the version to.
+        """
+        _validate_name(name)
+        os.makedirs(self.model_dir(name), exist_ok=True)
+        staged = StagedVersion(tempfile.mkdtemp(prefix=".tmp-", dir=self.model_dir(name)))
+        try:
+            yield staged
+            staged.published_path = self._commit(name, staged, make_current)
+        finally:
+            if os.path.exists(staged.staging_dir):
+                shutil.rmtree(staged.staging_dir, ignore_errors=True)
+
+    def _commit(self, name, staged, make_current):
+        version = staged.content_version()
+        version_dir = os.path.dirname(self.model_path(name, version))
+        os.makedirs(os.path.dirname(version_dir), exist_ok=True)
+        try:
+            os.rename(staged.staging_dir, version_dir)
+        except OSError:
+            # 같은 내용의 모델이 이미 있으면 기존 버전을 그대로 사용
+            if not os.path.exists(self.model_path(name, version)):
+                raise
+        self.register(name, version, make_current)
+        return self.model_path(name, version)
+
+    def register(self, name, version, make_current=True):
+        """
+        Record an existing version directory in the manifest (and optionally make it current).
+
+        Versions beyond ``keep_versions`` (oldest first, never the current one) are
+        removed from the manifest and from disk.
+
+        Returns:
+            dict: The manifest entry of the version.
+        """
+        entry = self._version_entry(name, version)
+        removed = []
+        with self._locked(name):
+            manifest = self._load_manifest(name) or {"format": MANIFEST_FORMAT_VERSION, "name": name,
+                                                    "current": None, "versions": []}
+            versions = [item for item in manifest["versions"] if item["version"] != version] + [entry]
+            current = version if make_current or manifest["current"] is None else manifest["current"]
+            if self.keep_versions:
+                while len(versions) > self.keep_versions:
+                    oldest = next(item for item in versions if item["version"] != current)
+                    versions.remove(oldest)
+                    removed.append(oldest["version"])
+            self._write_manifest(name, dict(manifest, current=current, versions=versions, updated_at=time.time()))
+
+        for old_version in removed:
+            shutil.rmtree(os.path.dirname(self.model_path(name, old_version)), ignore_errors=True)
+        return entry
+
+    def set_current(self, name, version):
+        """
+        Point the ``current`` alias of ``name`` to a version in its manifest (e.g. to roll back).
+
+        Raises:
+            KeyError: If the model or the version is not in the store.
+        """
+        _validate_name(name)
+        if not os.path.exists(self.manifest_path(name)):
+            raise KeyError(f"Model '{name}' not found")
+        with self._locked(name):
+            manifest = self._load_manifest(name)
+            if manifest is None or not any(item["version"] == version for item in manifest["versions"]):
+                raise KeyError(f"Model '{name}' has no version '{version}'")
+            manifest = dict(manifest, current=version, updated_at=time.time())
+            self._write_manifest(name, manifest)
+        return manifest
+
+    def read_manifest(self, name):
+        """
+        Return the manifest of ``name``, or None if the model is not in the store.
+
+        Parsed manifests are cached until the file changes on disk.
+        """
+        path = self.manifest_path(name)
+        try:
+            stat = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            self._manifests.pop(name, None)
+            return None
+        cached = self._manifests.get(name)
+        if cached is not None and cached[0] == (stat.st_mtime_ns, stat.st_size):
+            return cached[1]
+        manifest = self._load_manifest(name)
+        self._manifests[name] = ((stat.st_mtime_ns, stat.st_size), manifest)
+        return manifest
+
+    def _load_manifest(self, name):
+        # 잠금 안에서는 캐시 대신 항상 파일을 읽음 (다른 프로세스가 같은 mtime/크기로 바꿨을 수 있음)
+        try:
+            with open(self.manifest_path(name), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def list_models(self):
+        """
+        Return the names of all models that have a manifest.
+        """
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(entry.name for entry in os.scandir(self.root)
+                      if entry.is_dir() and not entry.name.startswith(".")
+                      and os.path.exists(os.path.join(entry.path, MANIFEST_FILE)))
+
+    def resolve(self, model_name):
+        """
+        Return the model file of ``"name"`` (its current version) or ``"name@version"``.
+
+        A trailing ``.joblib`` (model names used to be file names) is ignored. A model
+        file path inside the store (the ``path`` of the model list) is accepted as well.
+
+        Returns:
+            str: Path to the model file, or None if the model or version is not in the store.
+        """
+        # 모델 목록의 path를 그대로 보내는 클라이언트(프론트엔드 모델 페이지)는 경로에서 이름과 버전을 꺼냄
+        name, version = self.parse_model_path(model_name) or parse_model_name(model_name)
+        if not name:
+            return None
+        manifest = self.read_manifest(name)
+        if manifest is None:
+            return None
+        version = version or manifest["current"]
+        if not any(item["version"] == version for item in manifest["versions"]):
+            return None
+        return self.model_path(name, version)
+
+    def import_model(self, name, model_path):
+        """
+        Add an existing model file (with the sidecars next to it) to the store as the current version of ``name``.
+        Files are hard-linked when possible, the original files are left in place.
+
+        Returns:
+            str: Path to the model file in the store.
+        """
+        with self.stage(name) as staged:
+            _link_or_copy(model_path, staged.model_path)
+            for sidecar in SIDECAR_PATHS:
+                if os.path.exists(sidecar(model_path)):
+                    _link_or_copy(sidecar(model_path), sidecar(staged.model_path))
+        return staged.published_path
+
+    def migrate_legacy_models(self):
+        """
+        Import ``<root>/<name>.joblib`` files written before the store existed, unless ``name`` is already in the store.
+
+        Returns:
+            list: Names of the imported models.
+        """
+        if not os.path.isdir(self.root):
+            return []
+        imported = []
+        for entry in os.scandir(self.root):
+            name = entry.name[:-len(".joblib")]
+            if not entry.is_file() or not entry.name.endswith(".joblib") or not name or name.startswith("."):
+                continue
+            if self.read_manifest(name) is None:
+                self.import_model(name, entry.path)
+                imported.append(name)
+        return imported
+
+    def _version_entry(self, name, version):
+        model_path = self.model_path(name, version)
+        metadata = load_model_metadata(model_path)
+        return {
+            "version": version,
+            "path": os.path.relpath(model_path, self.model_dir(name)).replace(os.sep, "/"),
+            "size": os.path.getsize(model_path),
+            "created_at": metadata.get("created_at", os.path.getmtime(model_path)),
+            "parent_version": metadata.get("parent_version"),
+            "source_file": metadata.get("source_file"),
+            "target_column": metadata.get("target_column"),
+            "feature_names": metadata.get("feature_names"),
+            "n_rows": metadata.get("n_rows"),
+            "metrics": metadata.get("metrics"),
+            "schema": load_model_schema(model_path),
+        }
+
+    def _write_manifest(self, name, manifest):
+        path = self.manifest_path(name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(manifest, file, ensure_ascii=False, default=_to_json_value)
+        os.replace(tmp_path, path)
+
+    @contextmanager
+    def _locked(self, name):
+        # 여러 프로세스(학습 워커, API 서버)가 같은 매니페스트를 고칠 수 있으므로 잠금 파일을 O_EXCL로 만들어 순서대로 갱신
+        lock_path = os.path.join(self.model_dir(name), ".lock")
+        deadline = time.monotonic() + LOCK_TIMEOUT_SECONDS
+        while True:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS:
+                        os.remove(lock_path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Timed out waiting for the manifest lock of model '{name}'")
+                time.sleep(0.01)
+        try:
+            yield
+        finally:
+            os.close(fd)
+            os.remove(lock_path)
+
+def parse_model_name(model_name):
+    """
+    Split ``"name"`` or ``"name@version"`` into ``(name, version)``; version is None when not given.
+
+    A trailing ``.joblib`` (model names used to be file names) is ignored. The name
+    is None if it cannot be a model name in the store (empty, hidden or a path).
+    """
+    name, _, version = model_name.partition("@")
+    if name.endswith(".joblib"):
+        name = name[:-len(".joblib")]
+    if not name or name.startswith(".") or os.sep in name or "/" in name:
+        name = None
+    return name, version or None
+
+def _validate_name(name):
+    if not name or name.startswith(".") or "@" in name or "/" in name or os.sep in name:
+        raise ValueError(f"Invalid model name '{name}'")
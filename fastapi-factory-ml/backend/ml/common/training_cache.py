@@ -0,0 +1,162 @@
+# Absolute path: C:\_YHJ\fast\backend\ml\common\training_cache.py
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+
+from ml.common.file_operations import (get_metadata_path, get_schema_path, get_holdout_path, get_flat_model_path,
+                                       _to_json_value)
+
+# 모델 파일과 함께 캐시/복원하는 옆 파일 (메타데이터, 압축 dtype 스키마, 특성 기여도 계산용 평가 표본, 평탄화 모델)
+SIDECAR_PATHS = (get_metadata_path, get_schema_path, get_holdout_path, get_flat_model_path)
+
+def hash_file(file_path, chunk_size=1024 * 1024):
+    """
+    Compute the sha256 of a file without loading it into memory.
+    
+    Args:
+        file_path (str): Path to the file.
+        chunk_size (int): Number of bytes read per iteration.
+
+    Returns:
+        str: Hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def make_cache_key(dataset_hash, target_column, params):
+    """
+    Build a training cache key from the dataset content, target column and hyperparameters.
+    
+    Args:
+        dataset_hash (str): sha256 of the training data file.
+        target_column (str): Target column name.
+        params (dict): JSON-serializable model/split hyperparameters.
+
+    Returns:
+        str: Hex digest identifying the training run.
+    """
+    payload = json.dumps({"dataset": dataset_hash, "target": target_column, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _link_or_copy(src, dst):
+    # 하드 링크는 복사 없이 즉시 끝나므로 우선 사용, 지원하지 않는 파일 시스템이면 복사
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+class TrainingCache:
+    """
+    Content-addressed cache of training results.
+
+    Each entry is a directory ``<cache_dir>/<key>/`` holding the result metrics
+    (``result.json``) and the trained model with its metadata, schema and held-out sample sidecars. Entries
+    are evicted least-recently-used first once their total size exceeds
+    ``max_bytes``.
+    """
+
+    RESULT_FILE = "result.json"
+    MODEL_FILE = "model.joblib"
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def get(self, key):
+        """
+        Return the cached training result for a key, or None on a miss.
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+        result_path = os.path.join(entry_dir, self.RESULT_FILE)
+        try:
+            with open(result_path, "r", encoding="utf-8") as file:
+                result = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(os.path.join(entry_dir, self.MODEL_FILE)):
+            return None
+
+        # LRU 제거 순서를 위해 마지막 사용 시각 갱신
+        os.utime(result_path)
+        return result
+
+    def restore(self, key, result):
+        """
+        Put the cached model back at ``result['model_path']`` and return the result.
+
+        The file is linked into a temporary name and atomically renamed, so readers
+        never see a partially written model.
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+        model_path = result["model_path"]
+        os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
+
+        # 옆 파일을 먼저 교체 - 모델 레지스트리는 모델 파일이 바뀔 때 스키마/평탄화 모델을 다시 읽음
+        files = [(os.path.basename(sidecar(self.MODEL_FILE)), sidecar(model_path)) for sidecar in SIDECAR_PATHS]
+        files += [(self.MODEL_FILE, model_path)]
+        for cached, target in files:
+            cached_path = os.path.join(entry_dir, cached)
+            if not os.path.exists(cached_path):
+                # 캐시에 없는 옆 파일은 덮어쓴 이전 모델의 것이므로 지움 (예: 평탄화하지 않은 모델의 .flat.pkl)
+                if target != model_path and os.path.exists(target):
+                    os.remove(target)
+                continue
+            if os.path.exists(target) and os.path.samefile(cached_path, target):
+                continue
+            tmp_path = f"{target}.{os.getpid()}.tmp"
+            _link_or_copy(cached_path, tmp_path)
+            os.replace(tmp_path, target)
+
+        return dict(result, cached=True)
+
+    def put(self, key, result, model_path):
+        """
+        Store a training result and its model under a key, then enforce the size limit.
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+        if os.path.exists(entry_dir):
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=self.cache_dir)
+        try:
+            _link_or_copy(model_path, os.path.join(tmp_dir, self.MODEL_FILE))
+            for sidecar in SIDECAR_PATHS:
+                if os.path.exists(sidecar(model_path)):
+                    _link_or_copy(sidecar(model_path), sidecar(os.path.join(tmp_dir, self.MODEL_FILE)))
+            with open(os.path.join(tmp_dir, self.RESULT_FILE), "w", encoding="utf-8") as file:
+                json.dump(result, file, default=_to_json_value)
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # 같은 키를 다른 작업이 먼저 저장한 경우 등 - 캐시는 최선형(best-effort)
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+            try:
+                last_used = os.stat(os.path.join(entry.path, self.RESULT_FILE)).st_mtime
+            except OSError:
+                last_used = 0
+            entries.append((last_used, size, entry.path))
+            total += size
+
+        for last_used, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            print(f"Evicting training cache entry {os.path.basename(path)} ({size} bytes)")
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
@@ -1,97 +1,188 @@
-import csv
-import random
+# 사용법 (backend 디렉토리에서 실행):
+#   python -m ml.data.data_gen --rows 10000000 --format parquet --workers 4 --seed 42
+
+import argparse
 import os
-from datetime import datetime, timedelta
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+
+import numpy as np
+import pandas as pd
 from tqdm import tqdm
 
-def generate_machine_data(num_rows):
-    # 스크립트 파일의 디렉토리 경로 획득
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    
+from ml.common.file_operations import write_dataset_chunks
+
+FIELDNAMES = [
+    'Timestamp', 'Machine_ID', 'Material_Type', 'Cutting_Speed', 'Feed_Rate',
+    'Depth_of_Cut', 'Tool_Usage_Time', 'Vibration', 'Coolant_Temperature',
+    'Power_Consumption', 'Cycle_Time', 'Operator_ID', 'Batch_Number',
+    'Product_ID', 'Tool_ID', 'Spindle_Speed', 'Spindle_Load', 'Feed_Load',
+    'Axis_Position_X', 'Axis_Position_Y', 'Axis_Position_Z', 'Surface_Roughness',
+    'Dimensional_Accuracy', 'Defect_Type', 'Quality_Result'
+]
+
+# 모든 열에서 1% 확률로 빈 값 생성 (결측치 시뮬레이션)
+MISSING_RATE = 0.01
+# 센서 오류/극단적 상황 값이 나올 확률
+ANOMALY_RATE = 0.005
+DEFAULT_CHUNK_SIZE = 100000
+
+def _labels(prefix, count, width):
+    return np.array([f"{prefix}{i:0{width}d}" for i in range(1, count + 1)], dtype=object)
+
+def _uniform(rng, low, high, size, decimals):
+    return np.round(rng.uniform(low, high, size), decimals)
+
+def _with_anomalies(rng, normal, anomaly, size, decimals=1):
+    # ANOMALY_RATE 확률로 anomaly 범위의 값 사용
+    return np.round(np.where(rng.random(size) < ANOMALY_RATE, rng.uniform(*anomaly, size), rng.uniform(*normal, size)),
+                    decimals)
+
+def _timestamps(rng, start_time, size):
+    minutes = rng.integers(0, 1000000, size, endpoint=True).astype("timedelta64[m]")
+    values = np.datetime_as_string(np.datetime64(start_time, "s") + minutes, unit="s")
+    # 'YYYY-MM-DDTHH:MM:SS'의 T를 공백으로 바꿔 strftime("%Y-%m-%d %H:%M:%S")와 같은 형식으로 만듦
+    values.view("<U1").reshape(size, -1)[:, 10] = " "
+    return values.astype(object)
+
+def generate_chunk(num_rows, seed=None, start_time=None):
+    """
+    기계 공정 데이터 num_rows행을 열 단위로 생성합니다 (행마다 반복하지 않고 NumPy 난수로 한 번에 생성).
+
+    Args:
+        num_rows (int): 생성할 행 수
+        seed: np.random.default_rng에 전달할 시드 (정수 또는 SeedSequence)
+        start_time (datetime): Timestamp의 기준 시각 (기본값: 현재 시각)
+
+    Returns:
+        pd.DataFrame: FIELDNAMES 순서의 열, 정수 열은 결측치를 담을 수 있는 Int64 타입
+    """
+    rng = np.random.default_rng(seed)
+    start_time = (start_time or datetime.now()).replace(microsecond=0)
+    n = num_rows
+
+    columns = {
+        'Timestamp': _timestamps(rng, start_time, n),
+        'Machine_ID': _labels('M', 10, 3)[rng.integers(0, 10, n)],
+        'Material_Type': np.array(['Steel', 'Aluminum', 'Titanium', 'Copper'], dtype=object)[rng.integers(0, 4, n)],
+        # 0.5% 확률로 음수 값 생성 (센서 오류 시뮬레이션)
+        'Cutting_Speed': _with_anomalies(rng, (100, 250), (-10, 250), n),
+        'Feed_Rate': _uniform(rng, 0.1, 0.5, n, 2),
+        'Depth_of_Cut': _uniform(rng, 0.5, 3.0, n, 1),
+        'Tool_Usage_Time': rng.integers(60, 300, n, endpoint=True),
+        'Vibration': _uniform(rng, 1.0, 5.0, n, 1),
+        # 0.5% 확률로 비정상적으로 높은 온도 생성 (극단적 상황 시뮬레이션)
+        'Coolant_Temperature': _with_anomalies(rng, (20, 35), (100, 150), n),
+        'Power_Consumption': _uniform(rng, 3, 10, n, 1),
+        'Cycle_Time': rng.integers(200, 600, n, endpoint=True),
+        'Operator_ID': _labels('OP', 20, 3)[rng.integers(0, 20, n)],
+        'Batch_Number': _labels('B', 100, 3)[rng.integers(0, 100, n)],
+        'Product_ID': _labels('P', 1000, 4)[rng.integers(0, 1000, n)],
+        'Tool_ID': _labels('T', 50, 3)[rng.integers(0, 50, n)],
+        'Spindle_Speed': rng.integers(800, 2000, n, endpoint=True),
+        'Spindle_Load': _uniform(rng, 50, 100, n, 1),
+        'Feed_Load': _uniform(rng, 40, 90, n, 1),
+        # 0.5% 확률로 비정상적으로 큰 값 생성 (센서 오류 또는 극단적 상황 시뮬레이션)
+        'Axis_Position_X': _with_anomalies(rng, (0, 500), (1000, 2000), n),
+        'Axis_Position_Y': _with_anomalies(rng, (0, 500), (1000, 2000), n),
+        'Axis_Position_Z': _with_anomalies(rng, (0, 500), (1000, 2000), n),
+        'Surface_Roughness': _uniform(rng, 1.0, 5.0, n, 1),
+        'Dimensional_Accuracy': _uniform(rng, 0.01, 0.1, n, 2),
+        'Defect_Type': np.array(['None', 'Scratch', 'Dent', 'Misalignment'], dtype=object)[rng.integers(0, 4, n)],
+        # 90% 확률로 합격, 10% 확률로 불합격
+        'Quality_Result': (rng.random(n) < 0.9).astype(np.int64),
+    }
+
+    for field in FIELDNAMES:
+        values = columns[field]
+        missing = rng.random(n) < MISSING_RATE
+        if values.dtype.kind == 'i':
+            columns[field] = pd.arrays.IntegerArray(values, missing)
+        elif values.dtype.kind == 'f':
+            values[missing] = np.nan
+        else:
+            values[missing] = None
+
+    return pd.DataFrame(columns, columns=FIELDNAMES)
+
+def _generate_table(num_rows, seed, start_time):
+    # 워커 프로세스에서 Arrow 테이블로 변환까지 마침 (프로세스 간 전달이 빠르고, 메인 프로세스는 Arrow writer로 바로 저장)
+    chunk = generate_chunk(num_rows, seed, start_time)
+    try:
+        import pyarrow
+    except ImportError:
+        return chunk
+    return pyarrow.Table.from_pandas(chunk, preserve_index=False)
+
+def iter_machine_data(num_rows, seed=None, chunk_size=DEFAULT_CHUNK_SIZE, n_workers=1, start_time=None):
+    """
+    num_rows행을 chunk_size행씩 생성해 순서대로 반환합니다 (pyarrow가 있으면 Arrow 테이블, 없으면 DataFrame).
+    청크마다 seed에서 파생한 독립 난수열을 사용하므로, 같은 seed면 n_workers와 관계없이 같은 데이터가 만들어집니다.
+    n_workers가 2 이상이면 프로세스 풀에서 청크를 병렬로 생성합니다 (메모리에는 최대 2 * n_workers개 청크만 유지).
+    """
+    start_time = start_time or datetime.now()
+    sizes = [min(chunk_size, num_rows - offset) for offset in range(0, num_rows, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if n_workers <= 1:
+        for size, chunk_seed in zip(sizes, seeds):
+            yield _generate_table(size, chunk_seed, start_time)
+        return
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        tasks = iter(zip(sizes, seeds))
+        pending = deque(executor.submit(_generate_table, size, chunk_seed, start_time)
+                        for size, chunk_seed in islice(tasks, 2 * n_workers))
+        while pending:
+            chunk = pending.popleft().result()
+            task = next(tasks, None)
+            if task is not None:
+                pending.append(executor.submit(_generate_table, *task, start_time))
+            yield chunk
+
+def generate_machine_data(num_rows, output_dir=None, output_format="csv", seed=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                          n_workers=1, start_time=None):
+    """
+    합성 기계 공정 데이터를 생성해 CSV 또는 Parquet 파일로 저장하고 파일 경로를 반환합니다.
+    청크 단위로 생성하고 바로 파일에 쓰므로 행 수와 관계없이 메모리 사용량이 일정합니다.
+    """
+    # 출력 디렉토리를 지정하지 않으면 스크립트 파일의 디렉토리에 생성
+    script_dir = output_dir or os.path.dirname(os.path.abspath(__file__))
+    os.makedirs(script_dir, exist_ok=True)
+
     # 현재 시간을 기반으로 파일명 생성
     current_time = datetime.now()
-    file_name = f'data_{current_time.strftime("%m%d%Y_%H%M%S")}.csv'
-    
-    # 스크립트 디렉토리에 상대 경로로 파일 생성
+    file_name = f'data_{current_time.strftime("%m%d%Y_%H%M%S")}.{output_format}'
     file_path = os.path.join(script_dir, file_name)
-    
-    fieldnames = [
-        'Timestamp', 'Machine_ID', 'Material_Type', 'Cutting_Speed', 'Feed_Rate',
-        'Depth_of_Cut', 'Tool_Usage_Time', 'Vibration', 'Coolant_Temperature',
-        'Power_Consumption', 'Cycle_Time', 'Operator_ID', 'Batch_Number',
-        'Product_ID', 'Tool_ID', 'Spindle_Speed', 'Spindle_Load', 'Feed_Load',
-        'Axis_Position_X', 'Axis_Position_Y', 'Axis_Position_Z', 'Surface_Roughness',
-        'Dimensional_Accuracy', 'Defect_Type', 'Quality_Result'
-    ]
-
-    with open(file_path, 'w', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-
-        start_time = datetime.now()
-        
-        # tqdm을 사용하여 프로그레스 바 생성
-        for _ in tqdm(range(num_rows), desc="Generating data", unit="rows"):
-            row = {}
-            for field in fieldnames:
-                # 1% 확률로 빈 값 생성 (결측치 시뮬레이션)
-                if random.random() < 0.01:
-                    row[field] = ''
-                else:
-                    if field == 'Timestamp':
-                        row[field] = (start_time + timedelta(minutes=random.randint(0, 1000000))).strftime("%Y-%m-%d %H:%M:%S")
-                    elif field == 'Machine_ID':
-                        row[field] = f'M{random.randint(1, 10):03d}'
-                    elif field == 'Material_Type':
-                        row[field] = random.choice(['Steel', 'Aluminum', 'Titanium', 'Copper'])
-                    elif field == 'Cutting_Speed':
-                        # 0.5% 확률로 음수 값 생성 (센서 오류 시뮬레이션)
-                        row[field] = round(random.uniform(-10, 250) if random.random() < 0.005 else random.uniform(100, 250), 1)
-                    elif field == 'Feed_Rate':
-                        row[field] = round(random.uniform(0.1, 0.5), 2)
-                    elif field == 'Depth_of_Cut':
-                        row[field] = round(random.uniform(0.5, 3.0), 1)
-                    elif field == 'Tool_Usage_Time':
-                        row[field] = random.randint(60, 300)
-                    elif field == 'Vibration':
-                        row[field] = round(random.uniform(1.0, 5.0), 1)
-                    elif field == 'Coolant_Temperature':
-                        # 0.5% 확률로 비정상적으로 높은 온도 생성 (극단적 상황 시뮬레이션)
-                        row[field] = round(random.uniform(20, 35) if random.random() > 0.005 else random.uniform(100, 150), 1)
-                    elif field == 'Power_Consumption':
-                        row[field] = round(random.uniform(3, 10), 1)
-                    elif field == 'Cycle_Time':
-                        row[field] = random.randint(200, 600)
-                    elif field == 'Operator_ID':
-                        row[field] = f'OP{random.randint(1, 20):03d}'
-                    elif field == 'Batch_Number':
-                        row[field] = f'B{random.randint(1, 100):03d}'
-                    elif field == 'Product_ID':
-                        row[field] = f'P{random.randint(1, 1000):04d}'
-                    elif field == 'Tool_ID':
-                        row[field] = f'T{random.randint(1, 50):03d}'
-                    elif field == 'Spindle_Speed':
-                        row[field] = random.randint(800, 2000)
-                    elif field == 'Spindle_Load':
-                        row[field] = round(random.uniform(50, 100), 1)
-                    elif field == 'Feed_Load':
-                        row[field] = round(random.uniform(40, 90), 1)
-                    elif field in ['Axis_Position_X', 'Axis_Position_Y', 'Axis_Position_Z']:
-                        # 0.5% 확률로 비정상적으로 큰 값 생성 (센서 오류 또는 극단적 상황 시뮬레이션)
-                        row[field] = round(random.uniform(0, 500) if random.random() > 0.005 else random.uniform(1000, 2000), 1)
-                    elif field == 'Surface_Roughness':
-                        row[field] = round(random.uniform(1.0, 5.0), 1)
-                    elif field == 'Dimensional_Accuracy':
-                        row[field] = round(random.uniform(0.01, 0.1), 2)
-                    elif field == 'Defect_Type':
-                        row[field] = random.choice(['None', 'Scratch', 'Dent', 'Misalignment'])
-                    elif field == 'Quality_Result':
-                        # 90% 확률로 합격, 10% 확률로 불합격
-                        row[field] = random.choices([0, 1], weights=[0.1, 0.9])[0]
-
-            writer.writerow(row)
+
+    # tqdm을 사용하여 프로그레스 바 생성
+    with tqdm(total=num_rows, desc="Generating data", unit="rows") as progress:
+        def chunks():
+            for chunk in iter_machine_data(num_rows, seed, chunk_size, n_workers, start_time or current_time):
+                yield chunk
+                progress.update(len(chunk))
+
+        write_dataset_chunks(chunks(), file_path, output_format)
 
     print(f"\n{num_rows} rows of data have been generated in '{file_path}'")
+    return file_path
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic machining process data")
+    parser.add_argument("--rows", type=int, default=1000, help="생성할 행 수")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="출력 형식")
+    parser.add_argument("--output-dir", help="출력 디렉토리 (기본값: 이 스크립트의 디렉토리)")
+    parser.add_argument("--seed", type=int, help="난수 시드 (같은 시드와 --start-time이면 같은 데이터)")
+    parser.add_argument("--start-time", type=datetime.fromisoformat, help="Timestamp 기준 시각 (ISO 형식, 기본값: 현재 시각)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="한 번에 생성/저장하는 행 수")
+    parser.add_argument("--workers", type=int, default=1, help="청크를 병렬로 생성할 프로세스 수")
+    args = parser.parse_args()
+
+    generate_machine_data(args.rows, args.output_dir, args.format, args.seed, args.chunk_size, args.workers,
+                          args.start_time)
 
-# 10만 행의 데이터 생성
-generate_machine_data(1000)
\ No newline at end of file
+if __name__ == "__main__":
+    # 기본값은 1000 행의 데이터 생성 (import 시에는 실행하지 않음)
+    main()
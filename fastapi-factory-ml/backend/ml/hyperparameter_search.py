@@ -0,0 +1,323 @@
+import os
+import math
+import time
+import random
+import shutil
+import itertools
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from ml.common.file_operations import save_model_metadata, save_model_schema, load_dataset, detect_data_format
+from ml.common.dtype_optimization import compact_dtypes
+from ml.common.feature_importance import save_holdout_sample
+from ml.common.model_store import ModelStore
+from ml.main import (OUTPUT_DIR, DEFAULT_TARGET_COLUMN, SPLIT_PARAMS, evaluate_classifier, save_serialized_model,
+                     resolve_serialization_options)
+
+# 탐색할 수 있는 모델 (config.json의 모델 이름 규칙을 따름)
+ESTIMATORS = {
+    "RF": ("sklearn.ensemble", "RandomForestClassifier", {"random_state": 42}),
+    "ET": ("sklearn.ensemble", "ExtraTreesClassifier", {"random_state": 42}),
+    "HGB": ("sklearn.ensemble", "HistGradientBoostingClassifier", {"random_state": 42}),
+    "KNN": ("sklearn.neighbors", "KNeighborsClassifier", {}),
+    # XGBoost는 타겟이 0..n-1 정수 레이블이어야 함 (그렇지 않으면 해당 시험만 오류로 기록)
+    # 병렬화는 시험 단위 프로세스로 하므로 모델 안에서는 스레드 하나만 사용
+    "XG": ("xgboost", "XGBClassifier", {"random_state": 42, "n_jobs": 1}),
+}
+
+# 기본 탐색 공간: 모델별 하이퍼파라미터 그리드 x apply_preprocessing_pipeline의 전처리 방법
+DEFAULT_SEARCH_SPACE = {
+    "estimators": {
+        "RF": {"n_estimators": [100, 200], "max_depth": [None, 10, 20], "min_samples_leaf": [1, 5]},
+        "ET": {"n_estimators": [100, 200], "max_depth": [None, 20]},
+        "HGB": {"learning_rate": [0.05, 0.1], "max_iter": [100, 200], "max_leaf_nodes": [31, 63]},
+        "KNN": {"n_neighbors": [5, 15], "weights": ["uniform", "distance"]},
+        "XG": {"n_estimators": [100, 200], "max_depth": [3, 6], "learning_rate": [0.1, 0.3]},
+    },
+    "preprocessing": [["standardization"], ["normalization"], ["imputation"]],
+}
+SEARCH_METHODS = ("grid", "random", "halving")
+SEARCH_METRICS = ("f1_score", "accuracy")
+
+# 워커 프로세스마다 한 번만 로드하는 학습/검증 데이터 (initializer에서 설정)
+_shared_data = None
+
+def expand_search_space(space=None):
+    """
+    탐색 공간을 후보 목록으로 펼칩니다. 각 후보는 {"estimator", "params", "preprocessing"} 입니다.
+    """
+    space = space or DEFAULT_SEARCH_SPACE
+    estimators = space.get("estimators") or DEFAULT_SEARCH_SPACE["estimators"]
+    preprocessing_options = space.get("preprocessing") or DEFAULT_SEARCH_SPACE["preprocessing"]
+
+    candidates = []
+    for name, grid in estimators.items():
+        if name not in ESTIMATORS:
+            raise ValueError(f"Unknown estimator '{name}'. Choose from {sorted(ESTIMATORS)}")
+        keys = sorted(grid)
+        for values in itertools.product(*(grid[key] for key in keys)):
+            for preprocessing in preprocessing_options:
+                candidates.append({"estimator": name, "params": dict(zip(keys, values)), "preprocessing": list(preprocessing)})
+    return candidates
+
+def interleave_estimators(candidates):
+    """
+    후보를 모델 종류별로 번갈아 배치합니다 (앞에서부터 잘라도 모든 모델 종류가 포함되도록).
+    """
+    groups = {}
+    for candidate in candidates:
+        groups.setdefault(candidate["estimator"], []).append(candidate)
+    return [candidate for row in itertools.zip_longest(*groups.values()) for candidate in row if candidate is not None]
+
+def build_estimator(name, params):
+    import importlib
+
+    module_name, class_name, defaults = ESTIMATORS[name]
+    estimator_class = getattr(importlib.import_module(module_name), class_name)
+    return estimator_class(**dict(defaults, **params))
+
+def _init_worker(data_path):
+    global _shared_data
+    import joblib
+
+    # 숫자 블록은 메모리 매핑으로 열어 워커들이 같은 페이지를 읽기 전용으로 공유
+    _shared_data = joblib.load(data_path, mmap_mode="r")
+
+def _run_trial(candidate, n_rows, metric, min_score_to_keep):
+    """
+    워커 프로세스에서 후보 하나를 학습/평가합니다.
+    점수가 min_score_to_keep 이상인 경우에만 학습된 파이프라인을 돌려보냅니다 (상위 k개 후보만 전송).
+    """
+    from ml.preprocessing.data_preprocessing import TabularPreprocessor, build_inference_pipeline
+
+    X_train, y_train, X_val, y_val = _shared_data
+    X_train, y_train = X_train.iloc[:n_rows], y_train.iloc[:n_rows]
+    start = time.perf_counter()
+    try:
+        preprocessor = TabularPreprocessor(candidate["preprocessing"]).fit(X_train)
+        estimator = build_estimator(candidate["estimator"], candidate["params"])
+        estimator.fit(preprocessor.transform(X_train), y_train)
+        pipeline = build_inference_pipeline(preprocessor, estimator)
+        evaluation = evaluate_classifier(pipeline, X_val, y_val)
+    except Exception as e:
+        return {"candidate": candidate, "n_rows": n_rows, "error": str(e), "fit_seconds": time.perf_counter() - start}
+
+    metrics = {"accuracy": evaluation["accuracy"], "f1_score": evaluation["f1_score"], "auc": evaluation["auc"]}
+    trial = {"candidate": candidate, "n_rows": n_rows, "score": metrics[metric], "metrics": metrics,
+             "fit_seconds": time.perf_counter() - start}
+    if min_score_to_keep is not None and trial["score"] >= min_score_to_keep:
+        trial["model"] = pipeline
+    return trial
+
+class _TopK:
+    # 점수 상위 k개 시험의 모델만 메모리에 유지
+    def __init__(self, k):
+        self.k = k
+        self.trials = []
+
+    def threshold(self):
+        if self.k <= 0:
+            return None
+        return self.trials[-1]["score"] if len(self.trials) >= self.k else float("-inf")
+
+    def offer(self, trial):
+        if "model" not in trial:
+            return
+        self.trials.append(trial)
+        self.trials.sort(key=lambda t: t["score"], reverse=True)
+        del self.trials[self.k:]
+
+def _run_round(executor, n_workers, candidates, n_rows, metric, top_k, deadline, on_trial):
+    """
+    후보들을 워커 수만큼씩 제출하고, 예산 시간이 지나면 새 후보를 더 제출하지 않습니다.
+    """
+    pending = iter(candidates)
+    in_flight = set()
+    results = []
+    stopped = False
+
+    def submit_next():
+        nonlocal stopped
+        if time.monotonic() >= deadline:
+            stopped = True
+            return False
+        candidate = next(pending, None)
+        if candidate is None:
+            return False
+        threshold = top_k.threshold() if top_k is not None else None
+        in_flight.add(executor.submit(_run_trial, candidate, n_rows, metric, threshold))
+        return True
+
+    for _ in range(n_workers):
+        if not submit_next():
+            break
+    while in_flight:
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            in_flight.discard(future)
+            trial = future.result()
+            if top_k is not None:
+                top_k.offer(trial)
+            results.append(trial)
+            on_trial(trial)
+            submit_next()
+    return results, stopped
+
+def _save_search_model(trial, output_dir, search_id, rank, target_column, feature_names, source_file, schema, holdout,
+                       serialization_options=None, data_format=None):
+    # 상위 모델은 각각 search_<id>_top<순위> 이름으로 모델 저장소에 저장
+    options = resolve_serialization_options(serialization_options)
+    with ModelStore(output_dir, options["keep_versions"]).stage(f"search_{search_id}_top{rank}") as staged:
+        save_model_schema(schema, staged.model_path)
+        save_holdout_sample(holdout, staged.model_path)
+        save_serialized_model(trial["model"], staged.model_path, options)
+        save_model_metadata({
+            "created_at": time.time(),
+            "source_file": source_file,
+            "data_format": data_format,
+            "target_column": target_column,
+            "feature_names": feature_names,
+            "n_rows": trial["n_rows"],
+            "search_id": search_id,
+            "rank": rank,
+            "estimator": trial["candidate"]["estimator"],
+            "params": trial["candidate"]["params"],
+            "preprocessing_methods": trial["candidate"]["preprocessing"],
+            "metrics": trial["metrics"],
+            "version": staged.content_version(),
+        }, staged.model_path)
+    return staged.published_path
+
+def run_search(file_path, target_column=None, progress_callback=None, output_dir=OUTPUT_DIR, method="random",
+               n_trials=20, budget_seconds=600, top_k=3, n_workers=2, metric="f1_score", space=None,
+               halving_factor=3, seed=42, serialization_options=None, data_format=None):
+    """
+    모델 종류/하이퍼파라미터/전처리 방법 조합을 프로세스 풀에서 병렬로 평가하고 상위 top_k개 모델만 저장합니다.
+
+    - grid: 탐색 공간의 모든 조합 (n_trials를 주면 모델 종류를 번갈아 가며 n_trials개까지)
+    - random: 조합 중 n_trials개를 무작위로 선택
+    - halving: n_trials개를 적은 행으로 평가한 뒤 상위 1/halving_factor만 남기며 행 수를 늘림
+      (마지막 라운드는 전체 학습 데이터, 후보는 top_k개 아래로 줄이지 않음)
+
+    학습/검증 데이터는 임시 파일에 한 번 저장하고 워커들이 메모리 매핑으로 읽습니다.
+    budget_seconds가 지나면 새 시험을 시작하지 않고 그때까지의 결과로 마칩니다.
+    halving이 마지막 라운드 전에 멈추면 마지막으로 끝난 라운드(없으면 멈춘 라운드)의 상위 모델(일부 행으로 학습)을 저장합니다.
+    저장하는 모델의 압축/평탄화 여부는 serialization_options로 정합니다 (포레스트가 아닌 모델은 평탄화하지 않음).
+    data_format은 업로드 시 감지한 형식이며, None이면 파일 확장자로 판단합니다.
+    """
+    import joblib
+    from sklearn.model_selection import train_test_split
+
+    def notify_progress(fraction, stage):
+        if progress_callback is not None:
+            progress_callback(fraction, stage)
+
+    if method not in SEARCH_METHODS:
+        return {"error": f"Invalid search method '{method}'. Choose from {list(SEARCH_METHODS)}"}
+    if metric not in SEARCH_METRICS:
+        return {"error": f"Invalid metric '{metric}'. Choose from {list(SEARCH_METRICS)}"}
+
+    scratch_dir = None
+    try:
+        candidates = expand_search_space(space)
+        if method == "grid":
+            candidates = interleave_estimators(candidates)[:n_trials] if n_trials else candidates
+        else:
+            candidates = random.Random(seed).sample(candidates, min(n_trials or len(candidates), len(candidates)))
+
+        notify_progress(0.05, "loading")
+        data_format = data_format or detect_data_format(file_path)
+        data = load_dataset(file_path, data_format)
+        target_column = target_column or DEFAULT_TARGET_COLUMN
+        if target_column not in data.columns:
+            return {"error": f"Specified target column '{target_column}' not found in the dataset."}
+        # 워커마다 메모리 매핑하는 데이터도 작은 타입으로 줄여서 저장
+        data, schema, memory = compact_dtypes(data, exclude=(target_column,))
+        X = data.drop(target_column, axis=1)
+        y = data[target_column]
+        X_train, X_val, y_train, y_val = train_test_split(X, y, **SPLIT_PARAMS)
+
+        os.makedirs(output_dir, exist_ok=True)
+        scratch_dir = tempfile.mkdtemp(prefix=".search-", dir=output_dir)
+        data_path = os.path.join(scratch_dir, "data.joblib")
+        joblib.dump((X_train, y_train, X_val, y_val), data_path)
+
+        # 라운드별 (후보 수, 학습 행 수) - halving은 후보가 top_k개 이하로 줄기 전에 멈춤 (상위 top_k개를 모두 저장하도록)
+        min_survivors = max(min(top_k, len(candidates)), 1)
+        if method == "halving":
+            rounds = max(int(math.ceil(math.log(max(len(candidates) / min_survivors, 1), halving_factor))), 0) + 1
+            min_rows = max(len(X_train) // halving_factor ** (rounds - 1), 50)
+        else:
+            rounds, min_rows = 1, len(X_train)
+        total_trials = sum(max(int(math.ceil(len(candidates) / halving_factor ** r)), min_survivors)
+                           for r in range(rounds)) if method == "halving" else len(candidates)
+
+        search_id = uuid.uuid4().hex[:8]
+        deadline = time.monotonic() + budget_seconds
+        trials = []
+        top = None
+        # 마지막 라운드 전에 예산이 끝나면 저장할, 마지막으로 끝난 라운드의 상위 모델
+        completed_top = _TopK(top_k)
+        stopped_early = False
+
+        def on_trial(trial):
+            trials.append(trial)
+            notify_progress(0.1 + 0.8 * len(trials) / max(total_trials, 1), "searching")
+
+        notify_progress(0.1, "searching")
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(data_path,)) as executor:
+            survivors = candidates
+            for round_index in range(rounds):
+                last_round = round_index == rounds - 1
+                n_rows = len(X_train) if last_round else min(min_rows * halving_factor ** round_index, len(X_train))
+                round_top = _TopK(top_k)
+                results, stopped_early = _run_round(executor, n_workers, survivors, n_rows, metric,
+                                                    round_top, deadline, on_trial)
+                for trial in results:
+                    trial["round"] = round_index
+                if last_round:
+                    top = round_top
+                elif not stopped_early or not completed_top.trials:
+                    # 예산 때문에 중간에 멈춘 라운드는 끝난 라운드가 하나도 없을 때만 저장 후보로 사용
+                    completed_top = round_top
+                if stopped_early or last_round:
+                    break
+                ranked = sorted((t for t in results if "error" not in t), key=lambda t: t["score"], reverse=True)
+                n_survivors = max(int(math.ceil(len(survivors) / halving_factor)), min_survivors)
+                survivors = [t["candidate"] for t in ranked[:n_survivors]]
+
+        notify_progress(0.95, "saving")
+        source_file = os.path.basename(file_path)
+        saved = []
+        if top is None or not top.trials:
+            top = completed_top
+        for rank, trial in enumerate(top.trials, start=1):
+            model_path = _save_search_model(trial, output_dir, search_id, rank, target_column, X.columns.tolist(),
+                                            source_file, schema, data.loc[X_val.index], serialization_options,
+                                            data_format)
+            saved.append({"rank": rank, "model_name": f"search_{search_id}_top{rank}", "model_path": model_path,
+                          "score": trial["score"], "metrics": trial["metrics"], "n_rows": trial["n_rows"],
+                          **trial["candidate"]})
+
+        leaderboard = sorted(
+            ({k: v for k, v in trial.items() if k != "model"} for trial in trials),
+            key=lambda t: (t.get("round", 0), t.get("score", float("-inf"))), reverse=True,
+        )
+        return {
+            "search_id": search_id,
+            "method": method,
+            "metric": metric,
+            "n_candidates": len(candidates),
+            "n_trials": len(trials),
+            "stopped_early": stopped_early,
+            "memory": memory,
+            "best": saved[0] if saved else None,
+            "models": saved,
+            "trials": leaderboard,
+        }
+    except Exception as e:
+        return {"error": str(e)}
+    finally:
+        if scratch_dir is not None:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
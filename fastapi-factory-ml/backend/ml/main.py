@@ -1,61 +1,527 @@
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, f1_score, roc_auc_score, classification_report
-import joblib
 import os
+import time
+from ml.common.file_operations import (save_model, save_model_metadata, save_model_schema, load_dataset,
+                                       detect_data_format, save_data_to_parquet, get_flat_model_path, COMPRESS_METHODS)
+from ml.common.dtype_optimization import compact_dtypes, apply_schema
+from ml.common.training_cache import hash_file, make_cache_key
+from ml.common.model_state import ModelState, hash_rows, update_feature_stats
+from ml.common.model_store import ModelStore, DEFAULT_KEEP_VERSIONS
+from ml.common.feature_importance import save_holdout_sample
+from ml.common.model_evaluation import evaluate_model
 
 OUTPUT_DIR = "C:/_YHJ/fast/backend/ml/output"
+DEFAULT_TARGET_COLUMN = 'quality_label'
+MODEL_NAME = "model"
+# 증분 학습 시 새 행으로 추가할 트리 수
+DEFAULT_TREES_PER_UPDATE = 20
 
-def run_model(file_path, target_column=None):
+# 학습 결과에 영향을 주는 하이퍼파라미터 (학습 캐시 키에 포함)
+MODEL_PARAMS = {"n_estimators": 100, "random_state": 42}
+SPLIT_PARAMS = {"test_size": 0.2, "random_state": 42}
+# 모델과 함께 저장되는 전처리 단계의 방법 (apply_preprocessing_pipeline과 같은 옵션)
+PREPROCESSING_METHODS = ["standardization"]
+
+# 학습 방식 옵션
+# - n_jobs: 트리 학습/예측에 사용할 CPU 코어 수 (-1이면 전체, 결과에는 영향 없음)
+# - warm_start: 트리를 warm_start_step개씩 추가하며 학습하고 단계마다 진행률 보고
+# - max_samples: 트리마다 부트스트랩할 표본 수 (0~1 실수는 비율, 정수는 행 수, None이면 전체)
+DEFAULT_TRAINING_OPTIONS = {"n_jobs": None, "warm_start": False, "warm_start_step": 25, "max_samples": None}
+
+# 평가 옵션
+# - n_bootstrap: 신뢰구간 계산에 사용할 부트스트랩 재표본 수 (0이면 계산하지 않음)
+# - confidence: 신뢰구간의 신뢰 수준
+# - calibration_bins: 보정 곡선의 확률 구간 수
+# - n_jobs: 부트스트랩을 병렬로 계산할 스레드 수 (-1이면 전체, 결과에는 영향 없음)
+DEFAULT_EVALUATION_OPTIONS = {"n_bootstrap": 0, "confidence": 0.95, "calibration_bins": 10, "n_jobs": 1,
+                              "random_state": 42}
+
+# 모델 저장 옵션 (학습 결과에는 영향 없음)
+# - compress_level: joblib 압축 수준 (0이면 압축하지 않아 로드 시 메모리 매핑 가능, 1~9는 작은 파일)
+# - compress_method: 압축 방식 (zlib, gzip, bz2, lzma, xz, lz4)
+# - export_flat: 예측용으로 트리를 평탄화한 모델(<모델>.flat.pkl)도 함께 저장
+# - keep_versions: 모델 저장소에 모델 이름별로 남길 최근 버전 수 (0이면 모두 보관)
+DEFAULT_SERIALIZATION_OPTIONS = {"compress_level": 0, "compress_method": "zlib", "export_flat": False,
+                                 "keep_versions": DEFAULT_KEEP_VERSIONS}
+
+def resolve_training_options(training_options=None):
+    """
+    학습 방식 옵션을 기본값과 합치고 값을 검증합니다.
+    """
+    options = dict(DEFAULT_TRAINING_OPTIONS)
+    options.update({key: value for key, value in (training_options or {}).items() if value is not None})
+
+    max_samples = options["max_samples"]
+    if max_samples is not None:
+        # 1보다 큰 값은 행 수로 해석 (폼 입력은 실수로 들어옴)
+        if max_samples > 1:
+            max_samples = int(max_samples)
+        elif max_samples <= 0:
+            raise ValueError("max_samples must be a positive fraction or row count")
+        options["max_samples"] = max_samples
+    if int(options["warm_start_step"]) < 1:
+        raise ValueError("warm_start_step must be at least 1")
+    options["warm_start_step"] = int(options["warm_start_step"])
+    options["warm_start"] = bool(options["warm_start"])
+    return options
+
+def resolve_evaluation_options(evaluation_options=None):
+    """
+    평가 옵션을 기본값과 합치고 값을 검증합니다.
+    """
+    options = dict(DEFAULT_EVALUATION_OPTIONS)
+    options.update({key: value for key, value in (evaluation_options or {}).items() if value is not None})
+    if options["n_bootstrap"] < 0:
+        raise ValueError("n_bootstrap must not be negative")
+    if not 0 < options["confidence"] < 1:
+        raise ValueError("confidence must be between 0 and 1")
+    if options["calibration_bins"] < 1:
+        raise ValueError("calibration_bins must be at least 1")
+    return options
+
+def resolve_serialization_options(serialization_options=None):
+    """
+    모델 저장 옵션을 기본값과 합치고 값을 검증합니다.
+    """
+    options = dict(DEFAULT_SERIALIZATION_OPTIONS)
+    options.update({key: value for key, value in (serialization_options or {}).items() if value is not None})
+    if not 0 <= int(options["compress_level"]) <= 9:
+        raise ValueError("compress_level must be between 0 and 9")
+    if options["compress_method"] not in COMPRESS_METHODS:
+        raise ValueError(f"compress_method must be one of {list(COMPRESS_METHODS)}")
+    if int(options["keep_versions"]) < 0:
+        raise ValueError("keep_versions must not be negative")
+    options["compress_level"] = int(options["compress_level"])
+    options["export_flat"] = bool(options["export_flat"])
+    options["keep_versions"] = int(options["keep_versions"])
+    return options
+
+def training_cache_key(dataset_hash, target_column=None, training_options=None, preprocessing_methods=None,
+                       compact=True, evaluation_options=None):
+    """
+    데이터셋 해시, 타겟 열, 하이퍼파라미터로 학습 캐시 키를 만듭니다.
+    n_jobs와 warm_start_step은 학습 결과를 바꾸지 않으므로 키에 포함하지 않습니다.
+    """
+    target_column = target_column or DEFAULT_TARGET_COLUMN
+    options = resolve_training_options(training_options)
+    params = {"model": MODEL_PARAMS, "split": SPLIT_PARAMS, "preprocessing": preprocessing_methods or PREPROCESSING_METHODS}
+    if options["max_samples"] is not None:
+        params["max_samples"] = options["max_samples"]
+    if options["warm_start"]:
+        params["warm_start"] = True
+    if compact:
+        # float32로 줄인 특성은 분할 기준값이 달라질 수 있으므로 원래 타입으로 학습한 결과와 구분
+        params["dtypes"] = "compact"
+    # 평가 옵션이 기본값과 다르면 평가 결과(신뢰구간, 보정 곡선)가 달라지므로 키에 포함 (n_jobs는 결과에 영향 없음)
+    evaluation = {key: value for key, value in resolve_evaluation_options(evaluation_options).items() if key != "n_jobs"}
+    if evaluation != {key: value for key, value in DEFAULT_EVALUATION_OPTIONS.items() if key != "n_jobs"}:
+        params["evaluation"] = evaluation
+    return make_cache_key(dataset_hash, target_column, params)
+
+def fit_forest(model_class, X_train, y_train, training_options=None, progress_callback=None):
+    """
+    학습 방식 옵션에 따라 랜덤 포레스트를 학습합니다.
+    warm_start 모드에서는 같은 모델에 트리를 단계적으로 추가하며, random_state가 고정되어 있으면
+    한 번에 학습한 모델과 같은 트리가 만들어집니다.
+
+    Args:
+        model_class: 학습할 앙상블 클래스 (예: RandomForestClassifier)
+        X_train, y_train: 학습 데이터
+        training_options (dict, optional): n_jobs, warm_start, warm_start_step, max_samples
+        progress_callback (callable, optional): 학습 단계별 진행률(0~1)을 받는 함수
+
+    Returns:
+        학습된 모델
+    """
+    options = resolve_training_options(training_options)
+    params = dict(MODEL_PARAMS, n_jobs=options["n_jobs"], max_samples=options["max_samples"])
+    if not options["warm_start"]:
+        model = model_class(**params)
+        model.fit(X_train, y_train)
+        return model
+
+    total = params["n_estimators"]
+    model = model_class(**dict(params, n_estimators=min(options["warm_start_step"], total), warm_start=True))
+    while True:
+        model.fit(X_train, y_train)
+        if progress_callback is not None:
+            progress_callback(model.n_estimators / total)
+        if model.n_estimators >= total:
+            break
+        model.set_params(n_estimators=min(model.n_estimators + options["warm_start_step"], total))
+    # 저장된 모델을 다시 fit할 때 기존 트리가 유지되지 않도록 해제
+    model.set_params(warm_start=False)
+    return model
+
+def fit_model_pipeline(X_train, y_train, training_options=None, preprocessing_methods=None, progress_callback=None):
+    """
+    전처리 단계를 학습 데이터에 맞춘 뒤 랜덤 포레스트를 학습하고, 둘을 하나의 추론 파이프라인으로 묶습니다.
+    저장된 파이프라인의 predict는 원본 열 그대로의 DataFrame을 받아 변환과 예측을 한 번에 수행합니다.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from ml.preprocessing.data_preprocessing import TabularPreprocessor, build_inference_pipeline
+
+    preprocessor = TabularPreprocessor(preprocessing_methods or PREPROCESSING_METHODS).fit(X_train)
+    model = fit_forest(RandomForestClassifier, preprocessor.transform(X_train), y_train, training_options, progress_callback)
+    return build_inference_pipeline(preprocessor, model)
+
+def evaluate_classifier(model, X_test, y_test, evaluation_options=None):
+    """
+    테스트 데이터에 대해 predict_proba를 한 번만 실행하고, 그 확률로 예측 라벨, 정확도, F1, AUC(다중 클래스는 one-vs-rest),
+    혼동 행렬, 분류 보고서, 보정 곡선을 계산합니다. n_bootstrap > 0이면 부트스트랩 신뢰구간도 병렬로 계산합니다.
+    """
+    options = resolve_evaluation_options(evaluation_options)
+    return evaluate_model(model, X_test, y_test, **options)
+
+def _evaluation_output(evaluation):
+    # 학습 결과에 포함할 평가 결과 (정확도/F1/AUC/분류 보고서는 기존 키 그대로 최상위에 둠)
+    return {
+        "accuracy": evaluation["accuracy"],
+        "f1_score": evaluation["f1_score"],
+        "auc": evaluation["auc"],
+        "classification_report": evaluation["classification_report"],
+        "confusion_matrix": evaluation["confusion_matrix"],
+        "calibration": evaluation["calibration"],
+        "confidence_intervals": evaluation["confidence_intervals"],
+    }
+
+def save_serialized_model(model, model_path, serialization_options=None):
+    """
+    저장 옵션에 따라 모델을 (압축해서) 저장하고, export_flat이면 평탄화한 포레스트도 모델 옆에 저장합니다.
+    평탄화 파일은 모델보다 먼저 교체하고, 내보내지 않을 때는 이전 모델의 평탄화 파일을 지워
+    모델 레지스트리가 다른 버전의 두 파일을 함께 읽지 않도록 합니다.
+    """
+    options = resolve_serialization_options(serialization_options)
+    compress = (options["compress_method"], options["compress_level"]) if options["compress_level"] else 0
+    if options["export_flat"]:
+        from ml.common.flat_forest import export_flat_model
+        export_flat_model(model, model_path, compress)
+    elif os.path.exists(get_flat_model_path(model_path)):
+        os.remove(get_flat_model_path(model_path))
+    save_model(model, model_path, compress)
+
+def publish_model(model, output_dir, lineage_details, metadata, parent_version=None, schema=None, holdout=None,
+                  serialization_options=None, model_name=MODEL_NAME):
+    """
+    모델을 모델 저장소(output_dir/<model_name>/)에 새 버전으로 저장하고, 버전 계보(lineage)와 메타데이터를 기록한 뒤
+    current 별칭을 새 버전으로 바꿉니다.
+    schema가 주어지면 예측 시 입력에 같은 타입을 적용할 수 있도록 모델 옆에 함께 저장합니다.
+    holdout(학습에 쓰지 않은 행)은 특성 기여도 계산용 표본으로 모델 옆에 저장합니다.
+    serialization_options로 압축 수준, 평탄화 모델 저장 여부, 남길 버전 수를 정합니다 (save_serialized_model 참고).
+
+    버전은 모델 파일 내용의 해시이며, 모델과 옆 파일을 임시 디렉토리에 모두 쓴 뒤 버전 디렉토리로 한 번에 옮기므로
+    동시에 학습해도 서로 덮어쓰지 않고, 예측하는 쪽은 다 쓰인 버전만 읽습니다.
+
+    Returns:
+        (model_path, version)
+    """
+    options = resolve_serialization_options(serialization_options)
+    store = ModelStore(output_dir, options["keep_versions"])
+    with store.stage(model_name) as staged:
+        save_model_schema(schema or {}, staged.model_path)
+        if holdout is not None:
+            save_holdout_sample(holdout, staged.model_path)
+        save_serialized_model(model, staged.model_path, options)
+        version = staged.content_version()
+        ModelState(output_dir, model_name).record_version(parent_version, version=version, **lineage_details)
+
+        # 모델 목록(catalog)과 매니페스트에서 사용할 메타데이터 저장
+        save_model_metadata(dict(metadata, version=version, parent_version=parent_version), staged.model_path)
+    return staged.published_path, version
+
+def restore_cached_model(cache, cache_key, cached, output_dir=OUTPUT_DIR, keep_versions=DEFAULT_KEEP_VERSIONS):
+    """
+    학습 캐시의 모델을 모델 저장소의 해당 버전 디렉토리로 복원하고 current 별칭을 그 버전으로 바꿉니다.
+    모델 저장소 이전 형식(output_dir/model.joblib)으로 캐싱된 결과는 복원하지 않고 None을 반환합니다 (다시 학습).
+    """
+    store = ModelStore(output_dir, keep_versions)
+    location = store.parse_model_path(cached["model_path"])
+    if location is None:
+        return None
+    result = cache.restore(cache_key, cached)
+    store.register(*location)
+    return result
+
+def save_training_state(output_dir, model_path, version, target_column, train, holdout, row_hashes, feature_stats,
+                        schema=None, state_dir=None):
+    """
+    증분 학습에 필요한 상태(학습/평가 데이터, 행 해시, 특성 통계, 압축 스키마)를 state_dir/<모델>/에 저장합니다.
+    학습 데이터가 들어 있으므로 state_dir은 정적 파일로 공개되는 output_dir 밖이어야 합니다 (None이면 output_dir/.state).
+    Parquet 저장에 필요한 pyarrow가 없으면 건너뜁니다.
+    """
+    info = {
+        "version": version,
+        "target_column": target_column,
+        "feature_names": [column for column in train.columns if column != target_column],
+        "feature_stats": feature_stats,
+        "dtype_schema": schema or {},
+        "n_rows": int(len(row_hashes)),
+        "updated_at": time.time(),
+    }
     try:
-        # 데이터 로드
-        data = pd.read_csv(file_path)
+        ModelState(output_dir, MODEL_NAME, state_dir).save(model_path, train, holdout, row_hashes, info)
+    except ImportError as e:
+        print(f"Skipping model state for incremental training: {e}")
+
+def run_model(file_path, target_column=None, progress_callback=None, output_dir=OUTPUT_DIR, cache=None, dataset_hash=None,
+              convert_to_parquet=False, training_options=None, keep_state=False, preprocessing_methods=None,
+              compact=True, evaluation_options=None, serialization_options=None, state_dir=None, data_format=None):
+    # data_format: 업로드 시 감지한 형식 ('csv', 'parquet', 'arrow'), None이면 파일 확장자로 판단
+    # scikit-learn은 학습할 때만 import (API 서버 시작 시 로드하지 않음)
+    from sklearn.model_selection import train_test_split
+
+    def notify_progress(fraction, stage):
+        # 학습 작업 큐에서 실행될 때 진행 상황을 전달
+        if progress_callback is not None:
+            progress_callback(fraction, stage)
+
+    try:
+        training_options = resolve_training_options(training_options)
+
+        # 같은 데이터/타겟/하이퍼파라미터로 학습한 결과가 캐시에 있으면 재사용
+        cache_key = None
+        if cache is not None:
+            cache_key = training_cache_key(dataset_hash or hash_file(file_path), target_column, training_options,
+                                           preprocessing_methods, compact, evaluation_options)
+            cached = cache.get(cache_key)
+            restored = None
+            if cached is not None:
+                restored = restore_cached_model(cache, cache_key, cached, output_dir,
+                                                resolve_serialization_options(serialization_options)["keep_versions"])
+            if restored is not None:
+                return restored
+
+        # 데이터 로드 (CSV는 메모리 매핑으로 파싱, Parquet/Arrow는 텍스트 파싱 없이 타입 그대로 로드)
+        notify_progress(0.05, "loading")
+        data_format = data_format or detect_data_format(file_path)
+        data = load_dataset(file_path, data_format)
+
+        # 다음 재학습 때 CSV를 다시 파싱하지 않도록 Parquet 사본 저장
+        if convert_to_parquet and data_format == "csv":
+            try:
+                save_data_to_parquet(data, os.path.splitext(file_path)[0] + ".parquet")
+            except ImportError as e:
+                print(f"Skipping Parquet conversion: {e}")
         
         # 타겟 열 처리
         if target_column is None:
             # 기본값으로 'quality_label' 사용
-            target_column = 'quality_label'
+            target_column = DEFAULT_TARGET_COLUMN
         
         if target_column not in data.columns:
             return {"error": f"Specified target column '{target_column}' not found in the dataset."}
+
+        # 특성 열을 작은 타입으로 변환 (float64 -> float32, 정수는 범위에 맞는 최소 타입, 반복되는 문자열은 category)
+        schema = {}
+        memory = None
+        if compact:
+            data, schema, memory = compact_dtypes(data, exclude=(target_column,))
         
         # 특성과 타겟 분리
         X = data.drop(target_column, axis=1)
         y = data[target_column]
         
         # 데이터 분할
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        X_train, X_test, y_train, y_test = train_test_split(X, y, **SPLIT_PARAMS)
         
-        # 모델 학습
-        model = RandomForestClassifier(n_estimators=100, random_state=42)
-        model.fit(X_train, y_train)
+        # 전처리 + 모델 학습 (전처리 단계는 학습 데이터로만 맞추고 모델과 함께 저장)
+        notify_progress(0.2, "training")
+        training_start = time.perf_counter()
+        model = fit_model_pipeline(X_train, y_train, training_options, preprocessing_methods,
+                                   lambda fraction: notify_progress(0.2 + 0.6 * fraction, "training"))
+        training_seconds = time.perf_counter() - training_start
         
         # 예측 및 성능 평가
-        predictions = model.predict(X_test)
-        accuracy = accuracy_score(y_test, predictions)
-        f1 = f1_score(y_test, predictions, average='weighted')
-        try:
-            auc = roc_auc_score(y_test, model.predict_proba(X_test), multi_class='ovr', average='weighted')
-        except ValueError:
-            auc = None  # AUC를 계산할 수 없는 경우 (예: 이진 분류가 아닌 경우)
-        
-        # 분류 보고서 생성
-        report = classification_report(y_test, predictions, output_dict=True)
+        notify_progress(0.8, "evaluating")
+        evaluation = evaluate_classifier(model, X_test, y_test, evaluation_options)
+        metrics = {"accuracy": evaluation["accuracy"], "f1_score": evaluation["f1_score"], "auc": evaluation["auc"],
+                   "confidence_intervals": evaluation["confidence_intervals"]}
         
         # 모델 저장
-        os.makedirs(OUTPUT_DIR, exist_ok=True)
-        model_path = os.path.join(OUTPUT_DIR, "model.joblib")
-        joblib.dump(model, model_path)
+        notify_progress(0.95, "saving")
+        model_path, version = publish_model(
+            model, output_dir,
+            {"mode": "full", "source_file": os.path.basename(file_path), "rows_added": len(data),
+             "n_rows": len(data), "n_estimators": len(model[-1].estimators_), "metrics": metrics},
+            {
+                "created_at": time.time(),
+                "source_file": os.path.basename(file_path),
+                "data_format": data_format,
+                "target_column": target_column,
+                "feature_names": X.columns.tolist(),
+                "n_rows": len(data),
+                "preprocessing_methods": model[0].preprocessing_methods,
+                "training_options": training_options,
+                "training_seconds": training_seconds,
+                "memory": memory,
+                "metrics": metrics,
+            },
+            schema=schema, holdout=data.loc[X_test.index], serialization_options=serialization_options)
+
+        # 이후 추가된 행만으로 모델을 갱신할 수 있도록 학습 상태 저장
+        if keep_state:
+            save_training_state(output_dir, model_path, version, target_column,
+                                data.loc[X_train.index], data.loc[X_test.index], hash_rows(data),
+                                update_feature_stats({}, X_train), schema, state_dir)
         
-        return {
-            "accuracy": accuracy,
-            "f1_score": f1,
-            "auc": auc,
-            "classification_report": report,
+        result = {
+            **_evaluation_output(evaluation),
             "model_path": model_path,
-            "feature_importance": dict(zip(X.columns, model.feature_importances_))
+            "version": version,
+            "training_options": training_options,
+            "training_seconds": training_seconds,
+            "memory": memory,
+            "feature_importance": dict(zip(X.columns, model[-1].feature_importances_))
         }
+        if cache is not None:
+            cache.put(cache_key, result, model_path)
+        return result
     
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+def run_incremental_model(file_path, target_column=None, progress_callback=None, output_dir=OUTPUT_DIR,
+                          training_options=None, trees_per_update=DEFAULT_TREES_PER_UPDATE, evaluation_options=None,
+                          serialization_options=None, state_dir=None, data_format=None):
+    """
+    이전 학습 이후 추가된 행만으로 모델을 갱신합니다.
+
+    업로드 파일에서 이전에 본 적 없는 행(행 해시 기준)만 골라 학습/평가용으로 나누고,
+    새 학습 행으로 학습한 트리 trees_per_update개를 기존 포레스트에 추가합니다 (warm_start).
+    평가는 지금까지 모은 평가용 행 전체로 합니다. 새 행의 클래스 구성이 기존 모델과 달라
+    트리를 추가할 수 없으면 저장된 데이터와 새 행을 합쳐 전체 재학습합니다.
+    저장된 상태가 없거나 상태의 버전이 모델 저장소의 current 버전과 다르면 run_model로 전체 학습하고 상태를 저장합니다.
+    상태는 state_dir/<모델>/에서 읽고 씁니다 (save_training_state 참고).
+    data_format은 업로드 시 감지한 형식이며, None이면 파일 확장자로 판단합니다.
+    """
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+
+    def notify_progress(fraction, stage):
+        if progress_callback is not None:
+            progress_callback(fraction, stage)
+
+    state = ModelState(output_dir, MODEL_NAME, state_dir)
+    if not state.exists():
+        return dict(run_model(file_path, target_column, progress_callback, output_dir=output_dir,
+                              training_options=training_options, keep_state=True, evaluation_options=evaluation_options,
+                              serialization_options=serialization_options, state_dir=state_dir,
+                              data_format=data_format), mode="full")
+
+    try:
+        training_options = resolve_training_options(training_options)
+
+        notify_progress(0.05, "loading")
+        saved = state.load()
+        manifest = ModelStore(output_dir).read_manifest(MODEL_NAME)
+        current_version = manifest["current"] if manifest else None
+        if not hasattr(saved["model"], "named_steps") or saved["info"].get("version") != current_version:
+            # 전처리 단계 없이 저장된 이전 형식의 상태이거나, 상태가 current 버전의 것이 아니면
+            # (PUT /current로 되돌렸거나 캐시에서 복원한 경우) 그 위에 트리를 추가하지 않고 전체 학습으로 상태를 새로 만듦
+            return dict(run_model(file_path, target_column, progress_callback, output_dir=output_dir,
+                                  training_options=training_options, keep_state=True, state_dir=state_dir,
+                                  evaluation_options=evaluation_options,
+                                  serialization_options=serialization_options, data_format=data_format), mode="full")
+        info = saved["info"]
+        target_column = target_column or info["target_column"]
+        if target_column != info["target_column"]:
+            return {"error": f"Model was trained on target column '{info['target_column']}', not '{target_column}'."}
+
+        data_format = data_format or detect_data_format(file_path)
+        data = load_dataset(file_path, data_format)
+        expected_columns = info["feature_names"] + [target_column]
+        missing = [column for column in expected_columns if column not in data.columns]
+        if missing:
+            return {"error": f"Columns missing from the appended data: {missing}"}
+        data = data[saved["train"].columns]
+        # 기존 모델과 같은 압축 타입을 적용 (행 해시도 같은 타입 기준으로 비교)
+        schema = info.get("dtype_schema") or {}
+        data = apply_schema(data, schema)
+
+        # 이전에 학습/평가에 사용한 적 없는 행만 사용
+        row_hashes = hash_rows(data)
+        is_new = ~pd.Series(row_hashes).isin(saved["row_hashes"]).to_numpy()
+        new_rows = data[is_new]
+        if new_rows.empty:
+            return {"error": "No new rows to train on: every row of the upload was already used by the current model."}
+
+        # 새 행도 같은 비율로 평가용 행을 떼어 둠 (행이 너무 적으면 전부 학습에 사용)
+        try:
+            new_train, new_holdout = train_test_split(new_rows, **SPLIT_PARAMS)
+        except ValueError:
+            new_train, new_holdout = new_rows, new_rows.iloc[0:0]
+        holdout = pd.concat([frame for frame in (saved["holdout"], new_holdout) if frame is not None], ignore_index=True)
+        if holdout.empty:
+            return {"error": "No held-out rows to evaluate the updated model on."}
+
+        notify_progress(0.2, "training")
+        training_start = time.perf_counter()
+        model = saved["model"]
+        new_classes = set(new_train[target_column].unique())
+        if new_classes == set(model.classes_.tolist()):
+            # 기존 트리와 저장된 전처리 통계는 그대로 두고 새 행으로 학습한 트리만 추가
+            mode = "incremental"
+            preprocessor, classifier = model[0], model[-1]
+            classifier.set_params(warm_start=True, n_estimators=len(classifier.estimators_) + trees_per_update,
+                                  n_jobs=training_options["n_jobs"], max_samples=training_options["max_samples"])
+            classifier.fit(preprocessor.transform(new_train.drop(target_column, axis=1)), new_train[target_column])
+            classifier.set_params(warm_start=False)
+            train = pd.concat([saved["train"], new_train], ignore_index=True)
+        else:
+            # 클래스 구성이 달라지면 트리를 합칠 수 없으므로 누적 데이터로 전체 재학습
+            mode = "full_retrain"
+            train = pd.concat([saved["train"], new_train], ignore_index=True)
+            model = fit_model_pipeline(train.drop(target_column, axis=1), train[target_column], training_options,
+                                       model[0].preprocessing_methods,
+                                       lambda fraction: notify_progress(0.2 + 0.6 * fraction, "training"))
+        training_seconds = time.perf_counter() - training_start
+
+        notify_progress(0.8, "evaluating")
+        evaluation = evaluate_classifier(model, holdout.drop(target_column, axis=1), holdout[target_column],
+                                         evaluation_options)
+        metrics = {"accuracy": evaluation["accuracy"], "f1_score": evaluation["f1_score"], "auc": evaluation["auc"],
+                   "confidence_intervals": evaluation["confidence_intervals"]}
+
+        notify_progress(0.95, "saving")
+        feature_names = info["feature_names"]
+        n_rows = info["n_rows"] + len(new_rows)
+        model_path, version = publish_model(
+            model, output_dir,
+            {"mode": mode, "source_file": os.path.basename(file_path), "rows_added": len(new_rows),
+             "n_rows": n_rows, "n_estimators": len(model[-1].estimators_), "metrics": metrics},
+            {
+                "created_at": time.time(),
+                "source_file": os.path.basename(file_path),
+                "data_format": data_format,
+                "target_column": target_column,
+                "feature_names": feature_names,
+                "n_rows": n_rows,
+                "preprocessing_methods": model[0].preprocessing_methods,
+                "training_options": training_options,
+                "training_seconds": training_seconds,
+                "metrics": metrics,
+            },
+            parent_version=info.get("version"), schema=schema, holdout=holdout,
+            serialization_options=serialization_options)
+
+        if mode == "incremental":
+            feature_stats = update_feature_stats(info.get("feature_stats"), new_train.drop(target_column, axis=1))
+        else:
+            feature_stats = update_feature_stats({}, train.drop(target_column, axis=1))
+        save_training_state(output_dir, model_path, version, target_column, train, holdout,
+                            pd.concat([pd.Series(saved["row_hashes"]), pd.Series(row_hashes[is_new])]).to_numpy(),
+                            feature_stats, schema, state_dir)
+
+        return {
+            **_evaluation_output(evaluation),
+            "model_path": model_path,
+            "version": version,
+            "parent_version": info.get("version"),
+            "mode": mode,
+            "rows_added": len(new_rows),
+            "training_options": training_options,
+            "training_seconds": training_seconds,
+            "feature_importance": dict(zip(feature_names, model[-1].feature_importances_))
+        }
+
+    except Exception as e:
+        return {"error": str(e)}
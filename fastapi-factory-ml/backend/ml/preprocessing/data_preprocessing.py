@@ -5,69 +5,196 @@ import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler, MinMaxScaler, LabelEncoder
 from sklearn.impute import SimpleImputer
-from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
+from sklearn.base import BaseEstimator, TransformerMixin
+from ml.preprocessing.deduplication import drop_duplicate_rows
+
+def _code_dtype(max_code):
+    # 코드 범위를 담을 수 있는 가장 작은 부호 있는 정수 타입
+    for dtype in (np.int8, np.int16, np.int32):
+        if max_code <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
 
 class ConsistentLabelEncoder:
+    """
+    Label encoder that gives every category the same integer code on every call.
+
+    Categories are kept per column as a ``pd.CategoricalDtype`` whose position in
+    the categories array is the code (order of first appearance during fit).
+    Missing values get code ``len(categories)`` and values not seen during fit get
+    the reserved ``UNSEEN_CODE``. Codes use the smallest integer type that fits.
+    ``inverse_transform`` indexes a precomputed object array with the codes.
+    Pickles hold only the categories arrays.
+    """
+
+    UNSEEN_CODE = -1
+
     def __init__(self):
-        self.encoders = {}
+        self.categories = {}
+        self._inverse_lookups = {}
+
+    @property
+    def encoders(self):
+        # 이전 버전과 같은 {값: 코드} 형태 (조회용)
+        return {column: {value: code for code, value in enumerate(dtype.categories)}
+                for column, dtype in self.categories.items()}
+
+    def fit(self, X):
+        self.fit_transform(X)
+        return self
 
     def fit_transform(self, X):
         X_transformed = X.copy()
-        for column in X.columns:
-            if X[column].dtype == 'object':
-                unique_values = X[column].unique()
-                self.encoders[column] = {val: idx for idx, val in enumerate(unique_values)}
-                X_transformed[column] = X[column].map(self.encoders[column])
+        self.categories = {}
+        self._inverse_lookups = {}
+        for column in X.select_dtypes(exclude='number').columns:
+            codes, uniques = pd.factorize(X[column], use_na_sentinel=True)
+            dtype = pd.CategoricalDtype(pd.Index(np.asarray(uniques, dtype=object), dtype=object))
+            self.categories[column] = dtype
+            missing_code = len(dtype.categories)
+            X_transformed[column] = np.where(codes < 0, missing_code, codes).astype(_code_dtype(missing_code))
+        return X_transformed
+
+    def transform_column(self, column, values):
+        """
+        Return the codes of one column as a NumPy array.
+        """
+        categories = self.categories[column].categories
+        missing_code = len(categories)
+        # 입력의 고유값만 범주 배열에서 찾고, 행별 코드는 배열 인덱싱으로 만듦
+        # (factorize의 결측치 코드 -1은 lookup의 마지막 원소인 missing_code를 가리킴)
+        value_codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        lookup = np.append(categories.get_indexer(uniques), missing_code).astype(_code_dtype(missing_code))
+        return lookup[value_codes]
+
+    def transform(self, X):
+        X_transformed = X.copy()
+        for column in self.categories:
+            if column in X.columns:
+                X_transformed[column] = self.transform_column(column, X[column])
         return X_transformed
 
     def inverse_transform(self, X):
         X_transformed = X.copy()
         for column in X.columns:
-            if column in self.encoders:
-                inverse_encoder = {idx: val for val, idx in self.encoders[column].items()}
-                X_transformed[column] = X_transformed[column].map(inverse_encoder)
+            if column in self.categories:
+                codes = X_transformed[column].to_numpy().astype(np.intp)
+                # 음수 인덱스 -1(UNSEEN_CODE)은 배열의 마지막 원소(NaN)를 가리킴
+                X_transformed[column] = self._inverse_lookup(column)[codes]
         return X_transformed
 
-def apply_preprocessing_pipeline(X, y, id_material, preprocessing_methods):
-    numeric_features = X.select_dtypes(include=['int64', 'float64']).columns
-    categorical_features = X.select_dtypes(include=['object']).columns
+    def _inverse_lookup(self, column):
+        lookup = self._inverse_lookups.get(column)
+        if lookup is None:
+            # [범주..., 결측치 코드 -> NaN, UNSEEN_CODE(-1) -> NaN]
+            lookup = np.concatenate([self.categories[column].categories.to_numpy(dtype=object),
+                                     np.array([np.nan, np.nan], dtype=object)])
+            self._inverse_lookups[column] = lookup
+        return lookup
 
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ('num', StandardScaler(), numeric_features),
-            ('cat', 'passthrough', categorical_features)
-        ])
+    def __getstate__(self):
+        # 역변환 배열은 저장하지 않고 필요할 때 다시 만듦
+        return {"categories": {column: dtype.categories.to_numpy(dtype=object)
+                               for column, dtype in self.categories.items()}}
 
-    for method in preprocessing_methods:
+    def __setstate__(self, state):
+        self.categories = {column: pd.CategoricalDtype(pd.Index(values, dtype=object))
+                           for column, values in state["categories"].items()}
+        self._inverse_lookups = {}
+
+def _numeric_transformer(preprocessing_methods):
+    # apply_preprocessing_pipeline과 같이 마지막에 지정된 방법을 사용 (기본값: 표준화)
+    transformer = StandardScaler()
+    for method in preprocessing_methods or []:
         if method == 'standardization':
-            preprocessor = ColumnTransformer(
-                transformers=[
-                    ('num', StandardScaler(), numeric_features),
-                    ('cat', 'passthrough', categorical_features)
-                ])
+            transformer = StandardScaler()
         elif method == 'normalization':
-            preprocessor = ColumnTransformer(
-                transformers=[
-                    ('num', MinMaxScaler(), numeric_features),
-                    ('cat', 'passthrough', categorical_features)
-                ])
+            transformer = MinMaxScaler()
         elif method == 'imputation':
-            preprocessor = ColumnTransformer(
-                transformers=[
-                    ('num', SimpleImputer(strategy='mean'), numeric_features),
-                    ('cat', SimpleImputer(strategy='most_frequent'), categorical_features)
-                ])
+            transformer = SimpleImputer(strategy='mean')
+    return transformer
 
-    pipeline = Pipeline([
-        ('preprocessor', preprocessor),
-    ])
+class TabularPreprocessor(BaseEstimator, TransformerMixin):
+    """
+    Fitted preprocessing step that is saved together with the model.
 
-    X_processed = pd.DataFrame(pipeline.fit_transform(X), columns=X.columns)
-    
-    label_encoder = ConsistentLabelEncoder()
-    X_processed = label_encoder.fit_transform(X_processed)
-    
+    Numeric columns go through the scaler/imputer selected by ``preprocessing_methods``
+    (same rules as ``apply_preprocessing_pipeline``). Every other column is encoded
+    to integer codes by a fitted ``ConsistentLabelEncoder`` (unseen categories get
+    ``ConsistentLabelEncoder.UNSEEN_CODE``). The output is a single float64 array
+    in the original column order.
+    """
+
+    def __init__(self, preprocessing_methods=None):
+        self.preprocessing_methods = preprocessing_methods
+
+    def fit(self, X, y=None):
+        methods = self.preprocessing_methods or []
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.numeric_features_ = X.select_dtypes(include='number').columns.tolist()
+        self.categorical_features_ = [column for column in X.columns if column not in self.numeric_features_]
+
+        self.numeric_transformer_ = None
+        if self.numeric_features_:
+            self.numeric_transformer_ = _numeric_transformer(methods)
+            self.numeric_transformer_.fit(X[self.numeric_features_].to_numpy(dtype=np.float64))
+
+        # 범주형 결측치 대체값 (imputation 사용 시 최빈값)
+        self.fill_values_ = {}
+        categorical = X[self.categorical_features_]
+        if 'imputation' in methods and self.categorical_features_:
+            self.fill_values_ = categorical.mode().iloc[0].to_dict()
+            categorical = categorical.fillna(self.fill_values_)
+
+        self.label_encoder_ = ConsistentLabelEncoder().fit(categorical.astype(object))
+        return self
+
+    def transform(self, X):
+        missing = [column for column in self.feature_names_in_ if column not in X.columns]
+        if missing:
+            raise ValueError(f"Input is missing feature columns: {missing}")
+
+        positions = {column: index for index, column in enumerate(self.feature_names_in_)}
+        output = np.empty((len(X), len(self.feature_names_in_)), dtype=np.float64)
+        if self.numeric_features_:
+            numeric = self.numeric_transformer_.transform(X[self.numeric_features_].to_numpy(dtype=np.float64))
+            output[:, [positions[column] for column in self.numeric_features_]] = numeric
+        for column in self.categorical_features_:
+            values = X[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                # 압축 스키마로 category가 된 열은 코드 배열 그대로 인코딩 (object 배열로 풀지 않음)
+                if column in self.fill_values_ and self.fill_values_[column] not in values.cat.categories:
+                    values = values.cat.add_categories([self.fill_values_[column]])
+            else:
+                values = values.astype(object)
+            if column in self.fill_values_:
+                values = values.fillna(self.fill_values_[column])
+            output[:, positions[column]] = self.label_encoder_.transform_column(column, values)
+        return output
+
+    def get_feature_names_out(self, input_features=None):
+        return self.feature_names_in_.copy()
+
+def build_inference_pipeline(preprocessor, estimator):
+    """
+    Combine a fitted preprocessor and a fitted estimator into one pipeline.
+
+    The pipeline is what gets saved as the model file, so ``predict`` on raw
+    input frames runs the saved transform and the estimator in a single pass.
+
+    Args:
+        preprocessor (TabularPreprocessor): Fitted preprocessing step.
+        estimator: Fitted estimator.
+
+    Returns:
+        Pipeline: ``preprocessor`` followed by ``classifier``.
+    """
+    return Pipeline([('preprocessor', preprocessor), ('classifier', estimator)])
+
+def apply_preprocessing_pipeline(X, y, id_material, preprocessing_methods):
+    preprocessor = TabularPreprocessor(preprocessing_methods)
+    X_processed = pd.DataFrame(preprocessor.fit_transform(X), columns=X.columns, index=X.index)
     return X_processed, y, id_material
 
 def print_data_ranges(X):
@@ -91,11 +218,8 @@ def essential_preprocessing(X, y, id_material):
     y = y.fillna(y.mode().iloc[0])
     id_material = id_material.fillna(id_material.mode().iloc[0])
 
-    # Remove duplicates
-    duplicates = X.duplicated()
-    X = X[~duplicates]
-    y = y[~duplicates]
-    id_material = id_material[~duplicates]
+    # Remove duplicates (64-bit row hashes instead of comparing every column of the mixed-dtype frame)
+    X, y, id_material, _ = drop_duplicate_rows(X, y, id_material)
 
     # Handle outliers (using IQR method)
     Q1 = X[numeric_features].quantile(0.25)
@@ -124,8 +248,9 @@ def remove_outliers(X, method='iqr', threshold=1.5):
         IQR = Q3 - Q1
         return X[~((X < (Q1 - threshold * IQR)) | (X > (Q3 + threshold * IQR))).any(axis=1)]
     elif method == 'zscore':
-        from scipy import stats
-        return X[(np.abs(stats.zscore(X)) < threshold).all(axis=1)]
+        # scipy.stats.zscore와 같은 모집단 표준편차(ddof=0)로 계산 (scipy import 없이 벡터 연산)
+        z_scores = (X - X.mean()) / X.std(ddof=0)
+        return X[(z_scores.abs() < threshold).all(axis=1)]
     else:
         raise ValueError("Invalid method. Choose 'iqr' or 'zscore'.")
 
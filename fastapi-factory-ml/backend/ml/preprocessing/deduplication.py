@@ -0,0 +1,193 @@
+# File: C:\_YHJ\fast\backend\ml\preprocessing\deduplication.py
+# Purpose: Removes duplicate rows of large or chunked frames using 64-bit row hashes
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from ml.common.model_state import hash_rows
+
+class SortedHashSet:
+    """
+    Exact set of 64-bit hashes stored as sorted NumPy runs (8 bytes per hash).
+
+    New hashes are added as a sorted run, and runs of similar size are merged, so
+    inserting n hashes costs O(n log n) in total and a lookup checks O(log n) runs
+    with binary search.
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+    @property
+    def nbytes(self):
+        return sum(run.nbytes for run in self.runs)
+
+    def contains(self, hashes):
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self.runs:
+            positions = np.searchsorted(run, hashes)
+            found |= run[np.minimum(positions, len(run) - 1)] == hashes
+        return found
+
+    def add(self, hashes):
+        run = np.unique(np.asarray(hashes, dtype=np.uint64))
+        if not len(run):
+            return
+        self.runs.append(run)
+        while len(self.runs) > 1 and len(self.runs[-2]) <= 2 * len(self.runs[-1]):
+            last = self.runs.pop()
+            self.runs[-1] = np.union1d(self.runs[-1], last)
+
+    def __iter__(self):
+        return iter(self.runs)
+
+class BloomFilter:
+    """
+    Bloom filter over 64-bit hashes with vectorized insert and lookup.
+
+    The bit positions are derived from the hash by double hashing. ``contains``
+    can return false positives (with probability about ``error_rate`` once
+    ``capacity`` hashes were added) but never false negatives.
+    """
+
+    def __init__(self, capacity, error_rate=1e-6):
+        capacity = max(int(capacity), 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.n_bits = max(int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)), 64)
+        self.n_hashes = max(int(round(self.n_bits / capacity * math.log(2))), 1)
+        self.bits = np.zeros((self.n_bits + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    def _positions(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        steps = np.arange(self.n_hashes, dtype=np.uint64)
+        return (h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(self.n_bits)
+
+    def contains(self, hashes):
+        positions = self._positions(hashes)
+        bits = (self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        return bits.all(axis=1)
+
+    def add(self, hashes):
+        positions = self._positions(hashes).ravel()
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3),
+                         np.left_shift(np.uint8(1), (positions & np.uint64(7)).astype(np.uint8)))
+        self.count += len(hashes)
+
+    def estimated_error_rate(self):
+        """
+        Current false-positive probability for the number of hashes added so far.
+        """
+        return (1 - math.exp(-self.n_hashes * self.count / self.n_bits)) ** self.n_hashes
+
+class RowDeduplicator:
+    """
+    Flags rows that repeat an earlier row, across any number of chunks.
+
+    Each row is reduced to a 64-bit key with vectorized row hashing
+    (``pd.util.hash_pandas_object``). Keys seen so far are kept either in an exact
+    ``SortedHashSet`` (8 bytes per distinct row) or in a ``BloomFilter`` (a fixed
+    number of bits per expected row, may drop a small fraction of unique rows as
+    false duplicates).
+
+    Args:
+        method (str): 'exact', 'bloom' or 'auto'. 'auto' starts exact and switches to a
+            Bloom filter when more than ``max_exact_rows`` distinct rows were seen.
+        capacity (int): Expected number of distinct rows (sizes the Bloom filter).
+        error_rate (float): Target false-positive rate of the Bloom filter.
+        max_exact_rows (int): Exact-set size at which 'auto' switches to a Bloom filter.
+        columns (list): Columns that define a duplicate (all columns when None).
+    """
+
+    def __init__(self, method='auto', capacity=None, error_rate=1e-6, max_exact_rows=50_000_000, columns=None):
+        if method not in ('exact', 'bloom', 'auto'):
+            raise ValueError("Invalid method. Choose 'exact', 'bloom' or 'auto'.")
+        self.method = method
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.max_exact_rows = max_exact_rows
+        self.columns = columns
+        self.rows = 0
+        self.duplicates = 0
+        if method == 'bloom':
+            self._seen = BloomFilter(capacity or max_exact_rows, error_rate)
+        else:
+            self._seen = SortedHashSet()
+
+    @property
+    def mode(self):
+        """
+        'exact' or 'probabilistic', depending on the structure currently in use.
+        """
+        return 'probabilistic' if isinstance(self._seen, BloomFilter) else 'exact'
+
+    def duplicated(self, chunk):
+        """
+        Return a boolean mask marking rows of ``chunk`` that repeat a row of this chunk
+        or of an earlier chunk (the first occurrence is kept, like ``DataFrame.duplicated``).
+
+        Args:
+            chunk (pd.DataFrame): Next rows.
+
+        Returns:
+            np.ndarray: True for duplicate rows.
+        """
+        if not len(chunk):
+            return np.zeros(0, dtype=bool)
+        hashes = hash_rows(chunk if self.columns is None else chunk[self.columns])
+        duplicated = pd.Series(hashes).duplicated().to_numpy()
+        duplicated[~duplicated] = self._seen.contains(hashes[~duplicated])
+        self._seen.add(hashes[~duplicated])
+
+        self.rows += len(chunk)
+        self.duplicates += int(duplicated.sum())
+        if self.method == 'auto' and self.mode == 'exact' and len(self._seen) > self.max_exact_rows:
+            self._switch_to_bloom()
+        return duplicated
+
+    def _switch_to_bloom(self):
+        bloom = BloomFilter(max(self.capacity or 0, 4 * len(self._seen)), self.error_rate)
+        for run in self._seen:
+            bloom.add(run)
+        self._seen = bloom
+
+    def stats(self):
+        """
+        Return the dedup mode, row counts, memory used and (probabilistic mode) the estimated false-positive rate.
+        """
+        stats = {"mode": self.mode, "rows": self.rows, "duplicates": self.duplicates, "bytes": self._seen.nbytes}
+        if isinstance(self._seen, BloomFilter):
+            stats["false_positive_rate"] = self._seen.estimated_error_rate()
+        return stats
+
+def drop_duplicate_rows(X, *aligned, chunk_size=1_000_000, **kwargs):
+    """
+    Drop rows of X that duplicate an earlier row, together with the same rows of the aligned Series/frames.
+    X is hashed in chunks, so only the chunk hashes and the seen-key set are held in addition to X.
+
+    Args:
+        X (pd.DataFrame): Rows to deduplicate.
+        *aligned (pd.Series or pd.DataFrame): Objects with the same index as X (e.g. y, id_material).
+        chunk_size (int): Rows hashed per step.
+        **kwargs: Passed to ``RowDeduplicator``.
+
+    Returns:
+        tuple: (X, *aligned, stats) with duplicate rows removed.
+    """
+    deduplicator = RowDeduplicator(**kwargs)
+    duplicated = np.concatenate([deduplicator.duplicated(X.iloc[start:start + chunk_size])
+                                 for start in range(0, len(X), chunk_size)] or [np.zeros(0, dtype=bool)])
+    keep = ~duplicated
+    return (X[keep], *(obj[keep] for obj in aligned), deduplicator.stats())
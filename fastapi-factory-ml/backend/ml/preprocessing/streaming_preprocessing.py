@@ -0,0 +1,261 @@
+# File: C:\_YHJ\fast\backend\ml\preprocessing\streaming_preprocessing.py
+# Purpose: Cleans datasets larger than memory in two chunked passes (statistics, then imputation/dedup/outlier filtering)
+#
+# 사용법 (backend 디렉토리에서 실행):
+#   python -m ml.preprocessing.streaming_preprocessing input.csv output.parquet --target Quality_Result --method iqr
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from ml.common.file_operations import iter_dataset_chunks, write_dataset_chunks
+from ml.common.model_state import update_feature_stats
+from ml.preprocessing.deduplication import RowDeduplicator
+
+class QuantileSketch:
+    """
+    Approximate quantile sketch with bounded memory (KLL-style compactors).
+
+    Values are kept in levels where an item on level ``i`` stands for ``2**i``
+    input values. When a level holds more than ``capacity`` items it is sorted
+    and every other item (random offset) is promoted to the next level, so the
+    sketch keeps ``O(capacity * log(n / capacity))`` values and rank errors stay
+    around ``1 / capacity``. Sketches of separate chunks can be merged.
+    """
+
+    def __init__(self, capacity=1024, seed=0):
+        self.capacity = capacity
+        self.count = 0
+        self.levels = []
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        """
+        Add values to the sketch (NaN values are ignored).
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.count += len(values)
+            self._add(0, values)
+
+    def merge(self, other):
+        """
+        Add every value summarized by another sketch.
+        """
+        self.count += other.count
+        for level, values in enumerate(other.levels):
+            if len(values):
+                self._add(level, values)
+
+    def _add(self, level, values):
+        while True:
+            if level == len(self.levels):
+                self.levels.append(np.empty(0, dtype=np.float64))
+            buffer = np.concatenate([self.levels[level], values])
+            if len(buffer) <= self.capacity:
+                self.levels[level] = buffer
+                return
+
+            buffer.sort()
+            keep = buffer[:0]
+            if len(buffer) % 2:
+                # 짝이 맞지 않는 원소 하나는 현재 단계에 남김
+                index = self._rng.integers(len(buffer))
+                keep = buffer[index:index + 1]
+                buffer = np.delete(buffer, index)
+            self.levels[level] = keep
+            values = buffer[self._rng.integers(2)::2]
+            level += 1
+
+    def quantile(self, q):
+        """
+        Return the approximate q-quantile(s), or NaN if no values were added.
+
+        Args:
+            q (float or array-like): Quantile(s) between 0 and 1.
+
+        Returns:
+            float or np.ndarray: Approximate quantile value(s).
+        """
+        if self.count == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(values), 2.0 ** level) for level, values in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        ranks = np.asarray(q, dtype=np.float64) * cumulative[-1]
+        positions = np.clip(np.searchsorted(cumulative, ranks, side="left"), 0, len(items) - 1)
+        return items[order][positions]
+
+class StreamingPreprocessor:
+    """
+    Two-pass version of ``essential_preprocessing`` for files that do not fit in memory.
+
+    ``fit`` reads the data once in chunks and collects the statistics:
+    mean/standard deviation and a ``QuantileSketch`` for numeric features, and value
+    counts (for the mode) for the other features and the target/ID columns.
+
+    ``transform`` reads the data again. Each chunk is imputed (numeric mean, mode
+    otherwise), stripped of rows whose features duplicate an earlier row (across
+    chunks, by a ``RowDeduplicator``), and filtered for outliers with the IQR or z-score rule.
+
+    Memory is bounded by the chunk size, the sketches, the value counts and the
+    deduplicator (8 bytes per kept row in exact mode, a fixed-size Bloom filter in
+    probabilistic mode). Unlike ``essential_preprocessing``, the
+    quartiles come from the raw values rather than the imputed, deduplicated ones,
+    and are approximate.
+    """
+
+    def __init__(self, target_column=None, id_column=None, outlier_method='iqr', threshold=1.5, dedup=True,
+                 chunk_size=100000, sketch_capacity=1024, dedup_method='auto'):
+        if outlier_method not in ('iqr', 'zscore', None):
+            raise ValueError("Invalid method. Choose 'iqr' or 'zscore'.")
+        self.target_column = target_column
+        self.id_column = id_column
+        self.outlier_method = outlier_method
+        self.threshold = threshold
+        self.dedup = dedup
+        self.chunk_size = chunk_size
+        self.sketch_capacity = sketch_capacity
+        self.dedup_method = dedup_method
+
+    def fit(self, source, data_format=None):
+        """
+        First pass: collect the statistics used for imputation and outlier filtering.
+
+        Args:
+            source (str): CSV, Parquet or Arrow IPC file.
+            data_format (str): Detected from the path when None.
+
+        Returns:
+            StreamingPreprocessor: self
+        """
+        self.numeric_features_ = None
+        numeric_stats = {}
+        sketches = {}
+        value_counts = {}
+
+        for chunk in iter_dataset_chunks(source, data_format, self.chunk_size):
+            if self.numeric_features_ is None:
+                # 열 종류는 첫 청크로 결정 (이후 청크의 숫자 열은 숫자로 변환)
+                label_columns = [c for c in (self.target_column, self.id_column) if c is not None]
+                missing = [c for c in label_columns if c not in chunk.columns]
+                if missing:
+                    raise ValueError(f"Columns not found in the dataset: {missing}")
+                self.columns_ = chunk.columns.tolist()
+                self.feature_columns_ = [c for c in self.columns_ if c not in label_columns]
+                self.numeric_features_ = chunk[self.feature_columns_].select_dtypes(include='number').columns.tolist()
+                self.categorical_features_ = [c for c in self.feature_columns_ if c not in self.numeric_features_]
+                sketches = {c: QuantileSketch(self.sketch_capacity, seed=i) for i, c in enumerate(self.numeric_features_)}
+                value_counts = {c: pd.Series(dtype=np.float64) for c in self.categorical_features_ + label_columns}
+
+            numeric = self._numeric(chunk)
+            numeric_stats = update_feature_stats(numeric_stats, numeric)
+            for column, sketch in sketches.items():
+                sketch.update(numeric[column].to_numpy())
+            for column in value_counts:
+                value_counts[column] = value_counts[column].add(chunk[column].value_counts(), fill_value=0)
+
+        if self.numeric_features_ is None:
+            raise ValueError("The dataset is empty")
+
+        self.means_ = {c: numeric_stats.get(c, {}).get("mean", np.nan) for c in self.numeric_features_}
+        self.stds_ = {c: np.sqrt(numeric_stats[c]["m2"] / numeric_stats[c]["count"]) if c in numeric_stats else np.nan
+                      for c in self.numeric_features_}
+        self.modes_ = {c: counts.idxmax() for c, counts in value_counts.items() if len(counts)}
+        self.quartiles_ = {c: tuple(sketch.quantile([0.25, 0.75])) for c, sketch in sketches.items()}
+        return self
+
+    def _numeric(self, chunk):
+        return chunk[self.numeric_features_].apply(pd.to_numeric, errors='coerce').astype(np.float64)
+
+    def _outlier_mask(self, chunk):
+        values = chunk[self.numeric_features_].to_numpy(dtype=np.float64)
+        if self.outlier_method == 'iqr':
+            q1 = np.array([self.quartiles_[c][0] for c in self.numeric_features_])
+            q3 = np.array([self.quartiles_[c][1] for c in self.numeric_features_])
+            iqr = q3 - q1
+            return ((values < q1 - self.threshold * iqr) | (values > q3 + self.threshold * iqr)).any(axis=1)
+        means = np.array([self.means_[c] for c in self.numeric_features_])
+        stds = np.array([self.stds_[c] for c in self.numeric_features_])
+        # 값이 모두 같은 열(표준편차 0)은 이상치 판단에서 제외
+        z_scores = np.abs(values - means) / np.where(stds > 0, stds, np.inf)
+        return ~(z_scores < self.threshold).all(axis=1)
+
+    def transform(self, source, data_format=None):
+        """
+        Second pass: yield cleaned chunks. ``summary_`` holds the row counts once the generator is exhausted.
+
+        Args:
+            source (str): The file passed to ``fit``.
+            data_format (str): Detected from the path when None.
+
+        Yields:
+            pd.DataFrame: Imputed, deduplicated and outlier-filtered chunks.
+        """
+        deduplicator = RowDeduplicator(self.dedup_method, columns=self.feature_columns_) if self.dedup else None
+        summary = {"rows_in": 0, "duplicates": 0, "outliers": 0, "rows_out": 0,
+                   "dedup_mode": deduplicator.mode if deduplicator is not None else None}
+        self.summary_ = summary
+
+        for chunk in iter_dataset_chunks(source, data_format, self.chunk_size):
+            summary["rows_in"] += len(chunk)
+            chunk = chunk[self.columns_].copy()
+            if self.numeric_features_:
+                chunk[self.numeric_features_] = self._numeric(chunk).fillna(self.means_)
+            fill_values = {c: v for c, v in self.modes_.items() if c in chunk.columns}
+            if fill_values:
+                chunk = chunk.fillna(fill_values)
+
+            if deduplicator is not None and len(chunk):
+                duplicated = deduplicator.duplicated(chunk)
+                summary["duplicates"] += int(duplicated.sum())
+                summary["dedup_mode"] = deduplicator.mode
+                chunk = chunk[~duplicated]
+
+            if self.outlier_method is not None and self.numeric_features_ and len(chunk):
+                outliers = self._outlier_mask(chunk)
+                summary["outliers"] += int(outliers.sum())
+                chunk = chunk[~outliers]
+
+            summary["rows_out"] += len(chunk)
+            yield chunk
+
+    def run(self, source, output_path, data_format=None, output_format=None):
+        """
+        Run both passes and write the cleaned data to output_path (CSV or Parquet).
+
+        Returns:
+            dict: rows_in, duplicates, outliers, rows_out and dedup_mode ('exact' or 'probabilistic').
+        """
+        self.fit(source, data_format)
+        write_dataset_chunks(self.transform(source, data_format), output_path, output_format)
+        return dict(self.summary_)
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean a CSV/Parquet/Arrow file in two chunked passes")
+    parser.add_argument("source", help="입력 파일")
+    parser.add_argument("output", help="출력 파일 (.csv 또는 .parquet)")
+    parser.add_argument("--target", help="타겟 열 (최빈값으로 결측치 대체, 중복/이상치 판단에서 제외)")
+    parser.add_argument("--id-column", help="ID 열 (타겟 열과 같게 처리)")
+    parser.add_argument("--method", choices=["iqr", "zscore", "none"], default="iqr", help="이상치 제거 방법")
+    parser.add_argument("--threshold", type=float, default=1.5, help="IQR 배수 또는 z-score 기준값")
+    parser.add_argument("--no-dedup", action="store_true", help="중복 행을 제거하지 않음")
+    parser.add_argument("--dedup-method", choices=["auto", "exact", "bloom"], default="auto",
+                        help="중복 판별 방식 (exact: 해시 집합, bloom: 블룸 필터 - 확률적)")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="한 번에 읽는 행 수")
+    args = parser.parse_args()
+
+    preprocessor = StreamingPreprocessor(
+        target_column=args.target, id_column=args.id_column,
+        outlier_method=None if args.method == "none" else args.method, threshold=args.threshold,
+        dedup=not args.no_dedup, chunk_size=args.chunk_size, dedup_method=args.dedup_method,
+    )
+    summary = preprocessor.run(args.source, args.output)
+    print(f"{summary['rows_in']} rows read, {summary['duplicates']} duplicates and {summary['outliers']} outliers removed, "
+          f"{summary['rows_out']} rows written to '{args.output}' (dedup mode: {summary['dedup_mode']})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# ml\utils\plot_data.py
+# 프론트엔드가 수백만 행을 그릴 수 있도록 원본 행 대신 줄인(downsampled) 점 집합이나 구간 집계(hexbin)를 만듭니다.
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from ml.utils.visualization import stratified_sampling
+
+POINT_METHODS = ("lttb", "hexbin", "sample")
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets로 (x, y) 계열에서 모양을 가장 잘 보존하는 n_out개 점의 인덱스를 반환합니다.
+    x는 오름차순으로 정렬되어 있어야 합니다. 버킷 평균은 한 번에 계산하고, 버킷 안의 면적 계산도 벡터 연산으로 처리합니다.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # 첫 점과 마지막 점은 고정, 나머지 n - 2개 점을 n_out - 2개 버킷으로 나눔
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    sizes = np.diff(edges)
+    avg_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / sizes
+    avg_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / sizes
+    # 각 버킷의 다음 버킷 평균 (마지막 버킷은 마지막 점)
+    next_x = np.append(avg_x[1:], x[n - 1])
+    next_y = np.append(avg_y[1:], y[n - 1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # 이전에 고른 점, 후보 점, 다음 버킷 평균이 이루는 삼각형 면적(의 2배)이 가장 큰 후보 선택
+        area = np.abs((x[previous] - next_x[bucket]) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (next_y[bucket] - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+def hexbin(x, y, gridsize=50, extent=None):
+    """
+    (x, y) 점들을 육각형 격자(matplotlib hexbin과 같은 방식)로 집계합니다.
+
+    Returns:
+        tuple: (점이 있는 육각형의 중심 x, 중심 y, 각 점이 속한 육각형 번호)
+    """
+    xmin, xmax, ymin, ymax = extent or (x.min(), x.max(), y.min(), y.max())
+    nx = gridsize
+    ny = max(1, int(nx / np.sqrt(3)))
+    sx = (xmax - xmin) / nx or 1.0
+    sy = (ymax - ymin) / ny or 1.0
+    ix = (x - xmin) / sx
+    iy = (y - ymin) / sy
+
+    # 두 개의 어긋난 사각 격자 중 더 가까운 격자점을 육각형 중심으로 사용
+    i1, j1 = np.round(ix), np.round(iy)
+    i2, j2 = np.floor(ix), np.floor(iy)
+    d1 = (ix - i1) ** 2 + 3.0 * (iy - j1) ** 2
+    d2 = (ix - i2 - 0.5) ** 2 + 3.0 * (iy - j2 - 0.5) ** 2
+    first = d1 < d2
+    center_x = np.where(first, i1, i2 + 0.5)
+    center_y = np.where(first, j1, j2 + 0.5)
+
+    # 중심 좌표를 (2배 해서) 정수 번호로 바꾼 뒤 점이 있는 육각형만 남김
+    stride = 2 * ny + 4
+    keys = (2 * center_x).astype(np.int64) * stride + (2 * center_y).astype(np.int64)
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    return xmin + (unique_keys // stride) / 2 * sx, ymin + (unique_keys % stride) / 2 * sy, inverse
+
+def _class_codes(target):
+    codes, classes = pd.factorize(np.asarray(target), sort=True)
+    return codes, classes.tolist()
+
+def lttb_points(data, features, target_column, n_points=1000, x_column=None):
+    """
+    특성마다 x(x_column 값 또는 행 순서)에 대한 값 계열을 LTTB로 n_points개로 줄입니다.
+    """
+    series = {}
+    if x_column is not None:
+        x_all = data[x_column]
+        if not pd.api.types.is_numeric_dtype(x_all):
+            # 시각 문자열은 epoch 초로 변환 (변환할 수 없는 값은 결측)
+            x_all = (pd.to_datetime(x_all, errors="coerce") - pd.Timestamp(0)).dt.total_seconds()
+        x_all = x_all.to_numpy(dtype=float, na_value=np.nan)
+    else:
+        x_all = np.arange(len(data), dtype=float)
+
+    for feature in features:
+        y = data[feature].to_numpy(dtype=float, na_value=np.nan)
+        valid = ~(np.isnan(x_all) | np.isnan(y))
+        x, y = x_all[valid], y[valid]
+        order = np.argsort(x, kind="stable")
+        x, y = x[order], y[order]
+        selected = lttb(x, y, n_points)
+        series[feature] = {"x": x[selected].tolist(), "y": y[selected].tolist(), "n_rows": int(valid.sum())}
+    return {"x_column": x_column, "n_points": n_points, "series": series}
+
+def hexbin_points(data, features, target_column, gridsize=50):
+    """
+    상위 특성의 모든 쌍에 대해 육각형 구간별 점 수와 클래스별 점 수를 집계합니다.
+    """
+    codes, classes = _class_codes(data[target_column])
+    pairs = []
+    for i, feature_x in enumerate(features):
+        for feature_y in features[i + 1:]:
+            x = data[feature_x].to_numpy(dtype=float, na_value=np.nan)
+            y = data[feature_y].to_numpy(dtype=float, na_value=np.nan)
+            valid = ~(np.isnan(x) | np.isnan(y))
+            if not valid.any():
+                continue
+            centers_x, centers_y, bins = hexbin(x[valid], y[valid], gridsize)
+            pair_codes = codes[valid]
+            labeled = pair_codes >= 0
+            class_counts = np.bincount(bins[labeled] * len(classes) + pair_codes[labeled],
+                                       minlength=len(centers_x) * len(classes)).reshape(len(centers_x), len(classes))
+            pairs.append({
+                "x": feature_x,
+                "y": feature_y,
+                "centers_x": centers_x.tolist(),
+                "centers_y": centers_y.tolist(),
+                "counts": np.bincount(bins, minlength=len(centers_x)).tolist(),
+                "class_counts": class_counts.tolist(),
+            })
+    return {"gridsize": gridsize, "classes": classes, "pairs": pairs}
+
+def sample_points(data, features, target_column, n_points=1000, random_state=42):
+    """
+    클래스별 층화 표본으로 최대 n_points개의 원본 점을 고릅니다.
+    """
+    n_classes = max(1, data[target_column].nunique())
+    X_sample, y_sample = stratified_sampling(data[features], data[target_column],
+                                             max(1, n_points // n_classes), random_state)
+    # 결측값은 JSON null로 전달
+    points = {feature: X_sample[feature].astype(object).where(X_sample[feature].notna(), None).tolist()
+              for feature in features}
+    return {
+        "n_points": len(X_sample),
+        "points": points,
+        "target": y_sample.tolist(),
+    }
+
+def _numeric_top_features(columns_data, feature_importances, target_column, top_n):
+    # 숫자형 특성 중 중요도 상위 top_n개 (중요도 내림차순)
+    numeric = [column for column in columns_data.columns
+               if column != target_column and pd.api.types.is_numeric_dtype(columns_data[column])]
+    numeric.sort(key=lambda column: feature_importances.get(column, 0.0), reverse=True)
+    return numeric[:top_n]
+
+def compute_plot_points(method, data_path, holdout_path, target_column, feature_importances, output_path, top_n=3,
+                        n_points=1000, gridsize=50, x_column=None, data_format=None):
+    """
+    학습 데이터(없으면 평가용 표본)의 상위 특성으로 점 집합/구간 집계를 만들어 output_path에 JSON으로 저장합니다.
+    필요한 열만 읽으며, 프로세스 풀 워커에서 실행됩니다. data_format이 None이면 학습 데이터 형식은 확장자로 판단합니다.
+    """
+    from ml.common.file_operations import load_dataset, _to_json_value
+
+    if method not in POINT_METHODS:
+        raise ValueError(f"Unknown point method '{method}', expected one of {list(POINT_METHODS)}")
+
+    # 열 타입은 작은 평가용 표본으로 판단하고, 큰 학습 데이터에서는 필요한 열만 읽음
+    holdout = load_dataset(holdout_path, "parquet")
+    features = _numeric_top_features(holdout, feature_importances, target_column, top_n)
+    if not features:
+        raise ValueError("No numeric features to plot")
+    if x_column is not None and x_column not in holdout.columns:
+        raise ValueError(f"Column '{x_column}' not found")
+
+    source = "holdout"
+    data = holdout
+    if data_path is not None and os.path.exists(data_path):
+        columns = list(dict.fromkeys(features + [target_column] + ([x_column] if x_column else [])))
+        data = load_dataset(data_path, data_format, columns=columns)
+        source = "training_data"
+
+    if method == "lttb":
+        result = lttb_points(data, features, target_column, n_points, x_column)
+    elif method == "hexbin":
+        result = hexbin_points(data, features, target_column, gridsize)
+    else:
+        result = sample_points(data, features, target_column, n_points)
+    result = dict(result, method=method, source=source, n_rows=len(data), features=features,
+                  target_column=target_column)
+
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(result, file, ensure_ascii=False, default=_to_json_value)
+    os.replace(tmp_path, output_path)
+    return output_path
@@ -1,18 +1,38 @@
 # ml\utils\visualization.py
 
-import matplotlib.pyplot as plt
+import os
+from functools import lru_cache
+
 import numpy as np
-import seaborn as sns
 import pandas as pd
-from mpl_toolkits.mplot3d import Axes3D
-import matplotlib.font_manager as fm
-from matplotlib.font_manager import FontProperties
 
-# 폰트 설정
-font_path = 'C:/Windows/Fonts/malgun.ttf'
-fontprop = FontProperties(fname=font_path)
-plt.rcParams['font.family'] = fontprop.get_name()
-plt.rcParams['axes.unicode_minus'] = False
+# 한글 폰트 경로 (파일이 없으면 기본 폰트 사용)
+FONT_PATH = 'C:/Windows/Fonts/malgun.ttf'
+
+PLOT_FORMATS = ("png", "svg")
+# 산점도 행렬에 그릴 최대 점 수
+PAIRPLOT_MAX_POINTS = 2000
+
+def _pyplot():
+    # 서버/워커 프로세스에서도 동작하도록 화면 없이 그리는 Agg 백엔드 사용 (import 시점이 아니라 처음 그릴 때 로드)
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+@lru_cache(maxsize=None)
+def _font_properties():
+    # 폰트 설정 - 처음 그릴 때 한 번만 로드하고, 폰트 파일이 없으면 None
+    if not os.path.exists(FONT_PATH):
+        return None
+    from matplotlib.font_manager import FontProperties, fontManager
+
+    plt = _pyplot()
+    fontManager.addfont(FONT_PATH)
+    fontprop = FontProperties(fname=FONT_PATH)
+    plt.rcParams['font.family'] = fontprop.get_name()
+    plt.rcParams['axes.unicode_minus'] = False
+    return fontprop
 
 def select_top_features(X_processed, feature_importances, top_n=3):
     # 특성 중요도에 따라 상위 N개의 특성 선택
@@ -20,108 +40,184 @@ def select_top_features(X_processed, feature_importances, top_n=3):
     top_features = [X_processed.columns[i] for i in top_indices]
     return X_processed[top_features], top_features
 
-def stratified_sampling(X_processed, y_processed, sample_size_per_class=500):
-    df = pd.concat([X_processed, y_processed], axis=1)
-    df.columns = list(X_processed.columns) + ['target']
-    sampled_df = df.groupby('target', group_keys=False).apply(lambda x: x.sample(n=min(len(x), sample_size_per_class)))
-    sampled_df = sampled_df.reset_index(drop=True)
-    X_sample = sampled_df.drop('target', axis=1)
-    y_sample = sampled_df['target']
+def stratified_sampling(X_processed, y_processed, sample_size_per_class=500, random_state=None):
+    # 클래스별 층화 샘플링 - 전체 행 순서를 한 번 섞은 뒤 클래스 번호로 안정 정렬하면 클래스마다 무작위 순서가 되므로,
+    # 클래스 안에서의 순위가 sample_size_per_class 미만인 행만 고름 (그룹별 lambda 없이 NumPy 연산으로 처리)
+    codes, classes = pd.factorize(np.asarray(y_processed), sort=True)
+    # 타겟이 결측인 행(번호 -1)은 제외
+    rows = np.flatnonzero(codes >= 0)
+    codes = codes[rows].astype(np.min_scalar_type(max(len(classes) - 1, 0)))
+    order = np.random.default_rng(random_state).permutation(len(rows))
+    # 작은 정수 타입의 안정 정렬은 기수 정렬(radix sort)로 처리됨
+    order = order[np.argsort(codes[order], kind='stable')]
+    counts = np.bincount(codes, minlength=len(classes))
+    rank = np.arange(len(order)) - np.repeat(np.cumsum(counts) - counts, counts)
+    selected = rows[order[rank < sample_size_per_class]]
+
+    X_sample = X_processed.iloc[selected].reset_index(drop=True)
+    y_sample = pd.Series(np.asarray(y_processed)[selected], name='target')
     return X_sample, y_sample
 
 def plot_3d_scatter(X_sampled, y_sampled, top_features):
+    plt = _pyplot()
+    fontprop = _font_properties()
     fig = plt.figure(figsize=(12, 9))
     ax = fig.add_subplot(111, projection='3d')
-    
-    scatter = ax.scatter(X_sampled.iloc[:, 0], 
-                         X_sampled.iloc[:, 1], 
-                         X_sampled.iloc[:, 2], 
-                         c=y_sampled, 
-                         cmap='viridis', 
+
+    # 문자열 타겟도 색으로 구분할 수 있도록 클래스 번호로 변환
+    scatter = ax.scatter(X_sampled.iloc[:, 0],
+                         X_sampled.iloc[:, 1],
+                         X_sampled.iloc[:, 2],
+                         c=pd.factorize(y_sampled, sort=True)[0],
+                         cmap='viridis',
                          alpha=0.6)
-    
+
     ax.set_xlabel(top_features[0])
     ax.set_ylabel(top_features[1])
     ax.set_zlabel(top_features[2])
-    ax.set_title('상위 3개 중요한 특성에 대한 3D 산점도', fontproperties=fontprop)
-    
-    plt.colorbar(scatter)
-    plt.tight_layout()
-    plt.show()
+    if fontprop is not None:
+        ax.set_title('상위 3개 중요한 특성에 대한 3D 산점도', fontproperties=fontprop)
+    else:
+        ax.set_title('3D Scatter Plot (Top 3 Features)')
+
+    fig.colorbar(scatter)
+    fig.tight_layout()
+    return fig
+
+def plot_scatter_matrix(X_sampled, y_sampled, max_points=PAIRPLOT_MAX_POINTS):
+    import seaborn as sns
+
+    # 산점도 행렬은 점 수 x 특성 수^2 만큼 그리므로 점이 많으면 클래스별로 나눠 max_points개 이하로 줄임
+    if len(X_sampled) > max_points:
+        n_classes = max(1, pd.Series(y_sampled).nunique())
+        X_sampled, y_sampled = stratified_sampling(X_sampled, y_sampled, max(1, max_points // n_classes))
 
-def plot_scatter_matrix(X_sampled, y_sampled):
     df = X_sampled.copy()
-    df['target'] = y_sampled
-    
-    sns.set(style="ticks", color_codes=True)
-    g = sns.pairplot(df, hue='target', vars=X_sampled.columns, plot_kws={'s': 20, 'alpha': 0.5})
+    df['target'] = y_sampled.to_numpy()
+
+    # sns.set은 전역 설정(폰트 포함)을 바꾸므로 이 그림에만 스타일 적용
+    with sns.axes_style("ticks"):
+        g = sns.pairplot(df, hue='target', vars=X_sampled.columns, plot_kws={'s': 20, 'alpha': 0.5})
     g.fig.suptitle('Scatter Plot Matrix (Sampled Data)', y=1.02)
-    plt.show()
+    return g.fig
 
 def plot_correlation_heatmap(X_sampled):
-    plt.figure(figsize=(12, 10))
+    import seaborn as sns
+
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(12, 10))
     corr = X_sampled.corr()
-    sns.heatmap(corr, annot=True, cmap='coolwarm', linewidths=0.5)
-    plt.title('Correlation Heatmap (Top Features)')
-    plt.show()
+    sns.heatmap(corr, annot=True, cmap='coolwarm', linewidths=0.5, ax=ax)
+    ax.set_title('Correlation Heatmap (Top Features)')
+    return fig
 
 def plot_feature_importance(features, feature_importances, top_n=10):
+    plt = _pyplot()
     # 상위 n개의 특성 선택
     indices = np.argsort(feature_importances)[-top_n:]
     pos = np.arange(len(indices)) + .5
-    fig = plt.figure(figsize=(12, 6))
-    plt.barh(pos, np.array(feature_importances)[indices], align='center')
-    plt.yticks(pos, np.array(features)[indices])
-    plt.title(f'Top {top_n} Feature Importances')
-    plt.xlabel('Importance')
-    plt.tight_layout()
-    plt.show()
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.barh(pos, np.array(feature_importances)[indices], align='center')
+    ax.set_yticks(pos, np.array(features)[indices])
+    ax.set_title(f'Top {len(indices)} Feature Importances')
+    ax.set_xlabel('Importance')
+    fig.tight_layout()
+    return fig
 
 def plot_box_plots(X_sampled, y_sampled, top_features):
+    import seaborn as sns
+
+    plt = _pyplot()
     fig, axes = plt.subplots(1, len(top_features), figsize=(5 * len(top_features), 6))
     if len(top_features) == 1:
         axes = [axes]
     for idx, column in enumerate(top_features):
-        sns.boxplot(x=y_sampled, y=X_sampled[column], ax=axes[idx])
+        sns.boxplot(x=y_sampled.to_numpy(), y=X_sampled[column].to_numpy(), ax=axes[idx])
         axes[idx].set_title(f'Box Plot of {column}')
-    plt.tight_layout()
-    plt.show()
-
-def visualize_data(X_processed, y_processed, features, feature_importances, time_data=None):
-    # 상위 N개의 중요한 특성 선택 (여기서는 상위 3개)
-    X_top_features, top_features = select_top_features(X_processed, feature_importances, top_n=3)
-    
-    # 데이터 샘플링 (층화 샘플링)
-    X_sampled, y_sampled = stratified_sampling(X_top_features, y_processed, sample_size_per_class=500)
-    
-    while True:
-        print("\nAvailable visualizations:")
-        print("1. 3D Scatter Plot (Top Features)")
-        print("2. Scatter Plot Matrix (Top Features)")
-        print("3. Correlation Heatmap (Top Features)")
-        print("4. Feature Importance")
-        print("5. Box Plots (Top Features)")
-        print("6. Exit")
-        
-        choice = input("원하는 시각화 번호를 입력하세요 (또는 6을 눌러 종료): ")
-        
-        if choice == '1':
-            plot_3d_scatter(X_sampled, y_sampled, top_features)
-        elif choice == '2':
-            plot_scatter_matrix(X_sampled, y_sampled)
-        elif choice == '3':
-            plot_correlation_heatmap(X_sampled)
-        elif choice == '4':
-            plot_feature_importance(features, feature_importances)
-        elif choice == '5':
-            plot_box_plots(X_sampled, y_sampled, top_features)
-        elif choice == '6':
-            break
-        else:
-            print("잘못된 입력입니다. 다시 시도해주세요.")
+    fig.tight_layout()
+    return fig
+
+# 플롯 종류 -> 그리기 함수 (상위 특성 표본, 표본 타겟, 상위 특성 이름, 전체 특성 이름, 전체 중요도)
+PLOTS = {
+    "scatter3d": lambda X, y, top, features, importances: plot_3d_scatter(X, y, top),
+    "pairplot": lambda X, y, top, features, importances: plot_scatter_matrix(X, y),
+    "heatmap": lambda X, y, top, features, importances: plot_correlation_heatmap(X),
+    "importance": lambda X, y, top, features, importances: plot_feature_importance(features, importances),
+    "boxplot": lambda X, y, top, features, importances: plot_box_plots(X, y, top),
+}
+
+def save_figure(fig, output_path, output_format="png"):
+    """
+    그림을 파일로 저장하고 닫습니다. 임시 파일에 쓴 뒤 교체하므로 읽는 쪽은 완성된 파일만 봅니다.
+    """
+    plt = _pyplot()
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        fig.savefig(tmp_path, format=output_format, bbox_inches='tight')
+        os.replace(tmp_path, output_path)
+    finally:
+        plt.close(fig)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return output_path
+
+def render_plot(plot_type, X, y, feature_importances, output_path, output_format="png", top_n=3,
+                sample_size_per_class=500):
+    """
+    플롯 하나를 그려 output_path에 PNG/SVG로 저장합니다.
+    산점도/히트맵/상자 그림은 숫자형 특성 중 중요도 상위 top_n개를 클래스별 층화 표본으로 그립니다.
+    """
+    if plot_type not in PLOTS:
+        raise ValueError(f"Unknown plot type '{plot_type}', expected one of {list(PLOTS)}")
+    if output_format not in PLOT_FORMATS:
+        raise ValueError(f"Unknown plot format '{output_format}', expected one of {list(PLOT_FORMATS)}")
+
+    _font_properties()
+    features = list(X.columns)
+    feature_importances = np.asarray(feature_importances, dtype=float)
+    X_top_features, top_features = None, None
+    if plot_type != "importance":
+        numeric = [i for i, column in enumerate(features) if pd.api.types.is_numeric_dtype(X[column])]
+        if len(numeric) < (3 if plot_type == "scatter3d" else 1):
+            raise ValueError(f"Not enough numeric features for plot '{plot_type}'")
+        X_numeric = X.iloc[:, numeric].astype(float)
+        X_top, top_features = select_top_features(X_numeric, feature_importances[numeric], top_n=top_n)
+        X_top_features, y = stratified_sampling(X_top, pd.Series(np.asarray(y), index=X_top.index),
+                                                sample_size_per_class=sample_size_per_class)
+
+    fig = PLOTS[plot_type](X_top_features, y, top_features, features, feature_importances)
+    return save_figure(fig, output_path, output_format)
+
+def render_model_plot(plot_type, holdout_path, target_column, feature_importances, output_path, output_format="png",
+                      top_n=3, sample_size_per_class=500):
+    """
+    모델 옆에 저장된 평가용 표본(.holdout.parquet)으로 플롯을 그려 저장합니다.
+    feature_importances는 {특성: 중요도} 형식이며, 표본의 특성 열 순서에 맞춰 사용합니다.
+    프로세스 풀 워커에서 실행되므로 데이터는 워커가 직접 읽습니다 (큰 DataFrame을 프로세스 간에 전달하지 않음).
+    """
+    from ml.common.file_operations import load_dataset
+
+    holdout = load_dataset(holdout_path, "parquet")
+    X, y = holdout.drop(target_column, axis=1), holdout[target_column]
+    importances = [feature_importances.get(column, 0.0) for column in X.columns]
+    return render_plot(plot_type, X, y, importances, output_path, output_format, top_n, sample_size_per_class)
+
+def visualize_data(X_processed, y_processed, features, feature_importances, output_dir, output_format="png",
+                   plot_types=None):
+    """
+    모든(또는 plot_types에 지정한) 시각화를 output_dir에 파일로 저장하고 {플롯 종류: 경로}를 반환합니다.
+    화면에 띄우지 않으므로 서버나 터미널이 없는 환경에서도 실행할 수 있습니다.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    X = pd.DataFrame(X_processed, columns=features)
+    paths = {}
+    for plot_type in plot_types or PLOTS:
+        output_path = os.path.join(output_dir, f"{plot_type}.{output_format}")
+        paths[plot_type] = render_plot(plot_type, X, y_processed, feature_importances, output_path, output_format)
+    return paths
 
 # 예시 사용법:
 # 모델 훈련 후에 feature_importances를 얻어야 합니다.
 # 예를 들어, feature_importances = model.get_feature_importance()
 # 그 다음 visualize_data 함수를 호출합니다.
-# visualize_data(X_processed, y_processed, features, feature_importances)
+# visualize_data(X_processed, y_processed, features, feature_importances, "plots")
@@ -12,6 +12,27 @@ import Card from '../ui/Card';
 import { CardHeader, CardTitle, CardContent } from '../../styles/commonStyles';
 
 const SERVER_URL = import.meta.env.VITE_SERVER_URL || 'http://localhost:8000';
+const JOB_POLL_INTERVAL = 1000;
+
+interface TrainingJob {
+  job_id: string;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  progress: number;
+  stage: string;
+  result: Record<string, unknown> | null;
+  error: string | null;
+}
+
+const waitForJob = async (jobId: string, onProgress: (job: TrainingJob) => void): Promise<TrainingJob> => {
+  for (;;) {
+    const { data } = await axios.get<TrainingJob>(`${SERVER_URL}/api/jobs/${jobId}`);
+    if (data.status === 'completed' || data.status === 'failed') {
+      return data;
+    }
+    onProgress(data);
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL));
+  }
+};
 
 const FileUpload = (): JSX.Element => {
   const [file, setFile] = useState<File | null>(null);
@@ -60,10 +81,17 @@ const FileUpload = (): JSX.Element => {
       });
 
       setStatusCode(response.status);
-      setUploadStatus(`${response.data.status} File: ${response.data.filename}`);
+      const { upload_result, job_id } = response.data;
+      setUploadStatus(`${upload_result.status} File: ${upload_result.filename}`);
+
+      // 학습은 백그라운드 작업으로 실행되므로 완료될 때까지 상태를 조회
+      const job = await waitForJob(job_id, (current) => {
+        setUploadStatus(`Training (${current.stage})... ${Math.round(current.progress * 100)}%`);
+      });
+      const ml_result = job.status === 'completed' ? job.result : { error: job.error };
 
       // Navigate to TestPage with analysisResult as state
-      navigate('/test', { state: response.data });
+      navigate('/test', { state: { upload_result, ml_result } });
     } catch (error) {
       console.error('Error uploading file:', error);
       if (axios.isAxiosError(error)) {